@@ -0,0 +1,94 @@
+import os
+import sys
+import copy
+import threading
+from collections import OrderedDict
+import torch
+from torchvision import models
+from config import BACKBONE_WEIGHTS_DIR, BACKBONE_CACHE_SIZE
+
+# Pretrained ImageNet weights are kept as plain state dicts in
+#   <BACKBONE_WEIGHTS_DIR>/<backbone>.pth
+# Training hosts have no internet access: the directory is populated once
+# (python backbone_store.py, on a host that can reach download.pytorch.org)
+# and shipped with the deployment. Nothing is ever downloaded at training time.
+BACKBONES = {
+    'resnet18': (models.resnet18, models.ResNet18_Weights.IMAGENET1K_V1),
+    'resnet50': (models.resnet50, models.ResNet50_Weights.IMAGENET1K_V1),
+    'resnet101': (models.resnet101, models.ResNet101_Weights.IMAGENET1K_V1),
+    'mobilenet_v2': (models.mobilenet_v2, models.MobileNet_V2_Weights.IMAGENET1K_V1)
+}
+
+
+class BackboneStore:
+    """Offline pretrained backbones with an in-process LRU of built models"""
+
+    _cache = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def weights_path(name: str) -> str:
+        return os.path.join(BACKBONE_WEIGHTS_DIR, f"{name}.pth")
+
+    @staticmethod
+    def _build(name: str) -> torch.nn.Module:
+        builder, _ = BACKBONES[name]
+        path = BackboneStore.weights_path(name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Pretrained weights for {name} not found at {path}. "
+                f"Populate the backbone store with: python backbone_store.py {name}"
+            )
+        # mmap avoids reading the whole file into a buffer before copying into the model
+        state_dict = torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+        model = builder(weights=None)
+        model.load_state_dict(state_dict)
+        return model
+
+    @staticmethod
+    def load(name: str, pretrained: bool = True) -> torch.nn.Module:
+        """
+        Fresh copy of a pretrained backbone, built from the local store once per process
+        With pretrained=False the architecture is built with random weights instead
+        """
+        if name not in BACKBONES:
+            raise ValueError(f"Unknown backbone: {name}")
+        if not pretrained:
+            builder, _ = BACKBONES[name]
+            return builder(weights=None)
+        with BackboneStore._lock:
+            model = BackboneStore._cache.get(name)
+            if model is not None:
+                BackboneStore._cache.move_to_end(name)
+        if model is None:
+            model = BackboneStore._build(name)
+            with BackboneStore._lock:
+                BackboneStore._cache[name] = model
+                BackboneStore._cache.move_to_end(name)
+                while len(BackboneStore._cache) > BACKBONE_CACHE_SIZE:
+                    BackboneStore._cache.popitem(last=False)
+        # Callers replace the head and train in place, never hand out the cached instance
+        return copy.deepcopy(model)
+
+    @staticmethod
+    def populate(names=None) -> None:
+        """Download pretrained weights into the store (needs internet access)"""
+        os.makedirs(BACKBONE_WEIGHTS_DIR, exist_ok=True)
+        for name in names or BACKBONES:
+            if name not in BACKBONES:
+                raise ValueError(f"Unknown backbone: {name} (expected one of {', '.join(BACKBONES)})")
+            path = BackboneStore.weights_path(name)
+            if os.path.exists(path):
+                print(f"{name}: already present at {path}")
+                continue
+            _, weights = BACKBONES[name]
+            print(f"{name}: downloading {weights}")
+            state_dict = weights.get_state_dict(progress=True)
+            temp_path = f"{path}.tmp{os.getpid()}"
+            torch.save(state_dict, temp_path)
+            os.replace(temp_path, path)
+            print(f"{name}: saved to {path}")
+
+
+if __name__ == "__main__":
+    BackboneStore.populate(sys.argv[1:])
@@ -0,0 +1,119 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import torch
+
+
+class CheckpointWriter:
+    """
+    Write model checkpoints on a background thread
+
+    save() snapshots the state dict to CPU memory and returns immediately; the
+    writer thread saves it to a temp file next to the target, fsyncs it and
+    renames it into place, so a crash never leaves a partially written file.
+    Checkpoints are written in the order they were saved; if a newer snapshot
+    for the same path arrives before the previous one was written, only the
+    newer one is written.
+    """
+
+    def __init__(self):
+        self.pending: Dict[str, Dict] = OrderedDict()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.busy = False
+        self.error: Optional[Exception] = None
+        self.writes: List[Dict] = []
+        self.thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def snapshot(value):
+        """Detached CPU copy of a (possibly nested) state dict, safe to keep while training continues"""
+        if isinstance(value, torch.Tensor):
+            return value.detach().to('cpu', copy=True)
+        if isinstance(value, dict):
+            return {key: CheckpointWriter.snapshot(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(CheckpointWriter.snapshot(item) for item in value)
+        return value
+
+    def save(self, state_dict: Dict, path: str, **info) -> None:
+        """Queue a checkpoint; info (e.g. epoch, kind) is recorded with the write latency"""
+        snapshot = CheckpointWriter.snapshot(state_dict)
+        with self.condition:
+            if self.error:
+                raise self.error
+            if self.closed:
+                raise RuntimeError("Checkpoint writer is closed")
+            self.pending.pop(path, None)
+            self.pending[path] = {'state_dict': snapshot, 'info': info, 'queued_at': time.perf_counter()}
+            self.condition.notify_all()
+
+    @staticmethod
+    def write_atomic(state_dict: Dict, path: str) -> int:
+        """Write a state dict via temp file, fsync and rename, returns the size in bytes"""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp{os.getpid()}"
+        try:
+            with open(temp_path, 'wb') as f:
+                torch.save(state_dict, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        # Persist the rename itself
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+        return os.path.getsize(path)
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                path, job = self.pending.popitem(last=False)
+                self.busy = True
+            try:
+                start = time.perf_counter()
+                size = CheckpointWriter.write_atomic(job['state_dict'], path)
+                finished = time.perf_counter()
+                record = dict(job['info'], path=path, bytes=size,
+                              write_seconds=finished - start, latency_seconds=finished - job['queued_at'])
+                with self.condition:
+                    self.writes.append(record)
+            except Exception as e:
+                print(f"Error writing checkpoint {path}: {e}")
+                with self.condition:
+                    self.error = self.error or e
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+
+    def flush(self) -> None:
+        """Wait until every queued checkpoint is on disk; raises the first write error"""
+        with self.condition:
+            while self.pending or self.busy:
+                self.condition.wait()
+            if self.error:
+                raise self.error
+
+    def close(self) -> None:
+        """Write the remaining checkpoints and stop the writer thread"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
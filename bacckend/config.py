@@ -0,0 +1,93 @@
+import os
+from dotenv import load_dotenv
+
+# Deployment settings, overridable through environment variables or a .env file
+load_dotenv()
+
+
+# Directory for derived data (preprocessed tensors, manifests, ...) shared by workers
+CACHE_ROOT = os.environ.get('CACHE_ROOT', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'cache')))
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+# Upload endpoint: size of the thread pool running blocking disk/DB work, and
+# how many files may be written into the same project at once
+UPLOAD_IO_THREADS = _env_int('UPLOAD_IO_THREADS', min(32, (os.cpu_count() or 1) * 4))
+UPLOAD_MAX_PARALLEL_WRITES_PER_PROJECT = _env_int('UPLOAD_MAX_PARALLEL_WRITES_PER_PROJECT', 4)
+
+# MySQL connection and pool settings
+DB_HOST = os.environ.get('DB_HOST', 'localhost')
+DB_PORT = _env_int('DB_PORT', 3306)
+DB_USER = os.environ.get('DB_USER', 'root')
+DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Eternal@12')
+DB_NAME = os.environ.get('DB_NAME', 'dvc')
+DB_POOL_MIN_SIZE = _env_int('DB_POOL_MIN_SIZE', 2)
+DB_POOL_MAX_SIZE = _env_int('DB_POOL_MAX_SIZE', 20)
+DB_POOL_TIMEOUT = _env_int('DB_POOL_TIMEOUT', 30)
+DB_POOL_RECYCLE = _env_int('DB_POOL_RECYCLE', 1800)
+
+# Upper bound on the page size of listing endpoints
+MAX_PAGE_SIZE = _env_int('MAX_PAGE_SIZE', 5000)
+
+# Training scheduler: concurrent jobs overall and per project, CPU threads each
+# job may use, and how often the queue is polled for new work (seconds).
+# TRAINING_MAX_WORKERS and TRAINING_THREADS_PER_JOB apply to each worker process
+# (every `python worker.py` and every API process with an embedded worker), so
+# the cluster-wide job limit is their sum; TRAINING_MAX_JOBS_PER_PROJECT counts
+# running jobs in the database and holds across all workers.
+TRAINING_MAX_WORKERS = _env_int('TRAINING_MAX_WORKERS', 1)
+TRAINING_MAX_JOBS_PER_PROJECT = _env_int('TRAINING_MAX_JOBS_PER_PROJECT', 1)
+TRAINING_THREADS_PER_JOB = _env_int('TRAINING_THREADS_PER_JOB', max(1, (os.cpu_count() or 1) // TRAINING_MAX_WORKERS))
+TRAINING_POLL_INTERVAL = _env_int('TRAINING_POLL_INTERVAL', 2)
+# Running jobs report liveness every HEARTBEAT_INTERVAL seconds; jobs silent for
+# HEARTBEAT_TIMEOUT seconds lost their worker and are queued again to resume
+TRAINING_HEARTBEAT_INTERVAL = _env_int('TRAINING_HEARTBEAT_INTERVAL', 15)
+TRAINING_HEARTBEAT_TIMEOUT = _env_int('TRAINING_HEARTBEAT_TIMEOUT', 120)
+# Start a worker.py process alongside the API; disable when workers are deployed separately
+TRAINING_EMBEDDED_WORKER = os.environ.get('TRAINING_EMBEDDED_WORKER', 'true').lower() in ('1', 'true', 'yes')
+
+# Memory-mapped preprocessed images (hyperparameter tensor_cache)
+TENSOR_CACHE_DIR = os.environ.get('TENSOR_CACHE_DIR', os.path.join(CACHE_ROOT, 'tensors'))
+
+# Per-version dataset scan manifests (image list and label pairing)
+SCAN_MANIFEST_DIR = os.environ.get('SCAN_MANIFEST_DIR', os.path.join(CACHE_ROOT, 'scans'))
+
+# Pretrained backbone weights, populated offline with backbone_store.py
+BACKBONE_WEIGHTS_DIR = os.environ.get('BACKBONE_WEIGHTS_DIR', os.path.join(CACHE_ROOT, 'backbones'))
+# Built backbones kept in memory per process
+BACKBONE_CACHE_SIZE = _env_int('BACKBONE_CACHE_SIZE', 2)
+
+# Inference: worker processes running predictions, and request micro-batching
+INFERENCE_WORKERS = _env_int('INFERENCE_WORKERS', 1)
+INFERENCE_THREADS_PER_WORKER = _env_int('INFERENCE_THREADS_PER_WORKER', max(1, (os.cpu_count() or 1) // 2))
+INFERENCE_MAX_BATCH_SIZE = _env_int('INFERENCE_MAX_BATCH_SIZE', 32)
+# Longest a request waits for other requests to share its batch
+INFERENCE_MAX_LATENCY_MS = _env_int('INFERENCE_MAX_LATENCY_MS', 10)
+# Loaded models kept per inference worker
+INFERENCE_MODEL_CACHE_SIZE = _env_int('INFERENCE_MODEL_CACHE_SIZE', 4)
+# Predictions are buffered and inserted in bulk
+PREDICTION_FLUSH_ROWS = _env_int('PREDICTION_FLUSH_ROWS', 500)
+PREDICTION_FLUSH_INTERVAL = _env_int('PREDICTION_FLUSH_INTERVAL', 1)
+
+# Bulk scoring jobs: images per batch and per progress checkpoint (part file)
+SCORING_BATCH_SIZE = _env_int('SCORING_BATCH_SIZE', 64)
+SCORING_CHUNK_SIZE = _env_int('SCORING_CHUNK_SIZE', 4096)
+
+# Project directories created by the API (data, models and object store of each project)
+PROJECTS_ROOT = os.environ.get('PROJECTS_ROOT', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'projects')))
+# Storage garbage collection: seconds between background runs in each worker
+# (0, the default, disables them), whether those runs delete garbage (0, the
+# default: they only report it), minimum age in seconds before an unreferenced
+# file may be deleted (protects uploads and training runs in progress), and
+# file operations per second it may issue
+STORAGE_GC_INTERVAL = _env_int('STORAGE_GC_INTERVAL', 0)
+STORAGE_GC_DELETE = _env_int('STORAGE_GC_DELETE', 0)
+STORAGE_GC_MIN_AGE = _env_int('STORAGE_GC_MIN_AGE', 24 * 3600)
+STORAGE_GC_OPS_PER_SECOND = _env_int('STORAGE_GC_OPS_PER_SECOND', 200)
+
+# Seconds an upload waits for another upload to the same dataset to finish
+DATASET_UPLOAD_LOCK_TIMEOUT = _env_int('DATASET_UPLOAD_LOCK_TIMEOUT', 300)
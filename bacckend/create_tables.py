@@ -1,10 +1,30 @@
 import pymysql
-from dbConnection import get_connection
+from dbConnection import get_db
+
+def add_column_if_missing(cursor, table: str, column: str, definition: str):
+    """Add a column to a table created by an earlier version of this script"""
+    cursor.execute("""
+        SELECT COUNT(*) AS count FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    if cursor.fetchone()['count'] == 0:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        print(f"Added column {table}.{column}")
+
+def add_index_if_missing(cursor, table: str, index: str, columns: str):
+    """Create an index unless it already exists (MySQL has no CREATE INDEX IF NOT EXISTS)"""
+    cursor.execute("""
+        SELECT COUNT(*) AS count FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    if cursor.fetchone()['count'] == 0:
+        cursor.execute(f"CREATE INDEX {index} ON {table} ({columns})")
+        print(f"Created index {index} on {table}")
 
 def create_tables():
     """Create the projects table if it doesn't exist"""
     try:
-        with get_connection() as connection:
+        with get_db() as connection:
             with connection.cursor() as cursor:
                 # Create projects table
                 cursor.execute("""
@@ -34,13 +54,35 @@ def create_tables():
                         base_path VARCHAR(500),
                         created_by VARCHAR(100) NOT NULL,
                         description TEXT,
+                        files_indexed BOOLEAN DEFAULT FALSE,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         FOREIGN KEY (project_id) REFERENCES projects(id)
                     )
                 """)
+                add_column_if_missing(cursor, 'datasets', 'files_indexed', 'BOOLEAN DEFAULT FALSE')
                 connection.commit()
                 print("Datasets table created successfully")
                 
+                # Create dataset_files table (per-version file index)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS dataset_files (
+                        id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+                        dataset_id INT NOT NULL,
+                        relative_path VARCHAR(500) NOT NULL,
+                        name VARCHAR(255) NOT NULL,
+                        file_type VARCHAR(32) NOT NULL,
+                        size_bytes BIGINT NOT NULL,
+                        content_hash VARCHAR(100),
+                        UNIQUE KEY uq_dataset_files_path (dataset_id, relative_path),
+                        KEY idx_dataset_files_name (dataset_id, name),
+                        KEY idx_dataset_files_type (dataset_id, file_type, name),
+                        KEY idx_dataset_files_size (dataset_id, size_bytes),
+                        FOREIGN KEY (dataset_id) REFERENCES datasets(id) ON DELETE CASCADE
+                    )
+                """)
+                connection.commit()
+                print("Dataset_files table created successfully")
+                
                 # Create models table with new schema
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS models (
@@ -64,6 +106,22 @@ def create_tables():
                 connection.commit()
                 print("Models table created successfully")
                 
+                # Create predictions table (log of /api/models/{id}/predict results)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS predictions (
+                        id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+                        model_id BIGINT UNSIGNED NOT NULL,
+                        input_data JSON NOT NULL,
+                        prediction JSON NOT NULL,
+                        confidence FLOAT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        KEY idx_predictions_model_created (model_id, created_at),
+                        FOREIGN KEY (model_id) REFERENCES models(id) ON DELETE CASCADE
+                    )
+                """)
+                connection.commit()
+                print("Predictions table created successfully")
+                
                 # Create training_runs table
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS training_runs (
@@ -82,13 +140,48 @@ def create_tables():
                         started_at TIMESTAMP,
                         completed_at TIMESTAMP,
                         error_message TEXT,
+                        progress INT DEFAULT 0,
+                        message TEXT,
+                        job_spec JSON,
+                        priority INT NOT NULL DEFAULT 0,
+                        cancel_requested BOOLEAN DEFAULT FALSE,
+                        state_version INT NOT NULL DEFAULT 0,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                         FOREIGN KEY (project_id) REFERENCES projects(id),
                         FOREIGN KEY (model_id) REFERENCES models(id)
                     )
                 """)
+                # Job registry columns (training_runs doubles as the durable job store)
+                add_column_if_missing(cursor, 'training_runs', 'progress', 'INT DEFAULT 0')
+                add_column_if_missing(cursor, 'training_runs', 'message', 'TEXT')
+                add_column_if_missing(cursor, 'training_runs', 'job_spec', 'JSON')
+                add_column_if_missing(cursor, 'training_runs', 'priority', 'INT NOT NULL DEFAULT 0')
+                add_column_if_missing(cursor, 'training_runs', 'cancel_requested', 'BOOLEAN DEFAULT FALSE')
+                add_column_if_missing(cursor, 'training_runs', 'state_version', 'INT NOT NULL DEFAULT 0')
+                add_column_if_missing(cursor, 'training_runs', 'updated_at',
+                                      'TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP')
+                add_column_if_missing(cursor, 'training_runs', 'heartbeat_at', 'DATETIME NULL')
+                # Why training ended: max_epochs, early_stopping, cancelled or failed
+                add_column_if_missing(cursor, 'training_runs', 'stop_reason', 'VARCHAR(50) NULL')
+                # Queued work other than training (e.g. scoring) shares the queue and workers
+                add_column_if_missing(cursor, 'training_runs', 'job_type', "VARCHAR(20) NOT NULL DEFAULT 'training'")
                 connection.commit()
                 print("Training_runs table created successfully")
                 
+                # Keyset pagination indexes for the listing endpoints (newest first)
+                add_index_if_missing(cursor, 'projects', 'idx_projects_created', 'created_at, id')
+                add_index_if_missing(cursor, 'datasets', 'idx_datasets_created', 'created_at, id')
+                add_index_if_missing(cursor, 'datasets', 'idx_datasets_project_created', 'project_id, created_at, id')
+                add_index_if_missing(cursor, 'models', 'idx_models_created', 'created_at, id')
+                add_index_if_missing(cursor, 'models', 'idx_models_project_created', 'project_id, created_at, id')
+                add_index_if_missing(cursor, 'training_runs', 'idx_training_runs_created', 'created_at, id')
+                add_index_if_missing(cursor, 'training_runs', 'idx_training_runs_project_created', 'project_id, created_at, id')
+                # Scheduler queue scans (next queued job, running jobs per project)
+                add_index_if_missing(cursor, 'training_runs', 'idx_training_runs_queue', 'status, priority, id')
+                add_index_if_missing(cursor, 'training_runs', 'idx_training_runs_status_project', 'status, project_id')
+                connection.commit()
+                print("Listing indexes created successfully")
+                
     except Exception as e:
         print(f"Error creating tables: {e}")
         raise e
@@ -0,0 +1,115 @@
+from collections import Counter
+from typing import Dict, List, Optional
+from object_store import ObjectStore
+from yolo_labels import YoloLabels
+
+
+class DatasetDiff:
+    """Change sets between two dataset versions, computed from their manifests"""
+
+    @staticmethod
+    def is_label_file(relative_path: str) -> bool:
+        return relative_path.startswith('labels/') and relative_path.endswith('.txt')
+
+    @staticmethod
+    def diff_files(old_files: Dict[str, Dict], new_files: Dict[str, Dict]) -> Dict:
+        """
+        Added, removed and modified paths between two sets of manifest entries
+
+        Files are compared by their stored content hash only, nothing is read from disk.
+        """
+        old_paths = old_files.keys()
+        new_paths = new_files.keys()
+        added = sorted(new_paths - old_paths)
+        removed = sorted(old_paths - new_paths)
+        modified = sorted(
+            path for path in old_paths & new_paths if old_files[path]['hash'] != new_files[path]['hash']
+        )
+        return {
+            'added': [{'path': path, **new_files[path]} for path in added],
+            'removed': [{'path': path, **old_files[path]} for path in removed],
+            'modified': [
+                {'path': path, 'old_hash': old_files[path]['hash'], 'new_hash': new_files[path]['hash'],
+                 'old_size': old_files[path]['size'], 'new_size': new_files[path]['size']}
+                for path in modified
+            ],
+            'summary': {
+                'added': len(added),
+                'removed': len(removed),
+                'modified': len(modified),
+                'unchanged': len(old_paths & new_paths) - len(modified),
+                'bytes_added': sum(new_files[path]['size'] for path in added),
+                'bytes_removed': sum(old_files[path]['size'] for path in removed)
+            }
+        }
+
+    @staticmethod
+    def _boxes(store: ObjectStore, digests: List[Optional[str]]) -> List[Counter]:
+        """Multiset of (class, x, y, w, h) boxes of each label object (None: no file)"""
+        boxes, offsets = YoloLabels.load([store.object_path(digest) if digest else None for digest in digests])
+        rows = boxes.tolist()
+        return [Counter(rows[offsets[i]:offsets[i + 1]]) for i in range(len(digests))]
+
+    @staticmethod
+    def diff_labels(store: ObjectStore, file_diff: Dict) -> Dict:
+        """
+        Box-level changes of the YOLO label files in a file diff
+
+        Only label objects that changed are parsed; a box counts as unchanged
+        when class and coordinates are identical.
+        """
+        changes = [(entry['path'], None, entry['hash']) for entry in file_diff['added']]
+        changes += [(entry['path'], entry['hash'], None) for entry in file_diff['removed']]
+        changes += [(entry['path'], entry['old_hash'], entry['new_hash']) for entry in file_diff['modified']]
+        changes = sorted(change for change in changes if DatasetDiff.is_label_file(change[0]))
+
+        old_boxes = DatasetDiff._boxes(store, [old for _, old, _ in changes])
+        new_boxes = DatasetDiff._boxes(store, [new for _, _, new in changes])
+
+        files = []
+        class_added, class_removed = Counter(), Counter()
+        for (path, old, new), before, after in zip(changes, old_boxes, new_boxes):
+            boxes_added = after - before
+            boxes_removed = before - after
+            added_by_class = Counter(box[0] for box in boxes_added.elements())
+            removed_by_class = Counter(box[0] for box in boxes_removed.elements())
+            class_added.update(added_by_class)
+            class_removed.update(removed_by_class)
+            files.append({
+                'path': path,
+                'change': 'added' if old is None else 'removed' if new is None else 'modified',
+                'boxes_before': sum(before.values()),
+                'boxes_after': sum(after.values()),
+                'boxes_added': sum(boxes_added.values()),
+                'boxes_removed': sum(boxes_removed.values()),
+                'classes_added': dict(sorted(added_by_class.items())),
+                'classes_removed': dict(sorted(removed_by_class.items()))
+            })
+        return {
+            'files': files,
+            'summary': {
+                'label_files_changed': len(files),
+                'boxes_added': sum(class_added.values()),
+                'boxes_removed': sum(class_removed.values()),
+                'classes': {
+                    cls: {'added': class_added[cls], 'removed': class_removed[cls],
+                          'net': class_added[cls] - class_removed[cls]}
+                    for cls in sorted(class_added.keys() | class_removed.keys())
+                }
+            }
+        }
+
+    @staticmethod
+    def diff_versions(store: ObjectStore, dataset_name: str, old_version: str, new_version: str,
+                      old_dir: str, new_dir: str, include_labels: bool = True) -> Dict:
+        """
+        Diff two versions of a dataset from their manifests
+
+        Versions written before the object store existed are ingested once first.
+        """
+        old_files = store.get_version_files(dataset_name, old_version, old_dir)
+        new_files = store.get_version_files(dataset_name, new_version, new_dir)
+        result = DatasetDiff.diff_files(old_files, new_files)
+        if include_labels:
+            result['labels'] = DatasetDiff.diff_labels(store, result)
+        return result
@@ -0,0 +1,109 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Columns the details endpoint may sort by, mapped to their SQL expression
+SORT_COLUMNS = {
+    'name': 'name',
+    'path': 'relative_path',
+    'size': 'size_bytes',
+    'type': 'file_type'
+}
+INSERT_BATCH_SIZE = 1000
+
+
+class DatasetIndex:
+    """Persisted per-version file listing backing the dataset details endpoint"""
+
+    @staticmethod
+    def file_type(file_name: str) -> str:
+        return file_name.rsplit('.', 1)[-1].lower() if '.' in file_name else 'unknown'
+
+    @staticmethod
+    def index_files(cursor, dataset_id: int, files: Dict[str, Dict]) -> int:
+        """
+        Index the files of a dataset version from its manifest entries
+        Does not commit; returns the number of indexed files
+        """
+        rows = []
+        for relative_path, entry in files.items():
+            name = relative_path.rsplit('/', 1)[-1]
+            rows.append((dataset_id, relative_path, name, DatasetIndex.file_type(name),
+                         entry['size'], entry.get('hash')))
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            cursor.executemany("""
+                INSERT INTO dataset_files (dataset_id, relative_path, name, file_type, size_bytes, content_hash)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE size_bytes = VALUES(size_bytes), content_hash = VALUES(content_hash)
+            """, rows[start:start + INSERT_BATCH_SIZE])
+        cursor.execute("UPDATE datasets SET files_indexed = TRUE WHERE id = %s", (dataset_id,))
+        return len(rows)
+
+    @staticmethod
+    def index_directory(cursor, dataset_id: int, dataset_path: str) -> int:
+        """
+        Index a dataset version uploaded before the index existed by scanning its directory once
+        Does not commit; returns the number of indexed files
+        """
+        files = {}
+        pending = [dataset_path]
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file():
+                            relative_path = os.path.relpath(entry.path, dataset_path).replace(os.sep, '/')
+                            files[relative_path] = {'size': entry.stat().st_size}
+            except OSError as e:
+                print(f"Error reading directory {directory}: {e}")
+        print(f"Indexed {len(files)} files from {dataset_path}")
+        return DatasetIndex.index_files(cursor, dataset_id, files)
+
+    @staticmethod
+    def query_files(
+        cursor,
+        dataset_id: int,
+        limit: int,
+        offset: int = 0,
+        sort: str = 'name',
+        order: str = 'asc',
+        file_type: Optional[str] = None
+    ) -> Tuple[List[Dict], int]:
+        """
+        Return one page of indexed files and the total number of matching files
+        file_type may list several types separated by commas (e.g. jpg,jpeg,png)
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort}, expected one of {', '.join(SORT_COLUMNS)}")
+        direction = 'DESC' if order.lower() == 'desc' else 'ASC'
+
+        where = "dataset_id = %s"
+        params = [dataset_id]
+        file_types = [value.strip().lower() for value in (file_type or '').split(',') if value.strip()]
+        if file_types:
+            where += f" AND file_type IN ({', '.join(['%s'] * len(file_types))})"
+            params.extend(file_types)
+
+        cursor.execute(f"SELECT COUNT(*) AS total FROM dataset_files WHERE {where}", params)
+        total = cursor.fetchone()['total']
+
+        cursor.execute(f"""
+            SELECT relative_path, name, file_type, size_bytes, content_hash
+            FROM dataset_files
+            WHERE {where}
+            ORDER BY {SORT_COLUMNS[sort]} {direction}, id {direction}
+            LIMIT %s OFFSET %s
+        """, params + [limit, offset])
+        return cursor.fetchall(), total
+
+    @staticmethod
+    def count_types(cursor, dataset_id: int) -> Dict[str, int]:
+        """Number of indexed files per file type"""
+        cursor.execute("""
+            SELECT file_type, COUNT(*) AS count FROM dataset_files
+            WHERE dataset_id = %s
+            GROUP BY file_type
+        """, (dataset_id,))
+        return {row['file_type']: row['count'] for row in cursor.fetchall()}
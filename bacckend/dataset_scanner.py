@@ -0,0 +1,101 @@
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional
+from config import SCAN_MANIFEST_DIR
+from yolo_labels import YoloLabels
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
+YAML_EXTENSIONS = ('.yaml', '.yml')
+MANIFEST_FORMAT_VERSION = 2
+
+
+class DatasetScanner:
+    """
+    Single-pass scan of a dataset version directory
+
+    Produces a manifest with the root file count, YAML configs, the image list
+    and the parsed labels, reading each directory exactly once. Dataset versions
+    are immutable, so manifests are cached per version in SCAN_MANIFEST_DIR, with
+    the labels in a companion .npz next to the scan manifest (not in the
+    version's object-store manifest, which also covers legacy directory scans).
+    """
+
+    @staticmethod
+    def _list_files(directory: str) -> List[os.DirEntry]:
+        if not os.path.isdir(directory):
+            return []
+        with os.scandir(directory) as entries:
+            return [entry for entry in entries if entry.is_file()]
+
+    @staticmethod
+    def _manifest_path(dataset_path: str, cache_key: str) -> str:
+        key = hashlib.sha256(f"{cache_key}:{os.path.abspath(dataset_path)}".encode()).hexdigest()[:32]
+        return os.path.join(SCAN_MANIFEST_DIR, f"{key}.json")
+
+    @staticmethod
+    def _with_labels(manifest: Dict, boxes, offsets) -> Dict:
+        manifest['label_boxes'] = boxes
+        manifest['label_offsets'] = offsets
+        manifest['labels'] = YoloLabels.first_classes(boxes, offsets) if boxes is not None else None
+        return manifest
+
+    @staticmethod
+    def scan(dataset_path: str, cache_key: Optional[str] = None, num_threads: int = 8) -> Dict:
+        """
+        Scan a dataset directory, reusing the cached manifest of the version when available
+
+        Returns a dict with file_count, yaml_files, image_files and has_labels.
+        With a labels/ directory it also holds label_boxes and label_offsets (see
+        yolo_labels) and labels, the first class per image (0 without boxes).
+        """
+        manifest_path = DatasetScanner._manifest_path(dataset_path, cache_key) if cache_key else None
+        if manifest_path and os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, 'r') as f:
+                    manifest = json.load(f)
+                if manifest.get('format') == MANIFEST_FORMAT_VERSION:
+                    boxes, offsets = None, None
+                    if manifest['has_labels']:
+                        boxes, offsets = YoloLabels.load_file(f"{manifest_path[:-len('.json')]}.labels.npz")
+                    print(f"Using cached dataset manifest {manifest_path}")
+                    return DatasetScanner._with_labels(manifest, boxes, offsets)
+            except Exception as e:
+                print(f"Ignoring unreadable dataset manifest {manifest_path}: {e}")
+
+        root_files = DatasetScanner._list_files(dataset_path)
+        images_dir = os.path.join(dataset_path, 'images')
+        labels_dir = os.path.join(dataset_path, 'labels')
+
+        # Images come from images/ when it exists, otherwise from the dataset root
+        image_entries = DatasetScanner._list_files(images_dir) if os.path.isdir(images_dir) else root_files
+        image_files = sorted(entry.path for entry in image_entries if entry.name.lower().endswith(IMAGE_EXTENSIONS))
+
+        has_labels = os.path.isdir(labels_dir)
+        boxes, offsets = None, None
+        if has_labels:
+            label_files = {entry.name: entry.path for entry in DatasetScanner._list_files(labels_dir)}
+            label_paths = [
+                label_files.get(os.path.basename(image_path).rsplit('.', 1)[0] + '.txt')
+                for image_path in image_files
+            ]
+            boxes, offsets = YoloLabels.load(label_paths, num_threads=num_threads)
+
+        manifest = {
+            'format': MANIFEST_FORMAT_VERSION,
+            'file_count': len([entry for entry in root_files if '.' in entry.name and not entry.name.startswith('.')]),
+            'yaml_files': sorted(entry.path for entry in root_files if entry.name.lower().endswith(YAML_EXTENSIONS)),
+            'image_files': image_files,
+            'has_labels': has_labels
+        }
+
+        if manifest_path:
+            os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+            if has_labels:
+                # Labels first, the manifest is only published once they exist
+                YoloLabels.save(f"{manifest_path[:-len('.json')]}.labels.npz", boxes, offsets)
+            temp_path = f"{manifest_path}.tmp{os.getpid()}"
+            with open(temp_path, 'w') as f:
+                json.dump(manifest, f)
+            os.replace(temp_path, manifest_path)
+        return DatasetScanner._with_labels(manifest, boxes, offsets)
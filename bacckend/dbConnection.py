@@ -1,13 +1,126 @@
+import hashlib
 import pymysql
-from pymysql.connections import Connection
-from pymysql.cursors import Cursor
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from config import (DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME, DB_POOL_MIN_SIZE,
+                    DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE)
 
-def get_connection():
-    connection = pymysql.connect(
-        host='localhost',
-        user='root',
-        password='Eternal@12',
-        database='dvc',
+def _connect():
+    return pymysql.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
         cursorclass=pymysql.cursors.DictCursor
     )
-    return connection
\ No newline at end of file
+
+# Connections are reused across requests: the pool keeps DB_POOL_MIN_SIZE idle
+# connections, opens overflow connections up to DB_POOL_MAX_SIZE, pings each
+# connection on checkout and recycles connections older than DB_POOL_RECYCLE seconds
+pool = QueuePool(
+    _connect,
+    pool_size=DB_POOL_MIN_SIZE,
+    max_overflow=max(DB_POOL_MAX_SIZE - DB_POOL_MIN_SIZE, 0),
+    timeout=DB_POOL_TIMEOUT,
+    recycle=DB_POOL_RECYCLE,
+    pre_ping=True
+)
+
+_pool_counters = {'connects': 0, 'checkouts': 0, 'invalidated': 0}
+
+@event.listens_for(pool, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    _pool_counters['connects'] += 1
+
+@event.listens_for(pool, 'checkout')
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    _pool_counters['checkouts'] += 1
+
+@event.listens_for(pool, 'invalidate')
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    _pool_counters['invalidated'] += 1
+
+def get_connection():
+    """Check out a pooled connection; close() returns it to the pool"""
+    return pool.connect()
+
+@contextmanager
+def get_db():
+    connection = get_connection()
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+def warm_pool():
+    """Open the minimum number of connections up front"""
+    connections = [get_connection() for _ in range(DB_POOL_MIN_SIZE)]
+    for connection in connections:
+        connection.close()
+
+def pool_status() -> dict:
+    """Current pool usage and lifetime counters"""
+    return {
+        'min_size': DB_POOL_MIN_SIZE,
+        'max_size': DB_POOL_MAX_SIZE,
+        'idle': pool.checkedin(),
+        'in_use': pool.checkedout(),
+        'overflow': max(pool.overflow(), 0),
+        'total_connects': _pool_counters['connects'],
+        'total_checkouts': _pool_counters['checkouts'],
+        'invalidated': _pool_counters['invalidated']
+    }
+
+class NamedLock:
+    """
+    MySQL advisory lock (GET_LOCK) shared by every process using the database
+
+    The lock belongs to the connection that took it, so that connection is
+    held until release().
+    """
+
+    def __init__(self, name: str, timeout: int = 0):
+        # MySQL limits lock names to 64 characters
+        self.name = name if len(name) <= 64 else f"{name[:23]}:{hashlib.sha1(name.encode('utf-8')).hexdigest()}"
+        self.timeout = timeout
+        self.connection = None
+
+    def acquire(self) -> bool:
+        """Take the lock, waiting up to timeout seconds; False if another holder kept it"""
+        connection = get_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT GET_LOCK(%s, %s) AS acquired", (self.name, self.timeout))
+                acquired = cursor.fetchone()['acquired'] == 1
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self.connection = connection
+        return True
+
+    def release(self) -> None:
+        if self.connection is None:
+            return
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (self.name,))
+        except Exception:
+            # A connection that may still hold the lock must not go back to the pool
+            self.connection.invalidate()
+            raise
+        finally:
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError(f"Lock {self.name} is held by another process")
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.release()
@@ -1,8 +1,8 @@
 import subprocess
 import os
-import hashlib
 import json
 from typing import List, Tuple, Optional
+from hashing import hash_files
 
 class DVCManager:
     """Manage DVC operations for datasets and models"""
@@ -128,12 +128,7 @@ class DVCManager:
         Generate a DVC-style hash for files
         This is a fallback if DVC is not available
         """
-        hash_content = ""
-        for file_path in sorted(file_paths):
-            if os.path.exists(file_path):
-                with open(file_path, 'rb') as f:
-                    hash_content += f.read().hex()
-        return hashlib.md5(hash_content.encode()).hexdigest()
+        return hash_files(file_paths)
     
     @staticmethod
     def list_tracked_files(project_path: str) -> List[str]:
@@ -0,0 +1,75 @@
+import os
+import hashlib
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+# Files are hashed in fixed-size chunks so memory use stays bounded
+# regardless of file size
+HASH_ALGORITHM = 'sha256'
+CHUNK_SIZE = 1024 * 1024
+
+
+def new_digest():
+    """Create an empty digest of the configured algorithm"""
+    return hashlib.new(HASH_ALGORITHM)
+
+
+def hash_stream(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Tuple[str, int]:
+    """Hash a binary stream chunk by chunk, returns (digest, size)"""
+    digest = new_digest()
+    size = 0
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def copy_and_hash(source: BinaryIO, destination: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Tuple[str, int]:
+    """Copy a stream while hashing it in the same pass, returns (digest, size)"""
+    digest = new_digest()
+    size = 0
+    for chunk in iter(lambda: source.read(chunk_size), b''):
+        digest.update(chunk)
+        destination.write(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def hash_file(file_path: str, chunk_size: int = CHUNK_SIZE) -> Tuple[str, int]:
+    """Hash a file chunk by chunk, returns (digest, size)"""
+    with open(file_path, 'rb') as f:
+        return hash_stream(f, chunk_size)
+
+
+def combine_digests(file_digests: Dict[str, str]) -> str:
+    """
+    Combine per-file digests into a single Merkle-style root digest
+
+    Leaves are ordered by relative path, so the result does not depend on
+    the order in which files were added or hashed.
+    """
+    root = new_digest()
+    for relative_path in sorted(file_digests):
+        root.update(relative_path.encode('utf-8'))
+        root.update(b'\0')
+        root.update(file_digests[relative_path].encode('ascii'))
+        root.update(b'\n')
+    return root.hexdigest()
+
+
+def hash_files(file_paths: List[str], base_dir: Optional[str] = None) -> str:
+    """
+    Compute the dataset digest of a set of files
+
+    Files are keyed by their path relative to base_dir (defaults to the
+    common parent directory); missing files are skipped.
+    """
+    existing = [path for path in file_paths if os.path.exists(path)]
+    if not existing:
+        return combine_digests({})
+    if base_dir is None:
+        base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in existing])
+    file_digests = {}
+    for file_path in existing:
+        relative_path = os.path.relpath(os.path.abspath(file_path), base_dir).replace(os.sep, '/')
+        file_digests[relative_path] = hash_file(file_path)[0]
+    return combine_digests(file_digests)
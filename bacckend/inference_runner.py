@@ -0,0 +1,87 @@
+import io
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+import torch
+from PIL import Image
+from torchvision import transforms
+from training_service import TrainingService, IMAGE_SIZE, NORMALIZE_MEAN, NORMALIZE_STD
+from config import INFERENCE_MODEL_CACHE_SIZE
+
+# Same preprocessing as validation during training
+transform = transforms.Compose([
+    transforms.Resize(IMAGE_SIZE),
+    transforms.ToTensor(),
+    transforms.Normalize(mean=NORMALIZE_MEAN, std=NORMALIZE_STD)
+])
+
+
+class InferenceRunner:
+    """Runs prediction batches for registered models, keeping recently used models loaded"""
+
+    _models = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(spec: Dict):
+        # A model file rewritten in place (same id, new mtime) must not be served stale
+        return (spec['model_id'], spec['model_path'], spec.get('model_mtime'))
+
+    @staticmethod
+    def _load_model(spec: Dict) -> torch.nn.Module:
+        print(f"Loading model {spec['model_id']} from {spec['model_path']}")
+        model = TrainingService._create_model(
+            spec['architecture'], spec['num_classes'],
+            channels_last=spec.get('channels_last', False), pretrained=False
+        )
+        state_dict = torch.load(spec['model_path'], map_location='cpu', mmap=True, weights_only=True)
+        model.load_state_dict(state_dict)
+        model.eval()
+        return model
+
+    @staticmethod
+    def get_model(spec: Dict) -> torch.nn.Module:
+        """Model for a spec, from the LRU cache when already loaded"""
+        key = InferenceRunner._cache_key(spec)
+        with InferenceRunner._lock:
+            model = InferenceRunner._models.get(key)
+            if model is not None:
+                InferenceRunner._models.move_to_end(key)
+                return model
+        model = InferenceRunner._load_model(spec)
+        with InferenceRunner._lock:
+            InferenceRunner._models[key] = model
+            while len(InferenceRunner._models) > INFERENCE_MODEL_CACHE_SIZE:
+                evicted, _ = InferenceRunner._models.popitem(last=False)
+                print(f"Evicted model {evicted[0]} from inference cache")
+        return model
+
+    @staticmethod
+    def predict_batch(spec: Dict, images: List[bytes]) -> List[Dict]:
+        """
+        Class probabilities for a batch of encoded images
+        Returns one dict per image: {'probabilities': [...]} or {'error': ...}
+        """
+        model = InferenceRunner.get_model(spec)
+        results = [None] * len(images)
+        tensors, positions = [], []
+        for position, data in enumerate(images):
+            try:
+                with Image.open(io.BytesIO(data)) as image:
+                    tensors.append(transform(image.convert('RGB')))
+                positions.append(position)
+            except Exception as e:
+                results[position] = {'error': f"Cannot decode image: {e}"}
+        if not tensors:
+            return results
+
+        memory_format = torch.channels_last if spec.get('channels_last') else torch.contiguous_format
+        batch = torch.stack(tensors).contiguous(memory_format=memory_format)
+        autocast_dtype = torch.bfloat16 if spec.get('precision') == 'bf16' else None
+        with torch.inference_mode():
+            with torch.autocast(device_type='cpu', dtype=autocast_dtype, enabled=autocast_dtype is not None):
+                outputs = model(batch)
+            probabilities = torch.softmax(outputs.float(), dim=1)
+        for position, row in zip(positions, probabilities.tolist()):
+            results[position] = {'probabilities': row}
+        return results
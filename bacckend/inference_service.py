@@ -0,0 +1,165 @@
+import json
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+from dbConnection import get_db
+from config import (
+    INFERENCE_WORKERS, INFERENCE_THREADS_PER_WORKER, INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_LATENCY_MS,
+    PREDICTION_FLUSH_ROWS, PREDICTION_FLUSH_INTERVAL
+)
+
+# Like training, inference runs in spawned worker processes: the API process
+# never imports torch. Each worker keeps its own LRU of loaded models.
+process_context = multiprocessing.get_context("spawn")
+# Fire-and-forget tasks are referenced here until done so they cannot be garbage collected
+background_tasks = set()
+
+
+def _start_background(coroutine) -> asyncio.Task:
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+def _init_inference_process(num_threads: int) -> None:
+    import torch
+    torch.set_num_threads(num_threads)
+
+
+def _predict_batch_process(spec: Dict, images: List[bytes]) -> List[Dict]:
+    """Entry point of an inference batch inside a worker process"""
+    # Imported here so torch is only ever loaded inside worker processes
+    from inference_runner import InferenceRunner
+    return InferenceRunner.predict_batch(spec, images)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests for the same model into batches
+
+    A batch is dispatched once it holds max_batch_size images or when its first
+    image has waited max_latency_ms, whichever comes first. Batches of different
+    models and consecutive batches of one model run concurrently in the pool.
+    """
+
+    def __init__(self, max_batch_size: int = INFERENCE_MAX_BATCH_SIZE, max_latency_ms: int = INFERENCE_MAX_LATENCY_MS):
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.queues: Dict[int, asyncio.Queue] = {}
+        self.collectors: Dict[int, asyncio.Task] = {}
+        # Bound batches in flight so a burst queues here instead of in the pool
+        self.in_flight = asyncio.Semaphore(max(1, INFERENCE_WORKERS) * 2)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use so the API starts without spawning workers
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=INFERENCE_WORKERS, mp_context=process_context,
+                initializer=_init_inference_process, initargs=(INFERENCE_THREADS_PER_WORKER,)
+            )
+        return self.executor
+
+    async def predict(self, spec: Dict, image: bytes) -> Dict:
+        """Queue one image for the model described by spec and wait for its result"""
+        model_id = spec['model_id']
+        future = asyncio.get_running_loop().create_future()
+        if model_id not in self.queues:
+            self.queues[model_id] = asyncio.Queue()
+        await self.queues[model_id].put((spec, image, future))
+        collector = self.collectors.get(model_id)
+        if collector is None or collector.done():
+            self.collectors[model_id] = _start_background(self._collect(model_id))
+        return await future
+
+    async def _collect(self, model_id: int) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self.queues[model_id]
+        while not queue.empty():
+            batch = [queue.get_nowait()]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self.in_flight.acquire()
+            _start_background(self._dispatch(batch))
+
+    async def _dispatch(self, batch: List) -> None:
+        try:
+            # Requests for one model id may carry a newer spec (model file replaced); use the latest
+            spec = batch[-1][0]
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                self._get_executor(), _predict_batch_process, spec, [image for _, image, _ in batch]
+            )
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            print(f"Error running inference batch for model {batch[0][0]['model_id']}: {e}")
+            if isinstance(e, BrokenProcessPool):
+                # A worker died (e.g. out of memory); start a fresh pool for the next batch
+                self.shutdown()
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.in_flight.release()
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+class PredictionRecorder:
+    """Buffers prediction rows and bulk-inserts them off the request path"""
+
+    def __init__(self, flush_rows: int = PREDICTION_FLUSH_ROWS, flush_interval: float = PREDICTION_FLUSH_INTERVAL):
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rows: List[tuple] = []
+        self.flusher: Optional[asyncio.Task] = None
+
+    def record(self, model_id: int, input_data: Dict, prediction: Dict, confidence: Optional[float]) -> None:
+        self.rows.append((model_id, json.dumps(input_data), json.dumps(prediction), confidence))
+        if len(self.rows) >= self.flush_rows:
+            _start_background(self.flush())
+        elif self.flusher is None or self.flusher.done():
+            self.flusher = _start_background(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    @staticmethod
+    def _insert(rows: List[tuple]) -> None:
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.executemany("""
+                    INSERT INTO predictions (model_id, input_data, prediction, confidence)
+                    VALUES (%s, %s, %s, %s)
+                """, rows)
+                connection.commit()
+
+    async def flush(self) -> None:
+        rows, self.rows = self.rows, []
+        if not rows:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, PredictionRecorder._insert, rows)
+        except Exception as e:
+            # Predictions were already returned to clients; losing the log must not fail requests
+            print(f"Error recording {len(rows)} predictions: {e}")
+
+
+micro_batcher = MicroBatcher()
+prediction_recorder = PredictionRecorder()
@@ -0,0 +1,281 @@
+import json
+from typing import Dict, List, Optional
+from dbConnection import get_db, NamedLock
+from config import TRAINING_POLL_INTERVAL
+
+# Job state lives in the training_runs table so that it survives restarts and
+# is shared by every API worker. Each change bumps state_version, which the
+# status endpoint exposes as an ETag.
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+UPDATABLE_FIELDS = ('status', 'progress', 'message', 'model_id', 'error_message', 'cancel_requested', 'stop_reason')
+
+
+class JobRegistry:
+    """Persistent registry of training jobs"""
+
+    @staticmethod
+    def create_job(
+        job_id: str,
+        project_id: int,
+        input_datasets: List[Dict],
+        training_reason: str,
+        parameters: Dict,
+        job_spec: Dict,
+        priority: int = 0,
+        created_by: str = 'User',
+        job_type: str = 'training'
+    ) -> None:
+        """Register a new job (job_type training or scoring) in the queued state"""
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO training_runs (job_id, job_type, project_id, input_datasets, training_reason,
+                    parameters, job_spec, priority, status, progress, message, created_by)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'queued', 0, 'Waiting to start...', %s)
+                """, (
+                    job_id, job_type, project_id, json.dumps(input_datasets), training_reason,
+                    json.dumps(parameters), json.dumps(job_spec), priority, created_by
+                ))
+                connection.commit()
+
+    @staticmethod
+    def get_job(job_id: str) -> Optional[Dict]:
+        """Full job row with its JSON columns decoded, None if the job does not exist"""
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT * FROM training_runs WHERE job_id = %s", (job_id,))
+                job = cursor.fetchone()
+        if not job:
+            return None
+        for column in ('input_datasets', 'parameters', 'job_spec'):
+            if isinstance(job[column], str):
+                job[column] = json.loads(job[column])
+        return job
+
+    @staticmethod
+    def claim_next_job(max_jobs_per_project: int) -> Optional[str]:
+        """
+        Move the next queued job to running and return its id, None if nothing is eligible
+
+        Jobs are taken by priority, then FIFO, skipping projects that already run
+        max_jobs_per_project jobs. Claims from every scheduler sharing the queue
+        are serialized by a named lock, so the quota check and the UPDATE act as
+        one step and two schedulers cannot both fill a project's last slot.
+        """
+        claim_lock = NamedLock('training_claim', TRAINING_POLL_INTERVAL)
+        if not claim_lock.acquire():
+            # Another scheduler is claiming; the caller simply tries again
+            return None
+        try:
+            with get_db() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT q.job_id FROM training_runs q
+                        WHERE q.status = 'queued'
+                          AND (SELECT COUNT(*) FROM training_runs r
+                               WHERE r.status = 'running' AND r.project_id <=> q.project_id) < %s
+                        ORDER BY q.priority DESC, q.id ASC
+                        LIMIT 1
+                    """, (max_jobs_per_project,))
+                    candidate = cursor.fetchone()
+                    if not candidate:
+                        connection.rollback()
+                        return None
+                    cursor.execute("""
+                        UPDATE training_runs
+                        SET status = 'running', started_at = COALESCE(started_at, NOW()), heartbeat_at = NOW(),
+                            message = 'Training starting...', state_version = state_version + 1
+                        WHERE job_id = %s AND status = 'queued'
+                    """, (candidate['job_id'],))
+                    connection.commit()
+                    # Cancelled between the SELECT and the UPDATE
+                    return candidate['job_id'] if cursor.rowcount == 1 else None
+        finally:
+            claim_lock.release()
+
+    @staticmethod
+    def request_cancel(job_id: str) -> Optional[str]:
+        """
+        Cancel a job: queued jobs are cancelled immediately, running jobs are
+        flagged and stop at their next check. Returns the resulting status,
+        None if the job does not exist.
+        """
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE training_runs
+                    SET status = 'cancelled', stop_reason = 'cancelled', completed_at = NOW(), message = 'Cancelled before start',
+                        state_version = state_version + 1
+                    WHERE job_id = %s AND status = 'queued'
+                """, (job_id,))
+                if cursor.rowcount == 0:
+                    cursor.execute("""
+                        UPDATE training_runs
+                        SET cancel_requested = TRUE, message = 'Cancelling...', state_version = state_version + 1
+                        WHERE job_id = %s AND status = 'running'
+                    """, (job_id,))
+                connection.commit()
+                cursor.execute("SELECT status FROM training_runs WHERE job_id = %s", (job_id,))
+                row = cursor.fetchone()
+        return row['status'] if row else None
+
+    @staticmethod
+    def is_cancel_requested(job_id: str) -> bool:
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT cancel_requested FROM training_runs WHERE job_id = %s", (job_id,))
+                row = cursor.fetchone()
+        return bool(row and row['cancel_requested'])
+
+    @staticmethod
+    def heartbeat(job_id: str) -> None:
+        """Record that the process running the job is alive (not a visible state change)"""
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE training_runs SET heartbeat_at = NOW() WHERE job_id = %s AND status = 'running'",
+                    (job_id,)
+                )
+                connection.commit()
+
+    @staticmethod
+    def requeue_job(job_id: str, message: str, from_statuses=('running',)) -> bool:
+        """
+        Put a job back in the queue, e.g. to resume it from its last checkpoint
+        Running jobs that are being cancelled are left alone.
+        """
+        placeholders = ', '.join(['%s'] * len(from_statuses))
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    UPDATE training_runs
+                    SET status = 'queued', cancel_requested = FALSE, error_message = NULL, completed_at = NULL,
+                        stop_reason = NULL, message = %s, state_version = state_version + 1
+                    WHERE job_id = %s AND status IN ({placeholders})
+                      AND (status <> 'running' OR cancel_requested = FALSE)
+                """, (message, job_id, *from_statuses))
+                connection.commit()
+                return cursor.rowcount == 1
+
+    @staticmethod
+    def requeue_stale_jobs(timeout_seconds: int) -> int:
+        """
+        Queue running jobs whose worker stopped sending heartbeats (crash, deploy, ...)
+        so they resume from their last checkpoint; jobs that were being cancelled
+        are marked cancelled instead. Returns the number of jobs requeued.
+        """
+        stale = "status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < NOW() - INTERVAL %s SECOND)"
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    UPDATE training_runs
+                    SET status = 'cancelled', stop_reason = 'cancelled', completed_at = NOW(), message = 'Cancelled (worker lost)',
+                        state_version = state_version + 1
+                    WHERE cancel_requested = TRUE AND {stale}
+                """, (timeout_seconds,))
+                cursor.execute(f"""
+                    UPDATE training_runs
+                    SET status = 'queued', message = 'Worker lost, waiting to resume from last checkpoint...',
+                        state_version = state_version + 1
+                    WHERE {stale}
+                """, (timeout_seconds,))
+                requeued = cursor.rowcount
+                connection.commit()
+        return requeued
+
+    @staticmethod
+    def update_job(job_id: str, **fields) -> None:
+        """Update job state; started_at/completed_at follow status transitions"""
+        unknown = set(fields) - set(UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot update job fields: {', '.join(sorted(unknown))}")
+        assignments = [f"{field} = %s" for field in fields]
+        values = list(fields.values())
+        status = fields.get('status')
+        if status == 'running':
+            assignments.append("started_at = COALESCE(started_at, NOW())")
+        elif status in FINISHED_STATUSES:
+            assignments.append("completed_at = NOW()")
+        assignments.append("state_version = state_version + 1")
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE training_runs SET {', '.join(assignments)} WHERE job_id = %s",
+                    values + [job_id]
+                )
+                connection.commit()
+
+    @staticmethod
+    def _queue_ahead(cursor, row: Dict) -> int:
+        """Number of queued jobs scheduled before the given queued job (priority, then FIFO)"""
+        cursor.execute("""
+            SELECT COUNT(*) AS ahead FROM training_runs
+            WHERE status = 'queued' AND (priority > %s OR (priority = %s AND id < %s))
+        """, (row['priority'], row['priority'], row['id']))
+        return cursor.fetchone()['ahead']
+
+    @staticmethod
+    def get_state_tag(job_id: str) -> Optional[str]:
+        """
+        Cheap fingerprint of the job's reported state, None if the job does not exist
+
+        Queued jobs include their queue position, which moves as other jobs
+        start without the job's own row changing.
+        """
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT id, status, priority, state_version FROM training_runs WHERE job_id = %s",
+                    (job_id,)
+                )
+                row = cursor.fetchone()
+                if not row:
+                    return None
+                if row['status'] == 'queued':
+                    return f"{row['state_version']}.q{JobRegistry._queue_ahead(cursor, row)}"
+        return str(row['state_version'])
+
+    @staticmethod
+    def get_status(job_id: str) -> Optional[Dict]:
+        """Job status as reported to clients, None if the job does not exist"""
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT tr.id, tr.job_id, tr.job_type, tr.job_spec, tr.status, tr.progress, tr.message, tr.model_id, tr.error_message,
+                           tr.input_datasets, tr.priority, tr.stop_reason, tr.state_version, tr.created_at, tr.started_at,
+                           tr.completed_at, m.version AS model_version
+                    FROM training_runs tr
+                    LEFT JOIN models m ON tr.model_id = m.id
+                    WHERE tr.job_id = %s
+                """, (job_id,))
+                row = cursor.fetchone()
+                queue_position = None
+                if row and row['status'] == 'queued':
+                    queue_position = JobRegistry._queue_ahead(cursor, row) + 1
+        if not row:
+            return None
+
+        input_datasets = json.loads(row['input_datasets']) if row['input_datasets'] else []
+        status = {
+            'job_id': row['job_id'],
+            'job_type': row['job_type'],
+            'status': row['status'],
+            'progress': row['progress'],
+            'message': row['message'],
+            'model_id': row['model_id'],
+            'model_version': row['model_version'],
+            'dataset_version': input_datasets[0].get('dataset_version') if input_datasets else None,
+            'priority': row['priority'],
+            'queue_position': queue_position,
+            'stop_reason': row['stop_reason'],
+            'state_version': row['state_version'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'completed_at': row['completed_at']
+        }
+        if row['job_type'] == 'scoring':
+            job_spec = json.loads(row['job_spec']) if isinstance(row['job_spec'], str) else row['job_spec']
+            status['output_path'] = job_spec.get('output_path')
+        if row['error_message']:
+            status['error'] = row['error_message']
+        return status
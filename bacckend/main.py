@@ -1,17 +1,31 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-from fastapi.responses import JSONResponse, FileResponse
-from dbConnection import get_connection
-from contextlib import contextmanager
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, FileResponse, Response
+from dbConnection import get_db, warm_pool, pool_status, NamedLock
 import os
+import sys
 import json
 import hashlib
-import shutil
+import subprocess
 from datetime import datetime
 from typing import List, Optional
 from fastapi.middleware.cors import CORSMiddleware
 # DVC removed - using custom versioning and hashing
-from training_service import TrainingService
-import threading
+from object_store import ObjectStore
+from hashing import combine_digests
+from dataset_index import DatasetIndex
+from dataset_diff import DatasetDiff
+from storage_gc import StorageGC, StorageCollector
+from job_registry import JobRegistry
+from inference_service import micro_batcher, prediction_recorder
+from pagination import clamp_limit, keyset_condition, keyset_order, paginate, pick_fields, select_columns
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    UPLOAD_IO_THREADS, UPLOAD_MAX_PARALLEL_WRITES_PER_PROJECT, MAX_PAGE_SIZE, TRAINING_EMBEDDED_WORKER, PROJECTS_ROOT,
+    STORAGE_GC_MIN_AGE, DATASET_UPLOAD_LOCK_TIMEOUT
+)
 
 app = FastAPI()
 
@@ -25,20 +39,42 @@ app.add_middleware(
 
 
 # Use absolute path for projects directory
-project_relative_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'projects'))
-@contextmanager
-def get_db():
-    connection = get_connection()
+project_relative_path = PROJECTS_ROOT
+
+# Training runs in worker.py processes; the API only queues jobs and reads their state
+embedded_worker = None
+
+@app.on_event("startup")
+def open_db_pool():
     try:
-        yield connection
-    finally:
-        connection.close()
+        warm_pool()
+    except Exception as e:
+        print(f"Could not warm database pool: {e}")
+
+@app.on_event("startup")
+def start_embedded_worker():
+    global embedded_worker
+    if TRAINING_EMBEDDED_WORKER:
+        worker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'worker.py')
+        embedded_worker = subprocess.Popen([sys.executable, worker_script], cwd=os.path.dirname(worker_script))
+        print(f"Started training worker process {embedded_worker.pid}")
+
+@app.on_event("shutdown")
+def stop_embedded_worker():
+    if embedded_worker is not None:
+        embedded_worker.terminate()
+        embedded_worker.wait(timeout=30)
 
 @app.get("/")
 def root():
     return {"message": "ML Training API", "status": "running"}
 
-@app.get("/api/projects")
+@app.get("/api/db/pool")
+def get_db_pool_status():
+    """Connection pool metrics"""
+    return pool_status()
+
+@app.get("/api/debug/projects")
 def debug_projects():
     """Debug endpoint to check projects table"""
     try:
@@ -50,7 +86,7 @@ def debug_projects():
     except Exception as e:
         return {"error": str(e), "type": type(e).__name__}
 
-@app.get("/api/datasets")
+@app.get("/api/debug/datasets")
 def debug_datasets():
     """Debug endpoint to check datasets table"""
     try:
@@ -110,17 +146,33 @@ def create_project(project: dict):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating project: {str(e)}")
 
+PROJECT_COLUMNS = {
+    'id': 'p.id', 'name': 'p.name', 'description': 'p.description', 'path': 'p.path',
+    'created_by': 'p.created_by', 'status': 'p.status', 'created_at': 'p.created_at',
+    'updated_at': 'p.updated_at'
+}
+
 @app.get("/api/projects")
-def get_projects():
-    """Get all projects"""
+def get_projects(limit: Optional[int] = None, after: Optional[str] = None, fields: Optional[str] = None):
+    """Get projects, newest first, one page at a time"""
     try:
+        limit = clamp_limit(limit, MAX_PAGE_SIZE)
+        columns = select_columns(fields, PROJECT_COLUMNS)
+        condition, params = keyset_condition(after, 'p')
         with get_db() as connection:
             with connection.cursor() as cursor:
-                cursor.execute("SELECT * FROM projects ORDER BY created_at DESC")
-                projects = cursor.fetchall()
+                cursor.execute(f"""
+                    SELECT {columns} FROM projects p
+                    WHERE {condition}
+                    ORDER BY {keyset_order('p')}
+                    LIMIT %s
+                """, params + [limit + 1])
+                projects, next_cursor = paginate(cursor.fetchall(), limit)
         
-        return {"projects": projects}
+        return {"projects": projects, "next_cursor": next_cursor}
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching projects: {str(e)}")
 
@@ -143,6 +195,25 @@ def get_project(project_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching project: {str(e)}")
 
+@app.get("/api/projects/by-name/{project_name}")
+def get_project_by_name(project_name: str):
+    """Get a specific project by name"""
+    try:
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT * FROM projects WHERE name = %s", (project_name,))
+                project = cursor.fetchone()
+
+                if not project:
+                    raise HTTPException(status_code=404, detail="Project not found")
+
+        return {"project": project}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching project: {str(e)}")
+
 @app.put("/api/projects/{project_id}")
 def update_project(project_id: int, project: dict):
     """Update a project"""
@@ -185,7 +256,7 @@ def update_project(project_id: int, project: dict):
 
 @app.delete("/api/projects/{project_id}")
 def delete_project(project_id: int):
-    """Delete a project"""
+    """Delete a project; its directory is reported by storage GC as orphaned and deleted by a run with delete_orphans"""
     try:
         with get_db() as connection:
             with connection.cursor() as cursor:
@@ -204,97 +275,91 @@ def delete_project(project_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting project: {str(e)}")
 
+DATASET_LIST_FIELDS = ['id', 'name', 'version', 'fileCount', 'lastUpdated', 'description', 'project_name']
+
+def list_datasets_page(project_id: Optional[int], limit: Optional[int], after: Optional[str], fields: Optional[str]) -> dict:
+    """One page of datasets (optionally of a single project), formatted for the frontend"""
+    limit = clamp_limit(limit, MAX_PAGE_SIZE)
+    condition, params = keyset_condition(after, 'd')
+    if project_id is not None:
+        condition += " AND d.project_id = %s"
+        params.append(project_id)
+    with get_db() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT d.id, d.name, d.version, d.file_count, d.created_at, p.name as project_name
+                FROM datasets d 
+                JOIN projects p ON d.project_id = p.id 
+                WHERE {condition}
+                ORDER BY {keyset_order('d')}
+                LIMIT %s
+            """, params + [limit + 1])
+            datasets, next_cursor = paginate(cursor.fetchall(), limit)
+    
+    # Convert to list of dictionaries with proper structure
+    dataset_list = []
+    for dataset in datasets:
+        dataset_list.append({
+            "id": f"dataset_{dataset['id']}",
+            "name": dataset['name'] or f"Dataset {dataset['id']}",
+            "version": dataset['version'] or "v1.0",
+            "fileCount": dataset['file_count'] or 0,
+            "lastUpdated": dataset['created_at'].strftime("%Y-%m-%d") if dataset['created_at'] else "Unknown",
+            "description": f"Dataset with {dataset['file_count'] or 0} files from {dataset['project_name']} project",
+            "project_name": dataset['project_name']
+        })
+    return {"datasets": pick_fields(dataset_list, fields, DATASET_LIST_FIELDS), "next_cursor": next_cursor}
+
 @app.get("/api/datasets")
-def get_datasets():
-    """Get all datasets for frontend selection"""
+def get_datasets(limit: Optional[int] = None, after: Optional[str] = None, fields: Optional[str] = None):
+    """Get datasets for frontend selection, newest first, one page at a time"""
     try:
-        print("Fetching datasets from database...")
-        with get_db() as connection:
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT d.id, d.name, d.version, d.file_count, d.created_at, p.name as project_name
-                    FROM datasets d 
-                    JOIN projects p ON d.project_id = p.id 
-                    ORDER BY d.created_at DESC
-                """)
-                datasets = cursor.fetchall()
-                print(f"Raw datasets from DB: {datasets}")
-                
-                # Convert to list of dictionaries with proper structure
-                dataset_list = []
-                for dataset in datasets:
-                    print(f"Dataset: {dataset}")
-                    dataset_obj = {
-                        "id": f"dataset_{dataset['id']}",
-                        "name": dataset['name'] or f"Dataset {dataset['id']}",
-                        "version": dataset['version'] or "v1.0",
-                        "fileCount": dataset['file_count'] or 0,
-                        "lastUpdated": dataset['created_at'].strftime("%Y-%m-%d") if dataset['created_at'] else "Unknown",
-                        "description": f"Dataset with {dataset['file_count'] or 0} files from {dataset['project_name']} project"
-                    }
-                    dataset_list.append(dataset_obj)
-        return {"datasets": dataset_list}
+        return list_datasets_page(None, limit, after, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching datasets: {str(e)}")
 
 @app.get("/api/datasets/project/{project_name}")
-def get_datasets_by_project(project_name: str):
-    """Get all datasets for a specific project by project name"""
+def get_datasets_by_project(project_name: str, limit: Optional[int] = None, after: Optional[str] = None, fields: Optional[str] = None):
+    """Get datasets of a specific project by project name, newest first, one page at a time"""
     try:
-        print(f"Fetching datasets for project: {project_name}")
         with get_db() as connection:
             with connection.cursor() as cursor:
-                # First get the project ID
                 cursor.execute("SELECT id FROM projects WHERE name = %s", (project_name,))
                 project_result = cursor.fetchone()
-                if not project_result:
-                    print(f"Project {project_name} not found")
-                    return {"datasets": []}
-                
-                project_id = project_result[0] if isinstance(project_result, tuple) else project_result["id"]
-                print(f"Found project ID: {project_id}")
-                
-                # Get datasets for this project
-                cursor.execute("""
-                    SELECT d.id, d.name, d.version, d.file_count, d.created_at, p.name as project_name
-                    FROM datasets d 
-                    JOIN projects p ON d.project_id = p.id 
-                    WHERE d.project_id = %s
-                    ORDER BY d.created_at DESC
-                """, (project_id,))
-                datasets = cursor.fetchall()
-                print(f"Found {len(datasets)} datasets for project {project_name}")
-                
-                # Convert to list of dictionaries
-                dataset_list = []
-                for dataset in datasets:
-                    dataset_obj = {
-                        "id": f"dataset_{dataset["id"]}",
-                        "name": dataset["name"] or f"Dataset {dataset["id"]}",
-                        "version": dataset["version"] or "v1.0",
-                        "fileCount": dataset["file_count"] or 0,
-                        "lastUpdated": dataset["created_at"].strftime("%Y-%m-%d") if dataset["created_at"] else "Unknown",
-                        "description": f"Dataset with {dataset["file_count"] or 0} files from {dataset["project_name"]} project",
-                        "project_name": dataset["project_name"]
-                    }
-                    dataset_list.append(dataset_obj)
+        if not project_result:
+            print(f"Project {project_name} not found")
+            return {"datasets": [], "next_cursor": None}
         
-        return {"datasets": dataset_list}
+        return list_datasets_page(project_result["id"], limit, after, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error fetching datasets by project: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching datasets: {str(e)}")
 
 @app.get("/api/datasets/{dataset_name}/details")
-def get_dataset_details(dataset_name: str, project: str):
-    """Get detailed information about a dataset including all files"""
+def get_dataset_details(
+    dataset_name: str,
+    project: str,
+    limit: int = 1000,
+    offset: int = 0,
+    sort: str = "name",
+    order: str = "asc",
+    file_type: Optional[str] = None
+):
+    """Get detailed information about a dataset and one page of its files"""
     try:
         print(f"Fetching details for dataset: {dataset_name} in project: {project}")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        offset = max(0, offset)
         
         with get_db() as connection:
             with connection.cursor() as cursor:
                 # Get the dataset information
                 cursor.execute("""
-                    SELECT d.id, d.name, d.version, d.file_count, d.created_at, d.base_path, p.name as project_name
+                    SELECT d.id, d.name, d.version, d.file_count, d.created_at, d.base_path, d.files_indexed, p.name as project_name
                     FROM datasets d 
                     JOIN projects p ON d.project_id = p.id 
                     WHERE d.name = %s AND p.name = %s
@@ -306,59 +371,49 @@ def get_dataset_details(dataset_name: str, project: str):
                 if not dataset:
                     raise HTTPException(status_code=404, detail="Dataset not found")
                 
-                dataset_id = dataset[0] if isinstance(dataset, tuple) else dataset['id']
-                dataset_path = dataset[5] if isinstance(dataset, tuple) else dataset['base_path']
+                dataset_id = dataset['id']
+                dataset_path = dataset['base_path']
                 
-                print(f"Found dataset at path: {dataset_path}")
+                # Versions uploaded before the file index existed are indexed once, on first view
+                if not dataset['files_indexed'] and dataset_path and os.path.exists(dataset_path):
+                    DatasetIndex.index_directory(cursor, dataset_id, dataset_path)
+                    connection.commit()
+                
+                try:
+                    indexed_files, total = DatasetIndex.query_files(
+                        cursor, dataset_id, limit, offset, sort, order, file_type
+                    )
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+                type_counts = DatasetIndex.count_types(cursor, dataset_id)
                 
-                # Get all files in the dataset directory (including subdirectories)
                 file_list = []
-                if dataset_path and os.path.exists(dataset_path):
-                    def list_files_recursive(directory):
-                        """Recursively list all files in a directory"""
-                        files = []
-                        try:
-                            for item in os.listdir(directory):
-                                item_path = os.path.join(directory, item)
-                                if os.path.isfile(item_path):
-                                    files.append(item_path)
-                                elif os.path.isdir(item_path):
-                                    # Recursively get files from subdirectories
-                                    files.extend(list_files_recursive(item_path))
-                        except Exception as e:
-                            print(f"Error reading directory {directory}: {e}")
-                        return files
-                    
-                    all_files = list_files_recursive(dataset_path)
-                    print(f"Found {len(all_files)} files in dataset")
-                    
-                    for file_path in all_files:
-                        file_name = os.path.basename(file_path)
-                        file_size = os.path.getsize(file_path)
-                        file_rel_path = os.path.relpath(file_path, dataset_path)
-                        
-                        file_info = {
-                            "name": file_name,
-                            "path": file_path,
-                            "relative_path": file_rel_path,
-                            "type": file_name.split('.')[-1] if '.' in file_name else 'unknown',
-                            "size": f"{(file_size / 1024):.2f} KB" if file_size < 1024 * 1024 else f"{(file_size / (1024 * 1024)):.2f} MB",
-                            "size_bytes": file_size
-                        }
-                        file_list.append(file_info)
-                    
-                    file_list.sort(key=lambda x: x['name'])
+                for indexed_file in indexed_files:
+                    file_size = indexed_file['size_bytes']
+                    file_list.append({
+                        "name": indexed_file['name'],
+                        "path": os.path.join(dataset_path, indexed_file['relative_path']),
+                        "relative_path": indexed_file['relative_path'],
+                        "type": indexed_file['file_type'],
+                        "size": f"{(file_size / 1024):.2f} KB" if file_size < 1024 * 1024 else f"{(file_size / (1024 * 1024)):.2f} MB",
+                        "size_bytes": file_size,
+                        "hash": indexed_file['content_hash']
+                    })
                 
                 return {
                     "dataset": {
                         "id": dataset_id,
-                        "name": dataset[1] if isinstance(dataset, tuple) else dataset['name'],
-                        "version": dataset[2] if isinstance(dataset, tuple) else dataset['version'],
-                        "file_count": dataset[3] if isinstance(dataset, tuple) else dataset['file_count'],
-                        "created_at": dataset[4] if isinstance(dataset, tuple) else dataset['created_at'],
+                        "name": dataset['name'],
+                        "version": dataset['version'],
+                        "file_count": dataset['file_count'],
+                        "created_at": dataset['created_at'],
                         "base_path": dataset_path
                     },
-                    "files": file_list
+                    "files": file_list,
+                    "total": total,
+                    "type_counts": type_counts,
+                    "limit": limit,
+                    "offset": offset
                 }
     except HTTPException:
         raise
@@ -366,6 +421,64 @@ def get_dataset_details(dataset_name: str, project: str):
         print(f"Error fetching dataset details: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching dataset details: {str(e)}")
 
+@app.get("/api/datasets/{dataset_name}/diff")
+def get_dataset_diff(
+    dataset_name: str,
+    project: str,
+    from_version: str,
+    to_version: str,
+    labels: bool = True,
+    limit: int = 1000
+):
+    """
+    Added, removed and modified files between two versions of a dataset
+
+    Computed from the version manifests (stored per-file hashes); with labels=true
+    the changed YOLO label files are also compared box by box. Each change list
+    holds at most limit entries, the summaries always cover every change.
+    """
+    try:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT d.version, d.base_path, p.path AS project_path
+                    FROM datasets d
+                    JOIN projects p ON d.project_id = p.id
+                    WHERE d.name = %s AND p.name = %s AND d.version IN (%s, %s)
+                """, (dataset_name, project, from_version, to_version))
+                versions = {row['version']: row for row in cursor.fetchall()}
+        for version in (from_version, to_version):
+            if version not in versions:
+                raise HTTPException(status_code=404, detail=f"Dataset version not found: {dataset_name} {version}")
+
+        store = ObjectStore(versions[from_version]['project_path'])
+        diff = DatasetDiff.diff_versions(
+            store, dataset_name, from_version, to_version,
+            versions[from_version]['base_path'], versions[to_version]['base_path'], include_labels=labels
+        )
+
+        truncated = False
+        for key in ('added', 'removed', 'modified'):
+            truncated = truncated or len(diff[key]) > limit
+            diff[key] = diff[key][:limit]
+        if labels:
+            truncated = truncated or len(diff['labels']['files']) > limit
+            diff['labels']['files'] = diff['labels']['files'][:limit]
+
+        return {
+            "dataset": dataset_name,
+            "from_version": from_version,
+            "to_version": to_version,
+            **diff,
+            "truncated": truncated
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error diffing dataset versions: {e}")
+        raise HTTPException(status_code=500, detail=f"Error diffing dataset versions: {str(e)}")
+
 @app.post("/api/datasets/{dataset_hash_id}/versions")
 def get_dataset_versions(dataset_hash_id: str):
     """Get all versions for a dataset"""
@@ -380,14 +493,29 @@ def get_dataset_versions(dataset_hash_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching dataset versions: {str(e)}")
 
-def generate_dvc_hash(file_paths: List[str]) -> str:
-    """Generate a DVC-style hash for the uploaded files"""
-    hash_content = ""
-    for file_path in sorted(file_paths):
-        if os.path.exists(file_path):
-            with open(file_path, 'rb') as f:
-                hash_content += f.read().hex()
-    return hashlib.md5(hash_content.encode()).hexdigest()
+# Blocking disk and database work of the upload endpoint runs on a bounded
+# thread pool so the event loop keeps serving other requests
+upload_io_executor = ThreadPoolExecutor(max_workers=UPLOAD_IO_THREADS, thread_name_prefix="upload-io")
+project_write_slots = {}
+
+def parse_version(version: str):
+    """(major, minor) of a version like v1.3, for numeric comparison ((0, -1) if unparsable)"""
+    try:
+        major, minor = version[1:].split('.', 1)
+        return int(major), int(minor)
+    except (ValueError, TypeError):
+        return 0, -1
+
+async def run_blocking(func, *args):
+    """Run a blocking call on the upload I/O pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(upload_io_executor, functools.partial(func, *args))
+
+def get_project_write_slots(project_path: str) -> asyncio.Semaphore:
+    """Semaphore limiting parallel file writes into one project"""
+    if project_path not in project_write_slots:
+        project_write_slots[project_path] = asyncio.Semaphore(UPLOAD_MAX_PARALLEL_WRITES_PER_PROJECT)
+    return project_write_slots[project_path]
 
 @app.post("/api/upload/dataset")
 async def upload_dataset_stages(
@@ -419,22 +547,23 @@ async def upload_dataset_stages(
         
         # Get project information
         print("Fetching project information...")
-        with get_db() as connection:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT * FROM projects WHERE name = %s", (projectId,))
-                project = cursor.fetchone()
-                print(f"Project query result: {project}")
-                
-                if not project:
-                    raise HTTPException(status_code=404, detail="Project not found")
-                
-                project_id = project["id"]
-                project_path = project["path"]
-                print(f"Project ID: {project_id}, Path: {project_path}")
+        def fetch_project():
+            with get_db() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT * FROM projects WHERE name = %s", (projectId,))
+                    return cursor.fetchone()
+        project = await run_blocking(fetch_project)
+        print(f"Project query result: {project}")
+        
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        project_id = project["id"]
+        project_path = project["path"]
+        print(f"Project ID: {project_id}, Path: {project_path}")
         
-        # Determine version and dataset name
+        # Determine the dataset name; its version is allocated under the dataset's upload lock
         if datasetType == "new":
-            version = "v1.0"
             # Use user-provided dataset name if available, otherwise generate one
             if datasetName:
                 dataset_name = datasetName
@@ -442,179 +571,171 @@ async def upload_dataset_stages(
                 dataset_name = f"{projectId}_dataset_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             print(f"New dataset name: {dataset_name}")
         else:
-            # Get next version for existing dataset
             if not selectedDatasetId:
                 raise HTTPException(status_code=400, detail="Dataset ID required for existing dataset")
             
-            with get_db() as connection:
-                with connection.cursor() as cursor:
-                    print(f"Selected dataset ID: {selectedDatasetId}")
-                    # Get the original dataset name and current version
-                    cursor.execute("SELECT name, version FROM datasets WHERE id = %s", (selectedDatasetId.replace("dataset_", ""),))
-                    existing_dataset = cursor.fetchone()
-                    print(f"Existing dataset: {existing_dataset}")
-                    
-                    if existing_dataset:
-                        # Use the original dataset name
-                        dataset_name = existing_dataset["name"]
-                        
-                        # Get the highest version for this dataset name in this project
-                        cursor.execute("""
-                            SELECT version FROM datasets 
-                            WHERE name = %s AND project_id = %s 
-                            ORDER BY version DESC 
-                            LIMIT 1
-                        """, (dataset_name, project_id))
-                        latest_version = cursor.fetchone()
-                        
-                        if latest_version:
-                            # Extract and increment version
-                            version_str = latest_version["version"]
-                            print(f"Latest version: {version_str}")
-                            # Parse version like "v1.0"
-                            version_parts = version_str.split('.')
-                            major = int(version_parts[0][1:])  # Remove 'v' and convert to int
-                            minor = int(version_parts[1]) + 1  # Increment minor version
-                            version = f"v{major}.{minor}"
-                        else:
-                            version = "v1.0"
-                    else:
-                        # Fallback if dataset not found
-                        dataset_name = f"{projectId}_dataset_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                        version = "v1.0"
+            def fetch_existing_dataset():
+                with get_db() as connection:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT name FROM datasets WHERE id = %s", (selectedDatasetId.replace("dataset_", ""),))
+                        return cursor.fetchone()
             
+            print(f"Selected dataset ID: {selectedDatasetId}")
+            existing_dataset = await run_blocking(fetch_existing_dataset)
+            print(f"Existing dataset: {existing_dataset}")
+            if existing_dataset:
+                # Use the original dataset name
+                dataset_name = existing_dataset["name"]
+            else:
+                # Fallback if dataset not found
+                dataset_name = f"{projectId}_dataset_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        # Concurrent uploads to one dataset would allocate the same version and write
+        # the same directory and manifest: the dataset's lock (shared by all API
+        # processes) is held from reading the latest version until the new row exists
+        upload_lock = NamedLock(f"dataset_upload:{project_id}:{dataset_name}", DATASET_UPLOAD_LOCK_TIMEOUT)
+        if not await run_blocking(upload_lock.acquire):
+            raise HTTPException(status_code=409, detail=f"Another upload to dataset {dataset_name} is still running, try again later")
+        try:
+            def fetch_latest_version():
+                with get_db() as connection:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT version FROM datasets WHERE name = %s AND project_id = %s",
+                                       (dataset_name, project_id))
+                        return max((row["version"] for row in cursor.fetchall()), key=parse_version, default=None)
+            
+            latest_version = await run_blocking(fetch_latest_version)
+            if datasetType == "new" and latest_version:
+                raise HTTPException(status_code=409, detail=f"Dataset {dataset_name} already exists in this project")
+            if datasetType == "existing" and latest_version:
+                print(f"Latest version: {latest_version}")
+                major, minor = parse_version(latest_version)
+                version = f"v{max(major, 1)}.{minor + 1}"
+            else:
+                latest_version = None
+                version = "v1.0"
             print(f"Dataset name: {dataset_name}")
             print(f"Version: {version}")
-        
-        # Create data directory - include dataset name to prevent conflicts
-        data_dir = os.path.join(project_path, 'data', dataset_name, version)
-        print(f"Project path: {project_path}")
-        print(f"Creating data directory: {data_dir}")
-        print(f"Absolute data directory: {os.path.abspath(data_dir)}")
-        os.makedirs(data_dir, exist_ok=True)
-        print(f"Data directory created successfully")
-        
-        # If updating existing dataset, copy files from previous version
-        if datasetType == "existing" and latest_version:
-            previous_version_dir = os.path.join(project_path, 'data', dataset_name, latest_version["version"])
-            print(f"Previous version directory: {previous_version_dir}")
             
-            if os.path.exists(previous_version_dir):
-                print(f"Copying files from previous version {latest_version['version']} to {version}...")
-                
-                def copy_directory(src, dst):
-                    """Copy directory recursively"""
-                    if os.path.isdir(src):
-                        shutil.copytree(src, dst, dirs_exist_ok=True)
-                        print(f"Copied directory {src} to {dst}")
-                
-                # Copy images directory if it exists
-                if os.path.exists(os.path.join(previous_version_dir, 'images')):
-                    copy_directory(os.path.join(previous_version_dir, 'images'), os.path.join(data_dir, 'images'))
-                
-                # Copy labels directory if it exists
-                if os.path.exists(os.path.join(previous_version_dir, 'labels')):
-                    copy_directory(os.path.join(previous_version_dir, 'labels'), os.path.join(data_dir, 'labels'))
-                
-                # Copy YAML files from root
-                for file in os.listdir(previous_version_dir):
-                    file_path = os.path.join(previous_version_dir, file)
-                    if os.path.isfile(file_path) and file.endswith(('.yaml', '.yml')):
-                        shutil.copy2(file_path, data_dir)
-                        print(f"Copied YAML file {file} to {data_dir}")
+            # Create data directory - include dataset name to prevent conflicts
+            data_dir = os.path.join(project_path, 'data', dataset_name, version)
+            print(f"Creating data directory: {data_dir}")
+            
+            def prepare_version():
+                """Create the version directory and collect the files carried over from the previous version"""
+                os.makedirs(data_dir, exist_ok=True)
+                # Create subdirectories for organized structure
+                os.makedirs(os.path.join(data_dir, 'images'), exist_ok=True)
+                os.makedirs(os.path.join(data_dir, 'labels'), exist_ok=True)
+            
+                # File contents live in the project's object store; the version directory
+                # is a hardlinked view of the version manifest
+                store = ObjectStore(project_path)
+                carried_files = {}
+            
+                # If updating existing dataset, start from the previous version's manifest
+                if datasetType == "existing" and latest_version:
+                    previous_version_dir = os.path.join(project_path, 'data', dataset_name, latest_version)
+                    print(f"Previous version directory: {previous_version_dir}")
                 
-                print(f"Successfully copied files from previous version")
-            else:
-                print(f"Previous version directory not found: {previous_version_dir}")
-        
-        # Upload files by type with proper organization
-        uploaded_files = []
-        file_paths = []
-        
-        print("Starting file upload process...")
-        
-        # Create subdirectories for organized structure
-        images_dir = os.path.join(data_dir, 'images')
-        labels_dir = os.path.join(data_dir, 'labels')
-        os.makedirs(images_dir, exist_ok=True)
-        os.makedirs(labels_dir, exist_ok=True)
-        
-        # Upload images to images/ folder
-        print(f"Uploading {len(images)} image files to images/ folder...")
-        for image_file in images:
-            if image_file.filename:
-                file_path = os.path.join(images_dir, image_file.filename)
-                print(f"Saving image to: {file_path}")
-                with open(file_path, "wb") as buffer:
-                    shutil.copyfileobj(image_file.file, buffer)
-                print(f"Image saved successfully")
-                uploaded_files.append(f"/data/{version}/images/{image_file.filename}")
-                file_paths.append(file_path)
-        
-        # Upload label files to labels/ folder
-        print(f"Uploading {len(labels)} label files to labels/ folder...")
-        for label_file in labels:
-            if label_file.filename:
-                file_path = os.path.join(labels_dir, label_file.filename)
-                print(f"Saving label file: {file_path}")
-                with open(file_path, "wb") as buffer:
-                    shutil.copyfileobj(label_file.file, buffer)
-                print(f"Label file saved successfully: {file_path}")
-                uploaded_files.append(f"/data/{version}/labels/{label_file.filename}")
-                file_paths.append(file_path)
-        
-        # Upload YAML config file if provided
-        if yaml_file and yaml_file.filename:
-            file_path = os.path.join(data_dir, yaml_file.filename)
-            print(f"Saving YAML file: {file_path}")
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(yaml_file.file, buffer)
-            print(f"YAML file saved successfully: {file_path}")
-            uploaded_files.append(f"/data/{version}/{yaml_file.filename}")
-            file_paths.append(file_path)
-        
-        # Generate hash for uploaded files using custom system
-        print("Generating hash for uploaded files...")
-        custom_hash = generate_dvc_hash(file_paths)
-        
-        # Calculate statistics
-        total_files = len(images) + len(labels) + (1 if yaml_file and yaml_file.filename else 0)
-        total_size = sum(os.path.getsize(path) for path in file_paths)
-        
-        # Save to database
-        with get_db() as connection:
-            with connection.cursor() as cursor:
-                # Use updateDescription for description field if it's an existing dataset update
-                description = updateDescription if datasetType == "existing" and updateDescription else f"Dataset {version} for {dataset_name}"
-                cursor.execute("""
-                    INSERT INTO datasets (project_id, name, version, file_count, commit_hash, base_path, created_by, description, created_at) 
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                """, (project_id, dataset_name, version, total_files, custom_hash, data_dir, "User", description))
-                connection.commit()
-                dataset_id = cursor.lastrowid
-        
-        # Return comprehensive response
-        return {
-            "message": "Dataset uploaded successfully",
-            "status": True,
-            "fileCount": total_files,
-            "totalSize": total_size,
-            "filePaths": uploaded_files,
-            "commitHash": custom_hash,
-            "commitMessage": f"Added {total_files} files to dataset {dataset_name}",
-            "timestamp": datetime.now().isoformat(),
-            "stats": {
-                "images": len(images),
-                "labels": len(labels),
-                "yaml": 1 if yaml_file and yaml_file.filename else 0
-            },
-            "datasetInfo": {
-                "id": dataset_id,
-                "name": dataset_name,
-                "version": version,
-                "projectId": project_id
+                    previous_files = store.get_version_files(dataset_name, latest_version, previous_version_dir)
+                    for relative_path, entry in previous_files.items():
+                        # Carry over images, labels and root-level YAML configs
+                        if relative_path.startswith(('images/', 'labels/')) or (
+                                '/' not in relative_path and relative_path.endswith(('.yaml', '.yml'))):
+                            carried_files[relative_path] = entry
+                    print(f"Carrying over {len(carried_files)} files from previous version {latest_version}")
+                return store, carried_files
+            
+            store, version_files = await run_blocking(prepare_version)
+            
+            # Upload files by type with proper organization
+            pending_uploads = []
+            for image_file in images:
+                if image_file.filename:
+                    pending_uploads.append((image_file, f"images/{image_file.filename}"))
+            for label_file in labels:
+                if label_file.filename:
+                    pending_uploads.append((label_file, f"labels/{label_file.filename}"))
+            if yaml_file and yaml_file.filename:
+                pending_uploads.append((yaml_file, yaml_file.filename))
+            
+            print(f"Uploading {len(images)} images, {len(labels)} labels and "
+                  f"{1 if yaml_file and yaml_file.filename else 0} YAML files...")
+            
+            # Writes run concurrently on the I/O pool, bounded per project
+            write_slots = get_project_write_slots(project_path)
+            
+            async def store_upload(upload: UploadFile):
+                """Write an uploaded file into the object store, hashing it in the same pass"""
+                async with write_slots:
+                    return await run_blocking(store.put_stream, upload.file)
+            
+            results = await asyncio.gather(*(store_upload(upload) for upload, _ in pending_uploads))
+            
+            uploaded_files = []
+            total_size = 0
+            for (upload, relative_path), (digest, size) in zip(pending_uploads, results):
+                version_files[relative_path] = {'hash': digest, 'size': size}
+                total_size += size
+                uploaded_files.append(f"/data/{version}/{relative_path}")
+            
+            # Link the version directory to the store and record its manifest
+            def finalize_version():
+                store.materialize(version_files, data_dir)
+                store.write_manifest(dataset_name, version, version_files)
+            await run_blocking(finalize_version)
+            print(f"Version {version} materialized with {len(version_files)} files")
+            
+            # Dataset hash over the full version content: digests computed while writing
+            # plus the manifest entries carried over, no second read pass
+            custom_hash = combine_digests({path: entry['hash'] for path, entry in version_files.items()})
+            
+            # Calculate statistics
+            total_files = len(images) + len(labels) + (1 if yaml_file and yaml_file.filename else 0)
+            
+            # Use updateDescription for description field if it's an existing dataset update
+            description = updateDescription if datasetType == "existing" and updateDescription else f"Dataset {version} for {dataset_name}"
+            
+            # Save to database
+            def insert_dataset():
+                with get_db() as connection:
+                    with connection.cursor() as cursor:
+                        cursor.execute("""
+                            INSERT INTO datasets (project_id, name, version, file_count, commit_hash, base_path, created_by, description, created_at) 
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
+                        """, (project_id, dataset_name, version, total_files, custom_hash, data_dir, "User", description))
+                        new_dataset_id = cursor.lastrowid
+                        # Persist the file listing so the details page never walks the directory
+                        DatasetIndex.index_files(cursor, new_dataset_id, version_files)
+                        connection.commit()
+                        return new_dataset_id
+            dataset_id = await run_blocking(insert_dataset)
+            
+            # Return comprehensive response
+            return {
+                "message": "Dataset uploaded successfully",
+                "status": True,
+                "fileCount": total_files,
+                "totalSize": total_size,
+                "filePaths": uploaded_files,
+                "commitHash": custom_hash,
+                "commitMessage": f"Added {total_files} files to dataset {dataset_name}",
+                "timestamp": datetime.now().isoformat(),
+                "stats": {
+                    "images": len(images),
+                    "labels": len(labels),
+                    "yaml": 1 if yaml_file and yaml_file.filename else 0
+                },
+                "datasetInfo": {
+                    "id": dataset_id,
+                    "name": dataset_name,
+                    "version": version,
+                    "projectId": project_id
+                }
             }
-        }
+        finally:
+            await run_blocking(upload_lock.release)
         
     except HTTPException:
         raise
@@ -707,7 +828,6 @@ async def download_file(request: dict):
         raise HTTPException(status_code=500, detail=f"Error downloading file: {str(e)}")
 
 # Training endpoints
-training_jobs = {}  # In-memory storage for training jobs
 
 @app.post("/api/training/start")
 async def start_training(request: dict):
@@ -777,263 +897,182 @@ async def start_training(request: dict):
         os.makedirs(models_dir, exist_ok=True)
         model_output_path = os.path.join(models_dir, f"{model_name}.pth")
         
-        # Start training in background thread
+        # Queue the job; a training worker starts it once a slot and the project's quota allow
         training_id = f"train_{datetime.now().timestamp()}"
-        
-        def train_in_background():
-            try:
-                # Update status to running
-                training_jobs[training_id] = {
-                    'status': 'running',
-                    'progress': 0,
-                    'model_id': None,
-                    'message': 'Training started...'
-                }
-                
-                print(f"Training with dataset version: {dataset_version}")
-                print(f"Using project_id: {actual_project_id}, dataset_id: {actual_dataset_id}")
-                
-                # Train model
-                result = TrainingService.train_model(
-                    dataset_path=dataset_path,
-                    output_path=model_output_path,
-                    hyperparameters=hyperparameters,
-                    progress_callback=lambda p: training_jobs[training_id].update({'progress': p, 'message': f'Training progress: {p}%'})
-                )
-                
-                # Save model to database
-                if result['status'] == 'completed':
-                    with get_db() as connection:
-                        with connection.cursor() as cursor:
-                            # Check if models already exist for this dataset
-                            cursor.execute("""
-                                SELECT version FROM models 
-                                WHERE dataset_id = %s 
-                                ORDER BY created_at DESC
-                                LIMIT 1
-                            """, (str(actual_dataset_id),))
-                            
-                            existing_model = cursor.fetchone()
-                            
-                            if existing_model:
-                                # Extract version number and increment
-                                existing_version = existing_model[0] if isinstance(existing_model, tuple) else existing_model['version']
-                                print(f"Found existing model version: {existing_version}")
-                                
-                                # Extract version number (e.g., "v1.0_model" -> "v1.1_model")
-                                if "_model" in existing_version:
-                                    version_base = existing_version.replace("_model", "")
-                                    version_parts = version_base.replace("v", "").split(".")
-                                    major = int(version_parts[0]) if len(version_parts) > 0 else 1
-                                    minor = int(version_parts[1]) if len(version_parts) > 1 else 0
-                                    new_minor = minor + 1
-                                    model_version = f"v{major}.{new_minor}_model"
-                                else:
-                                    # If format is different, just append version number
-                                    model_version = f"{existing_version}_v{int(existing_version.split('.')[-1]) + 1 if '.' in existing_version else '1'}"
-                            else:
-                                # First model for this dataset - use dataset version as base
-                                model_version = f"{dataset_version}_model"
-                            
-                            print(f"Generated model version: {model_version}")
-                            print(f"Parameters: project_id={actual_project_id}, dataset_id={actual_dataset_id}")
-                            
-                            # Insert into models table with new schema
-                            metrics = json.dumps({
-                                'accuracy': result.get('final_accuracy', 0),
-                                'loss': result.get('final_loss', 0),
-                                'epochs_completed': result['epochs_completed'],
-                                'final_epochs': hyperparameters.get('epochs', 10)
-                            })
-                            
-                            cursor.execute("""
-                                INSERT INTO models (project_id, dataset_id, name, version, description, model_path, 
-                                framework, parameters, metrics, commit_hash, created_by)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            """, (
-                                actual_project_id, str(actual_dataset_id), model_name, model_version, 
-                                f"Model trained on {dataset_name_from_db} dataset version {dataset_version}",
-                                model_output_path, 'pytorch', json.dumps(hyperparameters), 
-                                metrics, result.get('commit_hash', ''), 'User'
-                            ))
-                            connection.commit()
-                            model_id = cursor.lastrowid
-                            
-                            print(f"Model saved to database with ID: {model_id}")
-                            
-                            # Insert into training_runs table
-                            input_datasets_json = json.dumps([{
-                                'dataset_id': str(actual_dataset_id),
-                                'dataset_name': dataset_name_from_db,
-                                'dataset_version': dataset_version,
-                                'dataset_path': dataset_path
-                            }])
-                            
-                            training_reason = f"Training on {dataset_name_from_db} version {dataset_version}"
-                            
-                            cursor.execute("""
-                                INSERT INTO training_runs (job_id, project_id, model_id, input_datasets, 
-                                training_reason, parameters, status, created_by, started_at, completed_at)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
-                            """, (
-                                training_id, actual_project_id, model_id, input_datasets_json,
-                                training_reason, json.dumps(hyperparameters), 'completed', 'User'
-                            ))
-                            connection.commit()
-                            
-                            print(f"Training run saved to database")
-                            
-                            # Update training job with model_id
-                            training_jobs[training_id]['model_id'] = model_id
-                            training_jobs[training_id]['status'] = 'completed'
-                            training_jobs[training_id]['message'] = 'Training completed successfully!'
-                            training_jobs[training_id]['model_version'] = model_version
-                            training_jobs[training_id]['dataset_version'] = dataset_version
-                else:
-                    training_jobs[training_id]['status'] = 'failed'
-                    training_jobs[training_id]['error'] = result.get('error', 'Unknown error')
-                    training_jobs[training_id]['message'] = f"Training failed: {result.get('error', 'Unknown error')}"
-                    
-            except Exception as e:
-                print(f"Error in training background thread: {e}")
-                import traceback
-                traceback.print_exc()
-                training_jobs[training_id]['status'] = 'failed'
-                training_jobs[training_id]['error'] = str(e)
-                training_jobs[training_id]['message'] = f"Error: {str(e)}"
-        
-        # Start background thread
-        thread = threading.Thread(target=train_in_background)
-        thread.daemon = True
-        thread.start()
+        # Full checkpoints (optimizer, epoch, split, RNG) let the job resume after a restart
+        checkpoint_path = os.path.join(models_dir, '.checkpoints', f"{training_id}.pt")
+        input_datasets = [{
+            'dataset_id': str(actual_dataset_id),
+            'dataset_name': dataset_name_from_db,
+            'dataset_version': dataset_version,
+            'dataset_path': dataset_path,
+            'dataset_commit_hash': dataset.get("commit_hash")
+        }]
+        JobRegistry.create_job(
+            training_id, actual_project_id, input_datasets,
+            f"Training on {dataset_name_from_db} version {dataset_version}",
+            hyperparameters,
+            {'model_name': model_name, 'model_output_path': model_output_path, 'checkpoint_path': checkpoint_path},
+            priority=int(request.get("priority", 0))
+        )
         
         return {
             "training_id": training_id,
-            "status": "started",
-            "message": "Training job started successfully"
+            "status": "queued",
+            "message": "Training job queued successfully"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting training: {str(e)}")
 
+@app.post("/api/training/{training_id}/cancel")
+def cancel_training(training_id: str):
+    """Cancel a queued or running training job"""
+    status = JobRegistry.request_cancel(training_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    if status not in ('cancelled', 'running'):
+        raise HTTPException(status_code=409, detail=f"Training job already {status}")
+    return {
+        "training_id": training_id,
+        "status": status,
+        "message": "Training job cancelled" if status == 'cancelled' else "Cancellation requested"
+    }
+
+@app.post("/api/training/{training_id}/resume")
+def resume_training(training_id: str):
+    """Queue a failed or cancelled training job again, continuing from its last checkpoint"""
+    job = JobRegistry.get_job(training_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    if job['status'] not in ('failed', 'cancelled'):
+        raise HTTPException(status_code=409, detail=f"Training job is {job['status']}, only failed or cancelled jobs can be resumed")
+    checkpoint_path = (job['job_spec'] or {}).get('checkpoint_path')
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        raise HTTPException(status_code=409, detail="No checkpoint available for this training job")
+    if not JobRegistry.requeue_job(training_id, 'Waiting to resume from checkpoint...', from_statuses=('failed', 'cancelled')):
+        raise HTTPException(status_code=409, detail="Training job state changed, try again")
+    return {
+        "training_id": training_id,
+        "status": "queued",
+        "message": "Training job queued to resume from its last checkpoint"
+    }
+
 @app.get("/api/training/{training_id}/status")
-def get_training_status(training_id: str):
-    """Get training job status"""
-    if training_id not in training_jobs:
+def get_training_status(training_id: str, request: Request):
+    """
+    Get training job status
+    
+    Responses carry an ETag derived from the job's state version; polls sending
+    a matching If-None-Match get 304 Not Modified without re-reading the job.
+    """
+    state_tag = JobRegistry.get_state_tag(training_id)
+    if state_tag is None:
         raise HTTPException(status_code=404, detail="Training job not found")
     
-    return training_jobs[training_id]
+    etag = f'W/"{training_id}-{state_tag}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    status = JobRegistry.get_status(training_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return JSONResponse(jsonable_encoder(status), headers=headers)
+
+TRAINING_RUN_COLUMNS = {
+    'id': 'tr.id', 'job_id': 'tr.job_id', 'project_id': 'tr.project_id', 'model_id': 'tr.model_id',
+    'input_datasets': 'tr.input_datasets', 'training_reason': 'tr.training_reason',
+    'parameters': 'tr.parameters', 'status': 'tr.status', 'commit_hash_before': 'tr.commit_hash_before',
+    'commit_hash_after': 'tr.commit_hash_after', 'created_by': 'tr.created_by',
+    'created_at': 'tr.created_at', 'started_at': 'tr.started_at', 'completed_at': 'tr.completed_at',
+    'error_message': 'tr.error_message', 'project_name': 'p.name', 'dataset_name': 'd.name',
+    'dataset_version': 'd.version', 'model_name': 'm.name', 'model_version': 'm.version',
+    'job_type': 'tr.job_type', 'stop_reason': 'tr.stop_reason'
+}
 
 @app.get("/api/training/runs")
-def get_all_training_runs():
-    """Get all training runs from database"""
+def get_all_training_runs(
+    project_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get training runs from database, newest first, one page at a time"""
     try:
+        limit = clamp_limit(limit, MAX_PAGE_SIZE)
+        columns = select_columns(fields, TRAINING_RUN_COLUMNS)
+        condition, params = keyset_condition(after, 'tr')
+        if project_id is not None:
+            condition += " AND tr.project_id = %s"
+            params.append(project_id)
         with get_db() as connection:
             with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT tr.*, 
-                           p.name as project_name,
-                           d.name as dataset_name,
-                           d.version as dataset_version,
-                           m.name as model_name,
-                           m.version as model_version
+                cursor.execute(f"""
+                    SELECT {columns}
                     FROM training_runs tr
                     LEFT JOIN projects p ON tr.project_id = p.id
-                    LEFT JOIN datasets d ON JSON_EXTRACT(tr.input_datasets, '$[0].dataset_id') = d.id
+                    LEFT JOIN datasets d ON JSON_UNQUOTE(JSON_EXTRACT(tr.input_datasets, '$[0].dataset_id')) = d.id
                     LEFT JOIN models m ON tr.model_id = m.id
-                    ORDER BY tr.started_at DESC
-                """)
-                runs = cursor.fetchall()
-                
-                formatted_runs = []
-                for run in runs:
-                    if isinstance(run, tuple):
-                        # Parse input_datasets if it's JSON string
-                        input_datasets = run[3]
-                        if isinstance(input_datasets, str):
-                            try:
-                                input_datasets = json.loads(input_datasets)
-                            except:
-                                input_datasets = {}
-                        
-                        formatted_runs.append({
-                            'id': run[0],
-                            'job_id': run[1],
-                            'project_id': run[2],
-                            'model_id': run[5],
-                            'input_datasets': input_datasets,
-                            'training_reason': run[6],
-                            'parameters': run[7],
-                            'metrics': run[8],
-                            'status': run[9],
-                            'created_by': run[10],
-                            'started_at': run[11].isoformat() if run[11] else None,
-                            'completed_at': run[12].isoformat() if run[12] else None,
-                            'dataset_id': input_datasets[0].get('dataset_id') if isinstance(input_datasets, list) and len(input_datasets) > 0 else None,
-                            'project_name': run[13],
-                            'dataset_name': run[14],
-                            'dataset_version': run[15],
-                            'model_name': run[16],
-                            'model_version': run[17]
-                        })
-                    else:
-                        formatted_runs.append(run)
+                    WHERE {condition}
+                    ORDER BY {keyset_order('tr')}
+                    LIMIT %s
+                """, params + [limit + 1])
+                runs, next_cursor = paginate(cursor.fetchall(), limit)
         
-        return {"training_runs": formatted_runs}
+        return {"training_runs": runs, "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error fetching training runs: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error fetching training runs: {str(e)}")
 
+MODEL_COLUMNS = {
+    'id': 'm.id', 'project_id': 'm.project_id', 'name': 'm.name', 'version': 'm.version',
+    'description': 'm.description', 'model_path': 'm.model_path', 'framework': 'm.framework',
+    'parameters': 'm.parameters', 'metrics': 'm.metrics', 'commit_hash': 'm.commit_hash',
+    'tags': 'm.tags', 'created_by': 'm.created_by', 'created_at': 'm.created_at',
+    'dataset_id': 'm.dataset_id', 'project_name': 'p.name',
+    # Test-split metrics pulled out of the metrics JSON to compare models without loading it whole
+    'test_accuracy': "JSON_EXTRACT(m.metrics, '$.test.accuracy')",
+    'test_macro_f1': "JSON_EXTRACT(m.metrics, '$.test.macro.f1')"
+}
+
 @app.get("/api/models")
-def get_models(project_id: Optional[int] = None):
-    """Get all models, optionally filtered by project"""
+def get_models(
+    project_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get models, optionally filtered by project, newest first, one page at a time"""
     try:
+        limit = clamp_limit(limit, MAX_PAGE_SIZE)
+        columns = select_columns(fields, MODEL_COLUMNS)
+        condition, params = keyset_condition(after, 'm')
+        if project_id:
+            condition += " AND m.project_id = %s"
+            params.append(project_id)
         with get_db() as connection:
             with connection.cursor() as cursor:
-                if project_id:
-                    cursor.execute("""
-                        SELECT m.*, p.name as project_name
-                        FROM models m
-                        LEFT JOIN projects p ON m.project_id = p.id
-                        WHERE m.project_id = %s
-                        ORDER BY m.created_at DESC
-                    """, (project_id,))
-                else:
-                    cursor.execute("""
-                        SELECT m.*, p.name as project_name
-                        FROM models m
-                        LEFT JOIN projects p ON m.project_id = p.id
-                        ORDER BY m.created_at DESC
-                    """)
-                models = cursor.fetchall()
-                
-                # Format models for frontend
-                formatted_models = []
-                for model in models:
-                    if isinstance(model, tuple):
-                        formatted_models.append({
-                            'id': model[0],
-                            'project_id': model[1],
-                            'name': model[2],
-                            'version': model[3],
-                            'description': model[4],
-                            'model_path': model[5],
-                            'framework': model[6],
-                            'parameters': json.loads(model[7]) if model[7] else {},
-                            'metrics': json.loads(model[8]) if model[8] else {},
-                            'commit_hash': model[9],
-                            'tags': json.loads(model[10]) if model[10] else [],
-                            'created_by': model[11],
-                            'created_at': model[12].isoformat() if model[12] else None,
-                            'dataset_id': model[13],
-                            'project_name': model[14]
-                        })
-                    else:
-                        formatted_models.append(model)
+                cursor.execute(f"""
+                    SELECT {columns}
+                    FROM models m
+                    LEFT JOIN projects p ON m.project_id = p.id
+                    WHERE {condition}
+                    ORDER BY {keyset_order('m')}
+                    LIMIT %s
+                """, params + [limit + 1])
+                models, next_cursor = paginate(cursor.fetchall(), limit)
                 
-        return {"models": formatted_models}
+        return {"models": models, "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching models: {str(e)}")
 
@@ -1058,3 +1097,191 @@ def get_model_details(model_id: int):
         return {"model": model}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching model: {str(e)}")
+
+def load_inference_spec(model_id: int) -> Optional[dict]:
+    """What an inference worker needs to rebuild a registered model, None if the model does not exist"""
+    with get_db() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id, model_path, parameters FROM models WHERE id = %s", (model_id,))
+            model = cursor.fetchone()
+    if not model:
+        return None
+    parameters = model['parameters'] or {}
+    if isinstance(parameters, str):
+        parameters = json.loads(parameters)
+    if not os.path.exists(model['model_path']):
+        raise HTTPException(status_code=409, detail=f"Model file is missing: {model['model_path']}")
+    return {
+        'model_id': model['id'],
+        'model_path': model['model_path'],
+        'model_mtime': os.path.getmtime(model['model_path']),
+        'architecture': parameters.get('model_architecture', 'ResNet'),
+        'num_classes': parameters.get('num_classes', 10),
+        'channels_last': bool(parameters.get('channels_last', False)),
+        'precision': parameters.get('precision', 'fp32')
+    }
+
+@app.post("/api/models/{model_id}/predict")
+async def predict(model_id: int, files: List[UploadFile] = File(...), top_k: int = Form(1)):
+    """
+    Classify one or more images with a registered model
+    
+    Images from concurrent requests are batched together (see inference_service);
+    predictions are logged to the predictions table in the background.
+    """
+    try:
+        spec = await run_blocking(load_inference_spec, model_id)
+        if not spec:
+            raise HTTPException(status_code=404, detail="Model not found")
+        top_k = max(1, min(top_k, spec['num_classes']))
+        
+        images = [await upload.read() for upload in files]
+        results = await asyncio.gather(*(micro_batcher.predict(spec, image) for image in images))
+        
+        predictions = []
+        for upload, image, result in zip(files, images, results):
+            input_data = {
+                'filename': upload.filename,
+                'size': len(image),
+                'sha256': hashlib.sha256(image).hexdigest()
+            }
+            if 'error' in result:
+                predictions.append({**input_data, 'error': result['error']})
+                continue
+            probabilities = result['probabilities']
+            ranked = sorted(range(len(probabilities)), key=probabilities.__getitem__, reverse=True)[:top_k]
+            prediction = {
+                'class': ranked[0],
+                'top_k': [{'class': index, 'confidence': probabilities[index]} for index in ranked]
+            }
+            prediction_recorder.record(model_id, input_data, prediction, probabilities[ranked[0]])
+            predictions.append({**input_data, **prediction, 'confidence': probabilities[ranked[0]]})
+        
+        return {"model_id": model_id, "predictions": predictions}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running prediction: {str(e)}")
+
+@app.post("/api/models/{model_id}/score")
+async def score_dataset(model_id: int, request: dict):
+    """
+    Queue a bulk-scoring job running a registered model over a whole dataset version
+
+    The job shares the training queue and workers; follow it with
+    /api/training/{job_id}/status and resume it with /api/training/{job_id}/resume.
+    Scores are written next to the model file as npz (default) or parquet.
+    """
+    try:
+        dataset_id = str(request.get("dataset_id", "")).replace("dataset_", "")
+        if not dataset_id:
+            raise HTTPException(status_code=400, detail="dataset_id is required")
+        output_format = request.get("format", "npz")
+        if output_format not in ('npz', 'parquet'):
+            raise HTTPException(status_code=400, detail="format must be npz or parquet")
+
+        spec = await run_blocking(load_inference_spec, model_id)
+        if not spec:
+            raise HTTPException(status_code=404, detail="Model not found")
+
+        def fetch_model_and_dataset():
+            with get_db() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT project_id, name FROM models WHERE id = %s", (model_id,))
+                    model = cursor.fetchone()
+                    cursor.execute("SELECT * FROM datasets WHERE id = %s", (dataset_id,))
+                    return model, cursor.fetchone()
+
+        model, dataset = await run_blocking(fetch_model_and_dataset)
+        if not dataset:
+            raise HTTPException(status_code=404, detail=f"Dataset not found: {dataset_id}")
+        if not dataset.get("base_path") or not os.path.exists(dataset["base_path"]):
+            raise HTTPException(status_code=404, detail=f"Dataset path does not exist: {dataset.get('base_path')}")
+
+        job_id = f"score_{datetime.now().timestamp()}"
+        output_path = f"{os.path.splitext(spec['model_path'])[0]}_scores_{dataset['name']}_{dataset['version']}.{output_format}"
+        input_datasets = [{
+            'dataset_id': str(dataset['id']),
+            'dataset_name': dataset['name'],
+            'dataset_version': dataset['version'],
+            'dataset_path': dataset['base_path'],
+            'dataset_commit_hash': dataset.get("commit_hash")
+        }]
+        parameters = {
+            key: request[key] for key in ('batch_size', 'chunk_size', 'num_workers', 'tensor_cache')
+            if key in request
+        }
+        parameters['format'] = output_format
+        await run_blocking(
+            JobRegistry.create_job,
+            job_id, model['project_id'], input_datasets,
+            f"Scoring {dataset['name']} version {dataset['version']} with model {model['name']}",
+            parameters,
+            # Completed parts are kept in checkpoint_path so a requeued job skips them
+            {'model': spec, 'model_name': model['name'], 'output_path': output_path,
+             'checkpoint_path': f"{output_path}.{job_id}.parts"},
+            int(request.get("priority", 0)), 'User', 'scoring'
+        )
+
+        return {
+            "job_id": job_id,
+            "status": "queued",
+            "output_path": output_path,
+            "message": "Scoring job queued successfully"
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting scoring job: {str(e)}")
+
+@app.on_event("shutdown")
+async def stop_inference():
+    await prediction_recorder.flush()
+    micro_batcher.shutdown()
+
+# Storage GC on request; workers can also run it periodically (STORAGE_GC_INTERVAL)
+storage_collector = StorageCollector(interval=0)
+
+@app.get("/api/storage/usage")
+async def get_storage_usage(project_id: Optional[int] = None):
+    """Logical vs physical bytes per project and what garbage collection would reclaim (dry run)"""
+    try:
+        return await run_blocking(StorageGC.collect, project_id, True)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing storage usage: {str(e)}")
+
+@app.post("/api/storage/gc")
+async def collect_storage(request: dict):
+    """
+    Reclaim unreferenced objects, manifests, version directories, model files
+    and, with delete_orphans, orphaned project directories
+
+    dry_run (default true) only reports what would be deleted. A real run
+    is started in the background and rate limited; follow it with GET /api/storage/gc.
+    """
+    try:
+        options = {
+            'project_id': request.get('project_id'),
+            'dry_run': bool(request.get('dry_run', True)),
+            'min_age': max(0, int(request.get('min_age', STORAGE_GC_MIN_AGE))),
+            'dedupe': bool(request.get('dedupe', True)),
+            'delete_orphans': bool(request.get('delete_orphans', False))
+        }
+        if options['dry_run']:
+            return await run_blocking(functools.partial(StorageGC.collect, **options))
+        if not storage_collector.run_in_background(**options):
+            raise HTTPException(status_code=409, detail="Storage garbage collection is already running")
+        return {"status": "started", "message": "Storage garbage collection started"}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error collecting storage: {str(e)}")
+
+@app.get("/api/storage/gc")
+def get_storage_gc_status():
+    """State and result of the last garbage collection started through the API"""
+    return storage_collector.status()
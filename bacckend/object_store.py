@@ -0,0 +1,145 @@
+import os
+import json
+import shutil
+import tempfile
+from datetime import datetime
+from typing import BinaryIO, Dict, Optional, Tuple
+from hashing import copy_and_hash, hash_file
+
+# Every project keeps its file contents in a single content-addressed store:
+#   <project>/.store/objects/<aa>/<rest of digest>   file contents keyed by hash
+#   <project>/.store/manifests/<dataset>/<version>.json   relative path -> object
+# Version directories under <project>/data/<dataset>/<version> are only a view
+# onto the store (hardlinks, or copies where linking is not supported).
+STORE_DIR_NAME = '.store'
+
+
+class ObjectStore:
+    """Content-addressed object store with per-version manifests for a project"""
+
+    def __init__(self, project_path: str):
+        self.project_path = project_path
+        self.root = os.path.join(project_path, STORE_DIR_NAME)
+        self.objects_dir = os.path.join(self.root, 'objects')
+        self.manifests_dir = os.path.join(self.root, 'manifests')
+        self.tmp_dir = os.path.join(self.root, 'tmp')
+        for directory in (self.objects_dir, self.manifests_dir, self.tmp_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def object_path(self, digest: str) -> str:
+        """Location of an object inside the store"""
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def has_object(self, digest: str) -> bool:
+        return os.path.exists(self.object_path(digest))
+
+    def temp_path(self) -> str:
+        """Reserve a temporary file inside the store (same filesystem as the objects)"""
+        fd, path = tempfile.mkstemp(dir=self.tmp_dir)
+        os.close(fd)
+        return path
+
+    def _commit_object(self, temp_path: str, digest: str) -> None:
+        """Move a fully written temp file into place under its digest"""
+        target = self.object_path(digest)
+        if os.path.exists(target):
+            # Same content already stored, nothing new to keep; refreshing the
+            # mtime keeps storage GC from collecting it before the manifest is written
+            os.remove(temp_path)
+            os.utime(target)
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Objects are shared between versions through hardlinks, never modify them in place
+        os.chmod(temp_path, 0o444)
+        os.replace(temp_path, target)
+
+    def put_stream(self, stream: BinaryIO) -> Tuple[str, int]:
+        """Write a stream into the store, hashing while writing, returns (digest, size)"""
+        temp_path = self.temp_path()
+        try:
+            with open(temp_path, 'wb') as buffer:
+                digest, size = copy_and_hash(stream, buffer)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        self._commit_object(temp_path, digest)
+        return digest, size
+
+    def put_file(self, file_path: str) -> Tuple[str, int]:
+        """Add an existing file to the store without moving it, returns (digest, size)"""
+        digest, size = hash_file(file_path)
+        if self.has_object(digest):
+            os.utime(self.object_path(digest))
+        else:
+            temp_path = self.temp_path()
+            shutil.copyfile(file_path, temp_path)
+            self._commit_object(temp_path, digest)
+        return digest, size
+
+    def link_object(self, digest: str, dest_path: str) -> None:
+        """Expose an object at dest_path, replacing whatever is there"""
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        if os.path.lexists(dest_path):
+            # Unlink first: writing through an existing hardlink would corrupt the object
+            os.remove(dest_path)
+        source = self.object_path(digest)
+        try:
+            os.link(source, dest_path)
+        except OSError:
+            # Filesystem without hardlink support (or cross-device), fall back to a copy
+            shutil.copyfile(source, dest_path)
+
+    def materialize(self, files: Dict[str, Dict], target_dir: str) -> None:
+        """Build a version directory from manifest entries"""
+        for relative_path, entry in files.items():
+            self.link_object(entry['hash'], os.path.join(target_dir, relative_path))
+
+    def _manifest_path(self, dataset_name: str, version: str) -> str:
+        return os.path.join(self.manifests_dir, dataset_name, f"{version}.json")
+
+    def write_manifest(self, dataset_name: str, version: str, files: Dict[str, Dict]) -> str:
+        """Persist the manifest of a dataset version, returns its path"""
+        manifest_path = self._manifest_path(dataset_name, version)
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        manifest = {
+            'dataset': dataset_name,
+            'version': version,
+            'created_at': datetime.now().isoformat(),
+            'files': files
+        }
+        temp_path = self.temp_path()
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, manifest_path)
+        return manifest_path
+
+    def load_manifest(self, dataset_name: str, version: str) -> Optional[Dict[str, Dict]]:
+        """Load the file entries of a dataset version, None if no manifest exists"""
+        manifest_path = self._manifest_path(dataset_name, version)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, 'r') as f:
+            return json.load(f)['files']
+
+    def ingest_directory(self, dataset_name: str, version: str, version_dir: str) -> Dict[str, Dict]:
+        """
+        Import a version directory written before the store existed
+        Returns the manifest entries and persists the manifest
+        """
+        files = {}
+        for dirpath, dirnames, filenames in os.walk(version_dir):
+            for filename in filenames:
+                file_path = os.path.join(dirpath, filename)
+                relative_path = os.path.relpath(file_path, version_dir).replace(os.sep, '/')
+                digest, size = self.put_file(file_path)
+                files[relative_path] = {'hash': digest, 'size': size}
+        self.write_manifest(dataset_name, version, files)
+        print(f"Ingested {len(files)} files from {version_dir} into object store")
+        return files
+
+    def get_version_files(self, dataset_name: str, version: str, version_dir: str) -> Dict[str, Dict]:
+        """Manifest entries of a version, ingesting its directory if it predates the store"""
+        files = self.load_manifest(dataset_name, version)
+        if files is None and os.path.isdir(version_dir):
+            files = self.ingest_directory(dataset_name, version, version_dir)
+        return files or {}
@@ -0,0 +1,82 @@
+import json
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Listing endpoints page through rows newest first using keyset (cursor)
+# pagination on (created_at, id): each page is an index range scan no matter
+# how deep the client has paged, unlike LIMIT/OFFSET.
+DEFAULT_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor pointing just after the given row"""
+    payload = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Inverse of encode_cursor, raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def keyset_condition(after: Optional[str], alias: str) -> Tuple[str, List]:
+    """SQL condition (with params) selecting the rows that follow a cursor, newest first"""
+    if not after:
+        return "TRUE", []
+    created_at, row_id = decode_cursor(after)
+    return (f"({alias}.created_at < %s OR ({alias}.created_at = %s AND {alias}.id < %s))",
+            [created_at, created_at, row_id])
+
+
+def keyset_order(alias: str) -> str:
+    return f"{alias}.created_at DESC, {alias}.id DESC"
+
+
+def select_columns(fields: Optional[str], columns: Dict[str, str]) -> str:
+    """
+    Build the SELECT list for a sparse field selection
+
+    columns maps output field names to SQL expressions; id and created_at are
+    always selected because the cursor is built from them.
+    """
+    if fields:
+        requested = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in requested if field not in columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        selected = ['id', 'created_at'] + [field for field in requested if field not in ('id', 'created_at')]
+    else:
+        selected = list(columns)
+    return ', '.join(f"{columns[field]} AS {field}" for field in selected)
+
+
+def paginate(rows: List[Dict], limit: int) -> Tuple[List[Dict], Optional[str]]:
+    """Split a LIMIT limit + 1 result into the page and the cursor of the next page"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last['created_at'], last['id'])
+
+
+def clamp_limit(limit: Optional[int], max_limit: int) -> int:
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, max_limit))
+
+
+def pick_fields(records: List[Dict], fields: Optional[str], allowed: List[str]) -> List[Dict]:
+    """Sparse field selection on already formatted records"""
+    if not fields:
+        return records
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return [{field: record[field] for field in requested} for record in records]
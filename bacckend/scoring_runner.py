@@ -0,0 +1,210 @@
+import os
+import time
+import shutil
+import numpy as np
+from typing import Dict, List
+import torch
+from torch.utils.data import DataLoader, Subset
+from torchvision import transforms
+from job_registry import JobRegistry
+from dataset_scanner import DatasetScanner
+from tensor_cache import CachedImageDataset, TensorCache
+from inference_runner import InferenceRunner
+from training_service import CustomDataset, TrainingService, IMAGE_SIZE, NORMALIZE_MEAN, NORMALIZE_STD
+from training_runner import CancellationCheck, Heartbeat
+from config import TRAINING_THREADS_PER_JOB, TENSOR_CACHE_DIR, SCORING_BATCH_SIZE, SCORING_CHUNK_SIZE
+
+# Scores are computed in parts of chunk_batches * batch_size images written to
+#   <checkpoint_path>/part_<k>.npy   float32 class probabilities
+# so an interrupted job continues after its last complete part. The parts are
+# merged into the output file when every image is scored.
+OUTPUT_FORMATS = ('npz', 'parquet')
+
+
+class ScoringRunner:
+    """Execute a claimed bulk-scoring job: run a registered model over a whole dataset version"""
+
+    @staticmethod
+    def run_job(job_id: str) -> None:
+        job = JobRegistry.get_job(job_id)
+        if not job:
+            print(f"Scoring job {job_id} not found")
+            return
+        heartbeat = Heartbeat(job_id)
+        heartbeat.start()
+        try:
+            torch.set_num_threads(TRAINING_THREADS_PER_JOB)
+            JobRegistry.update_job(job_id, message='Scoring started...')
+            result = ScoringRunner.score(
+                job['job_spec'], job['input_datasets'][0], job['parameters'],
+                progress_callback=lambda done, total: JobRegistry.update_job(
+                    job_id, progress=min(99, int(done * 100 / max(total, 1))), message=f'Scored {done}/{total} images'
+                ),
+                should_stop=CancellationCheck(job_id)
+            )
+            if result['status'] == 'completed':
+                JobRegistry.update_job(
+                    job_id, status='completed', progress=100, model_id=job['job_spec']['model']['model_id'],
+                    message=f"Scored {result['count']} images ({result['images_per_sec']:.1f} images/sec): {result['output_path']}"
+                )
+            else:
+                JobRegistry.update_job(
+                    job_id, status='cancelled', stop_reason='cancelled',
+                    message=f"Cancelled after {result['count']} images"
+                )
+        except Exception as e:
+            print(f"Error running scoring job {job_id}: {e}")
+            import traceback
+            traceback.print_exc()
+            JobRegistry.update_job(
+                job_id, status='failed', stop_reason='failed', error_message=str(e), message=f"Error: {str(e)}"
+            )
+        finally:
+            heartbeat.stop()
+
+    @staticmethod
+    def _completed_parts(parts_dir: str) -> int:
+        """Number of consecutive part files already written"""
+        count = 0
+        while os.path.exists(os.path.join(parts_dir, f"part_{count:06d}.npy")):
+            count += 1
+        return count
+
+    @staticmethod
+    def _write_part(parts_dir: str, index: int, probabilities: np.ndarray) -> None:
+        path = os.path.join(parts_dir, f"part_{index:06d}.npy")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.save(f, probabilities)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def score(spec: Dict, dataset: Dict, parameters: Dict, progress_callback=None, should_stop=None) -> Dict:
+        """
+        Score every image of a dataset version with a model
+
+        Returns {'status': 'completed' | 'cancelled', 'count', 'output_path', 'images_per_sec'}
+        """
+        dataset_path = dataset['dataset_path']
+        output_path = spec['output_path']
+        parts_dir = spec['checkpoint_path']
+        output_format = parameters.get('format', 'npz')
+        if output_format not in OUTPUT_FORMATS:
+            raise Exception(f"Unsupported output format: {output_format} (expected one of {', '.join(OUTPUT_FORMATS)})")
+        batch_size = int(parameters.get('batch_size', SCORING_BATCH_SIZE))
+        chunk_batches = max(1, int(parameters.get('chunk_size', SCORING_CHUNK_SIZE)) // batch_size)
+        chunk_size = chunk_batches * batch_size
+
+        scan = DatasetScanner.scan(dataset_path, cache_key=dataset.get('dataset_commit_hash'), num_threads=os.cpu_count() or 1)
+        image_files = scan['image_files']
+        total = len(image_files)
+        if total == 0:
+            raise Exception(f"No images found in dataset: {dataset_path}")
+        labels = scan['labels'] if scan['has_labels'] else np.full(total, -1, dtype=np.int64)
+
+        os.makedirs(parts_dir, exist_ok=True)
+        done_parts = ScoringRunner._completed_parts(parts_dir)
+        start = min(done_parts * chunk_size, total)
+        if start:
+            print(f"Resuming scoring after {start} of {total} images")
+
+        images_per_sec = 0.0
+        if start < total:
+            image_dataset = None
+            if parameters.get('tensor_cache', False) and dataset.get('dataset_commit_hash'):
+                cached_images = TensorCache.get_or_build(
+                    TENSOR_CACHE_DIR, dataset['dataset_commit_hash'], image_files, dataset_path, IMAGE_SIZE,
+                    num_threads=os.cpu_count() or 1
+                )
+                if cached_images:
+                    image_dataset = CachedImageDataset(cached_images, labels, NORMALIZE_MEAN, NORMALIZE_STD)
+            if image_dataset is None:
+                transform = transforms.Compose([
+                    transforms.Resize(IMAGE_SIZE),
+                    transforms.ToTensor(),
+                    transforms.Normalize(mean=NORMALIZE_MEAN, std=NORMALIZE_STD)
+                ])
+                image_dataset = CustomDataset(image_files, labels, transform=transform)
+
+            device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+            loader = DataLoader(
+                Subset(image_dataset, range(start, total)), batch_size=batch_size, shuffle=False,
+                **TrainingService._loader_settings(parameters, device)
+            )
+            model_spec = spec['model']
+            model = InferenceRunner.get_model(model_spec).to(device)
+            memory_format = torch.channels_last if model_spec.get('channels_last') else torch.contiguous_format
+            autocast_dtype = torch.bfloat16 if model_spec.get('precision') == 'bf16' else None
+
+            part_index = done_parts
+            pending: List[torch.Tensor] = []
+            scored = start
+            began = time.perf_counter()
+            with torch.inference_mode():
+                for images, _ in loader:
+                    if should_stop and should_stop():
+                        print(f"Scoring cancelled after {part_index * chunk_size} images")
+                        return {'status': 'cancelled', 'count': part_index * chunk_size,
+                                'output_path': output_path, 'images_per_sec': images_per_sec}
+                    images = images.to(device, memory_format=memory_format, non_blocking=True)
+                    with torch.autocast(device_type=device.type, dtype=autocast_dtype, enabled=autocast_dtype is not None):
+                        outputs = model(images)
+                    # Stays on the device until the part is complete: no per-batch sync
+                    pending.append(torch.softmax(outputs.float(), dim=1))
+                    scored += len(images)
+                    if len(pending) == chunk_batches or scored == total:
+                        ScoringRunner._write_part(parts_dir, part_index, torch.cat(pending).cpu().numpy())
+                        part_index += 1
+                        pending = []
+                        images_per_sec = (scored - start) / max(time.perf_counter() - began, 1e-9)
+                        print(f"Scored {scored}/{total} images ({images_per_sec:.1f} images/sec)")
+                        if progress_callback:
+                            progress_callback(scored, total)
+
+        probabilities = np.concatenate([
+            np.load(os.path.join(parts_dir, f"part_{index:06d}.npy"))
+            for index in range(ScoringRunner._completed_parts(parts_dir))
+        ])
+        if len(probabilities) != total:
+            raise Exception(f"Scored {len(probabilities)} images, dataset has {total}; was the dataset modified?")
+        ScoringRunner._write_output(output_path, output_format, image_files, dataset_path, labels, probabilities)
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        return {'status': 'completed', 'count': total, 'output_path': output_path, 'images_per_sec': images_per_sec}
+
+    @staticmethod
+    def _write_output(output_path: str, output_format: str, image_files: List[str], dataset_path: str,
+                      labels: np.ndarray, probabilities: np.ndarray) -> None:
+        """Write one row per image: path, label, prediction, confidence, label probability, probabilities"""
+        labels = np.asarray(labels, dtype=np.int64)
+        rows = np.arange(len(probabilities))
+        has_label = (labels >= 0) & (labels < probabilities.shape[1])
+        label_probability = np.full(len(probabilities), np.nan, dtype=np.float32)
+        label_probability[has_label] = probabilities[rows[has_label], labels[has_label]]
+        columns = {
+            'path': np.array([os.path.relpath(path, dataset_path).replace(os.sep, '/') for path in image_files]),
+            'label': labels,
+            'prediction': probabilities.argmax(axis=1),
+            'confidence': probabilities.max(axis=1),
+            # Low probability of the recorded label flags likely mislabeled samples
+            'label_probability': label_probability,
+            'probabilities': probabilities
+        }
+
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        temp_path = f"{output_path}.tmp{os.getpid()}"
+        if output_format == 'parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise Exception("Parquet output requires pyarrow; install it or use format npz")
+            table = pa.table({
+                name: (pa.FixedSizeListArray.from_arrays(values.ravel(), values.shape[1]) if values.ndim == 2 else values)
+                for name, values in columns.items()
+            })
+            pq.write_table(table, temp_path)
+        else:
+            with open(temp_path, 'wb') as f:
+                np.savez(f, **columns)
+        os.replace(temp_path, output_path)
+        print(f"Scores written to {output_path}")
@@ -0,0 +1,511 @@
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from dbConnection import get_db, NamedLock
+from object_store import ObjectStore, STORE_DIR_NAME
+from hashing import hash_file
+from config import PROJECTS_ROOT, STORAGE_GC_INTERVAL, STORAGE_GC_DELETE, STORAGE_GC_MIN_AGE, STORAGE_GC_OPS_PER_SECOND
+
+# Reachable content, never collected:
+#   - manifests of versions that have a datasets row, and every object they reference
+#   - version directories (base_path) of datasets rows
+#   - model files of models rows, with <name>_last.pth, <name>_history.json and
+#     the <name>_scores_* outputs of scoring jobs
+#   - every path in the job_spec of jobs that are not completed: running jobs
+#     write there, failed and cancelled jobs can resume from their checkpoints
+# Model files and job paths are matched by path, whatever project their rows
+# belong to. Anything else in a project's .store/, data/ and models/
+# directories is garbage once it is older than the minimum age (uploads and
+# training runs write files before their rows exist). Project directories under
+# PROJECTS_ROOT without a projects row are reported, and only deleted on request.
+GARBAGE_CATEGORIES = ('model_files', 'version_dirs', 'manifests', 'objects', 'temp_files')
+
+
+class RateLimiter:
+    """Spaces out file operations to at most ops_per_second (0: unlimited)"""
+
+    def __init__(self, ops_per_second: int):
+        self.interval = 1.0 / ops_per_second if ops_per_second > 0 else 0.0
+        self.next_time = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if now < self.next_time:
+            time.sleep(self.next_time - now)
+        self.next_time = max(now, self.next_time) + self.interval
+
+
+class References:
+    """Paths reachable from the datasets, models and training_runs tables"""
+
+    def __init__(self):
+        self.projects: Dict[int, Dict] = {}
+        self.version_dirs = set()
+        self.manifests = set()
+        self.files = set()
+        # Directory -> path prefixes whose files are reachable
+        self.prefixes = defaultdict(list)
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        return os.path.realpath(path)
+
+    def add_file(self, path: Optional[str]) -> None:
+        if path:
+            self.files.add(References._normalize(path))
+
+    def add_prefix(self, prefix: Optional[str]) -> None:
+        if prefix:
+            prefix = References._normalize(prefix)
+            self.prefixes[os.path.dirname(prefix)].append(prefix)
+
+    def is_reachable(self, path: str) -> bool:
+        path = References._normalize(path)
+        if path in self.files:
+            return True
+        return any(path.startswith(prefix) for prefix in self.prefixes.get(os.path.dirname(path), ()))
+
+    @staticmethod
+    def load() -> 'References':
+        """References of all projects: a path is reachable if any row points to it"""
+        references = References()
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT id, name, path FROM projects")
+                for project in cursor.fetchall():
+                    references.projects[project['id']] = project
+                cursor.execute("SELECT project_id, name, version, base_path FROM datasets")
+                datasets = cursor.fetchall()
+                cursor.execute("SELECT model_path FROM models WHERE model_path IS NOT NULL")
+                models = cursor.fetchall()
+                cursor.execute("SELECT job_spec FROM training_runs WHERE status <> 'completed'")
+                jobs = cursor.fetchall()
+
+        for dataset in datasets:
+            if dataset['base_path']:
+                references.version_dirs.add(References._normalize(dataset['base_path']))
+            project = references.projects.get(dataset['project_id'])
+            if project and project['path']:
+                references.manifests.add(References._normalize(os.path.join(
+                    project['path'], STORE_DIR_NAME, 'manifests', dataset['name'], f"{dataset['version']}.json"
+                )))
+        for model in models:
+            base = os.path.splitext(model['model_path'])[0]
+            references.add_file(model['model_path'])
+            references.add_file(f"{base}_last.pth")
+            references.add_file(f"{base}_history.json")
+            references.add_prefix(f"{base}_scores_")
+        for job in jobs:
+            spec = job['job_spec'] or {}
+            if isinstance(spec, str):
+                spec = json.loads(spec)
+            if spec.get('model_output_path'):
+                # The model, its _last/_history companions and temp files of in-flight writes
+                references.add_prefix(os.path.splitext(spec['model_output_path'])[0])
+            references.add_prefix(spec.get('checkpoint_path'))
+            references.add_prefix(spec.get('output_path'))
+        return references
+
+
+class StorageGC:
+    """Reachability-based garbage collection and storage accounting of project directories"""
+
+    @staticmethod
+    def _entries(directory: str) -> List[os.DirEntry]:
+        try:
+            with os.scandir(directory) as entries:
+                return list(entries)
+        except OSError:
+            return []
+
+    @staticmethod
+    def _age(path: str) -> float:
+        """Seconds since the path was last written or linked, 0 if it is gone"""
+        try:
+            stat = os.lstat(path)
+        except OSError:
+            return 0.0
+        return time.time() - max(stat.st_mtime, stat.st_ctime)
+
+    @staticmethod
+    def _walk_files(path: str):
+        """lstat results of every file at or below path"""
+        pending = [path]
+        while pending:
+            current = pending.pop()
+            try:
+                stat = os.lstat(current)
+            except OSError:
+                continue
+            if os.path.isdir(current) and not os.path.islink(current):
+                pending.extend(entry.path for entry in StorageGC._entries(current))
+            else:
+                yield current, stat
+
+    @staticmethod
+    def physical_bytes(path: str) -> int:
+        """Bytes used below path, counting hardlinked files (objects and version views) once"""
+        seen = set()
+        total = 0
+        for _, stat in StorageGC._walk_files(path):
+            inode = (stat.st_dev, stat.st_ino)
+            if inode not in seen:
+                seen.add(inode)
+                total += stat.st_size
+        return total
+
+    @staticmethod
+    def _freed_bytes(paths: List[str]) -> int:
+        """Bytes freed by deleting paths: files whose every hardlink is among them"""
+        inodes = {}
+        for path in paths:
+            for _, stat in StorageGC._walk_files(path):
+                inode = (stat.st_dev, stat.st_ino)
+                links, size, removed = inodes.get(inode, (stat.st_nlink, stat.st_size, 0))
+                inodes[inode] = (links, size, removed + 1)
+        return sum(size for links, size, removed in inodes.values() if removed >= links)
+
+    @staticmethod
+    def _load_manifest(path: str) -> Dict[str, Dict]:
+        # Errors propagate: treating an unreadable manifest as empty would free its objects
+        with open(path, 'r') as f:
+            return json.load(f)['files']
+
+    @staticmethod
+    def plan_project(project_path: str, references: References, min_age: int) -> Dict:
+        """
+        Garbage and accounting of one project directory, without changing anything
+        Returns {'garbage': {category: [paths]}, 'relinkable': [(path, digest)], 'logical_bytes': ...}
+        """
+        garbage = {category: [] for category in GARBAGE_CATEGORIES}
+        store_dir = os.path.join(project_path, STORE_DIR_NAME)
+        live_objects = set()
+        relinkable: List[Tuple[str, str]] = []
+        dataset_bytes = 0
+        versions = 0
+
+        # Manifests: kept ones (reachable, or too recent to judge) keep their objects alive
+        manifests_dir = os.path.join(store_dir, 'manifests')
+        manifest_files = {}
+        for dataset_dir in StorageGC._entries(manifests_dir):
+            for manifest in StorageGC._entries(dataset_dir.path):
+                if References._normalize(manifest.path) in references.manifests:
+                    manifest_files[(dataset_dir.name, manifest.name[:-len('.json')])] = manifest.path
+                elif StorageGC._age(manifest.path) >= min_age:
+                    garbage['manifests'].append(manifest.path)
+                    continue
+                live_objects.update(entry['hash'] for entry in StorageGC._load_manifest(manifest.path).values())
+
+        for object_dir in StorageGC._entries(os.path.join(store_dir, 'objects')):
+            for entry in StorageGC._entries(object_dir.path):
+                if object_dir.name + entry.name not in live_objects and StorageGC._age(entry.path) >= min_age:
+                    garbage['objects'].append(entry.path)
+        for entry in StorageGC._entries(os.path.join(store_dir, 'tmp')):
+            if StorageGC._age(entry.path) >= min_age:
+                garbage['temp_files'].append(entry.path)
+
+        # Version directories: views of a manifest, or full copies for versions that predate the store
+        for dataset_dir in StorageGC._entries(os.path.join(project_path, 'data')):
+            if not dataset_dir.is_dir(follow_symlinks=False):
+                continue
+            for version_dir in StorageGC._entries(dataset_dir.path):
+                if not version_dir.is_dir(follow_symlinks=False):
+                    continue
+                if References._normalize(version_dir.path) not in references.version_dirs:
+                    if StorageGC._age(version_dir.path) >= min_age:
+                        garbage['version_dirs'].append(version_dir.path)
+                    continue
+                versions += 1
+                manifest_path = manifest_files.get((dataset_dir.name, version_dir.name))
+                if manifest_path is None:
+                    dataset_bytes += sum(stat.st_size for _, stat in StorageGC._walk_files(version_dir.path))
+                    continue
+                # Files that are copies instead of links to their object can be deduplicated
+                for relative_path, entry in StorageGC._load_manifest(manifest_path).items():
+                    dataset_bytes += entry['size']
+                    file_path = os.path.join(version_dir.path, relative_path)
+                    object_path = os.path.join(store_dir, 'objects', entry['hash'][:2], entry['hash'][2:])
+                    try:
+                        if os.lstat(file_path).st_ino != os.stat(object_path).st_ino:
+                            relinkable.append((file_path, entry['hash']))
+                    except OSError:
+                        continue
+
+        models_dir = os.path.join(project_path, 'models')
+        model_bytes = 0
+        for entry in StorageGC._entries(models_dir) + StorageGC._entries(os.path.join(models_dir, '.checkpoints')):
+            if entry.name == '.checkpoints' and entry.is_dir(follow_symlinks=False):
+                continue
+            if references.is_reachable(entry.path):
+                model_bytes += sum(stat.st_size for _, stat in StorageGC._walk_files(entry.path))
+            elif StorageGC._age(entry.path) >= min_age:
+                garbage['model_files'].append(entry.path)
+
+        return {
+            'garbage': garbage,
+            'relinkable': relinkable,
+            'versions': versions,
+            'dataset_bytes': dataset_bytes,
+            'model_bytes': model_bytes
+        }
+
+    @staticmethod
+    def _remove(path: str, min_age: int, limiter: RateLimiter) -> None:
+        """Delete a file or directory tree, one rate-limited unlink at a time"""
+        # Re-checked right before deleting: an upload may have reused it since planning
+        if StorageGC._age(path) < min_age:
+            return
+        if os.path.isdir(path) and not os.path.islink(path):
+            for dirpath, dirnames, filenames in os.walk(path, topdown=False):
+                for filename in filenames:
+                    limiter.wait()
+                    os.remove(os.path.join(dirpath, filename))
+                for dirname in dirnames:
+                    target = os.path.join(dirpath, dirname)
+                    if os.path.islink(target):
+                        os.remove(target)
+                    else:
+                        os.rmdir(target)
+            os.rmdir(path)
+        else:
+            limiter.wait()
+            os.remove(path)
+
+    @staticmethod
+    def collect_project(project: Dict, references: References, dry_run: bool = True,
+                        min_age: int = STORAGE_GC_MIN_AGE, dedupe: bool = True,
+                        limiter: Optional[RateLimiter] = None) -> Dict:
+        """Collect the garbage of one project; with dry_run only report what would be reclaimed"""
+        limiter = limiter or RateLimiter(STORAGE_GC_OPS_PER_SECOND)
+        project_path = project['path']
+        physical_before = StorageGC.physical_bytes(project_path)
+        plan = StorageGC.plan_project(project_path, references, min_age)
+        garbage = plan['garbage']
+        all_garbage = [path for category in GARBAGE_CATEGORIES for path in garbage[category]]
+        relinkable_bytes = sum(
+            os.lstat(path).st_size for path, _ in plan['relinkable']
+            if os.path.exists(path) and os.lstat(path).st_nlink == 1
+        )
+
+        report = {
+            'project_id': project['id'],
+            'project': project['name'],
+            'path': project_path,
+            'dry_run': dry_run,
+            'dataset_versions': plan['versions'],
+            # Logical: every dataset version as a full copy plus model files; physical: bytes on disk
+            'logical_bytes': plan['dataset_bytes'] + plan['model_bytes'],
+            'dataset_logical_bytes': plan['dataset_bytes'],
+            'model_bytes': plan['model_bytes'],
+            'physical_bytes': physical_before,
+            'dedup_ratio': round((plan['dataset_bytes'] + plan['model_bytes']) / physical_before, 2) if physical_before else None,
+            'garbage': {
+                category: {'count': len(garbage[category]), 'bytes': StorageGC._freed_bytes(garbage[category])}
+                for category in GARBAGE_CATEGORIES
+            },
+            'reclaimable_bytes': StorageGC._freed_bytes(all_garbage) + (relinkable_bytes if dedupe else 0),
+            'relinkable': {'count': len(plan['relinkable']), 'bytes': relinkable_bytes}
+        }
+        if dry_run:
+            return report
+
+        errors = 0
+        # Views before objects, so objects still linked from a deleted version are freed too
+        for path in all_garbage:
+            try:
+                StorageGC._remove(path, min_age, limiter)
+            except OSError as e:
+                errors += 1
+                print(f"Error deleting {path}: {e}")
+        for dataset_dir in StorageGC._entries(os.path.join(project_path, 'data')):
+            if dataset_dir.is_dir(follow_symlinks=False) and not StorageGC._entries(dataset_dir.path):
+                os.rmdir(dataset_dir.path)
+
+        relinked = 0
+        if dedupe and plan['relinkable']:
+            store = ObjectStore(project_path)
+            for path, digest in plan['relinkable']:
+                limiter.wait()
+                try:
+                    # Only replace copies that still hold the object's content
+                    if hash_file(path)[0] == digest:
+                        store.link_object(digest, path)
+                        relinked += 1
+                except OSError as e:
+                    errors += 1
+                    print(f"Error deduplicating {path}: {e}")
+
+        physical_after = StorageGC.physical_bytes(project_path)
+        report.update({
+            'physical_bytes': physical_after,
+            'reclaimed_bytes': physical_before - physical_after,
+            'relinked': relinked,
+            'errors': errors
+        })
+        print(f"Storage GC of project {project['name']}: reclaimed {physical_before - physical_after} bytes, "
+              f"{physical_after} bytes in use")
+        return report
+
+    @staticmethod
+    def orphan_projects(references: References, min_age: int) -> List[Dict]:
+        """
+        Project directories under PROJECTS_ROOT that no projects row points to (e.g. deleted projects)
+
+        Only directories with the layout create_project gives them (data/ and
+        models/) are considered; anything else under PROJECTS_ROOT is left alone.
+        """
+        project_paths = {
+            References._normalize(project['path']) for project in references.projects.values() if project['path']
+        }
+        orphans = []
+        if not project_paths:
+            # An empty projects table more likely means a misconfigured database than no projects
+            print("Storage GC: no projects registered, not looking for orphaned project directories")
+            return orphans
+        for entry in StorageGC._entries(PROJECTS_ROOT):
+            if (entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.')
+                    and References._normalize(entry.path) not in project_paths
+                    and os.path.isdir(os.path.join(entry.path, 'data'))
+                    and os.path.isdir(os.path.join(entry.path, 'models'))
+                    and StorageGC._age(entry.path) >= min_age):
+                orphans.append({'path': entry.path, 'physical_bytes': StorageGC.physical_bytes(entry.path)})
+        return orphans
+
+    @staticmethod
+    def collect(project_id: Optional[int] = None, dry_run: bool = True, min_age: int = STORAGE_GC_MIN_AGE,
+                dedupe: bool = True, ops_per_second: int = STORAGE_GC_OPS_PER_SECOND,
+                delete_orphans: bool = False) -> Dict:
+        """
+        Collect garbage of one project (or all projects and orphaned project directories)
+
+        Orphaned project directories are only deleted with delete_orphans. Runs
+        that delete hold the 'storage_gc' lock, so one collector works at a time
+        across all API and worker processes. References are reloaded for every
+        project, so a long rate-limited run never works from a stale view of the tables.
+        """
+        if dry_run:
+            return StorageGC._collect(project_id, dry_run, min_age, dedupe, ops_per_second, delete_orphans)
+        gc_lock = NamedLock('storage_gc')
+        if not gc_lock.acquire():
+            raise RuntimeError("Storage garbage collection is already running in another process")
+        try:
+            return StorageGC._collect(project_id, dry_run, min_age, dedupe, ops_per_second, delete_orphans)
+        finally:
+            gc_lock.release()
+
+    @staticmethod
+    def _collect(project_id: Optional[int], dry_run: bool, min_age: int, dedupe: bool,
+                 ops_per_second: int, delete_orphans: bool) -> Dict:
+        start = time.perf_counter()
+        limiter = RateLimiter(ops_per_second)
+        references = References.load()
+        if project_id is not None and project_id not in references.projects:
+            raise ValueError(f"Project not found: {project_id}")
+        project_ids = [project_id] if project_id is not None else sorted(references.projects)
+
+        reports, failed = [], []
+        for index, current_id in enumerate(project_ids):
+            if index > 0:
+                references = References.load()
+            project = references.projects.get(current_id)
+            if not project or not project['path'] or not os.path.isdir(project['path']):
+                continue
+            try:
+                reports.append(StorageGC.collect_project(project, references, dry_run, min_age, dedupe, limiter))
+            except Exception as e:
+                print(f"Storage GC of project {project['name']} failed: {e}")
+                if project_id is not None:
+                    raise
+                failed.append({'project_id': current_id, 'project': project['name'], 'error': str(e)})
+
+        orphans = []
+        if project_id is None:
+            orphans = StorageGC.orphan_projects(References.load(), min_age)
+            if not dry_run and delete_orphans:
+                for orphan in orphans:
+                    print(f"Storage GC: deleting orphaned project directory {orphan['path']}")
+                    try:
+                        StorageGC._remove(orphan['path'], min_age, limiter)
+                    except OSError as e:
+                        print(f"Error deleting {orphan['path']}: {e}")
+
+        result = {
+            'dry_run': dry_run,
+            'projects': reports,
+            'orphan_projects': orphans,
+            'orphans_deleted': not dry_run and delete_orphans,
+            'failed': failed,
+            'logical_bytes': sum(report['logical_bytes'] for report in reports),
+            'physical_bytes': sum(report['physical_bytes'] for report in reports),
+            'reclaimable_bytes': sum(report['reclaimable_bytes'] for report in reports)
+                                 + sum(orphan['physical_bytes'] for orphan in orphans),
+            'seconds': time.perf_counter() - start
+        }
+        if not dry_run:
+            result['reclaimed_bytes'] = (sum(report['reclaimed_bytes'] for report in reports)
+                                         + sum(orphan['physical_bytes'] for orphan in orphans
+                                               if not os.path.exists(orphan['path'])))
+        return result
+
+
+class StorageCollector:
+    """
+    Runs storage GC on a background thread: periodically, or once on request
+
+    Periodic runs are off unless interval > 0 and only report (dry run) unless
+    delete is set; they never delete orphaned project directories.
+    """
+
+    def __init__(self, interval: int = STORAGE_GC_INTERVAL, delete: bool = bool(STORAGE_GC_DELETE)):
+        self.interval = interval
+        self.delete = delete
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.last_result: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+
+    def _run_once(self, **options) -> None:
+        try:
+            self.last_result = StorageGC.collect(**options)
+            self.last_error = None
+        except Exception as e:
+            print(f"Storage GC failed: {e}")
+            self.last_error = str(e)
+        finally:
+            with self.lock:
+                self.running = False
+
+    def run_in_background(self, **options) -> bool:
+        """Start one collection unless one is already running; options as for StorageGC.collect"""
+        with self.lock:
+            if self.running:
+                return False
+            self.running = True
+        threading.Thread(target=self._run_once, kwargs=options, name="storage-gc", daemon=True).start()
+        return True
+
+    def _run_periodically(self) -> None:
+        while not self.stopped.wait(self.interval):
+            with self.lock:
+                if self.running:
+                    continue
+                self.running = True
+            self._run_once(dry_run=not self.delete)
+
+    def start(self) -> None:
+        if self.interval > 0:
+            self.thread = threading.Thread(target=self._run_periodically, name="storage-gc-scheduler", daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def status(self) -> Dict:
+        return {'running': self.running, 'last_result': self.last_result, 'last_error': self.last_error}
@@ -0,0 +1,156 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+from PIL import Image
+import torch
+from torch.utils.data import Dataset
+
+# Preprocessed datasets are stored per (dataset commit hash, dataset path, transform) as
+#   <TENSOR_CACHE_DIR>/<commit_hash>_<path_key>_<transform_key>/images.npy   uint8 N x H x W x 3
+#   <TENSOR_CACHE_DIR>/<commit_hash>_<path_key>_<transform_key>/index.json   image order, file stats and shape
+# Only the deterministic part of the pipeline (decode, RGB, resize) is cached;
+# normalization is applied when samples are read.
+CACHE_FORMAT_VERSION = 2
+
+
+class CachedImageDataset(Dataset):
+    """Dataset reading preprocessed images from a memory-mapped tensor file"""
+
+    def __init__(self, images_path: str, labels, mean: Sequence[float], std: Sequence[float]):
+        self.images_path = images_path
+        self.labels = labels
+        self.mean = torch.tensor(mean, dtype=torch.float32).view(3, 1, 1)
+        self.std = torch.tensor(std, dtype=torch.float32).view(3, 1, 1)
+        self.images = None
+        self.length = len(labels)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, idx):
+        if self.images is None:
+            # Opened lazily so every DataLoader worker maps the file itself;
+            # copy-on-write keeps slices zero-copy while allowing from_numpy
+            self.images = np.load(self.images_path, mmap_mode='c')
+        image = torch.from_numpy(self.images[idx]).permute(2, 0, 1).float().div_(255)
+        return (image - self.mean) / self.std, self.labels[idx]
+
+    def __getstate__(self):
+        # Never pickle the memory map into DataLoader workers
+        state = self.__dict__.copy()
+        state['images'] = None
+        return state
+
+
+class TensorCache:
+    """Build and look up memory-mapped preprocessed copies of dataset versions"""
+
+    @staticmethod
+    def transform_key(image_size: Tuple[int, int]) -> str:
+        """Hash of the cached preprocessing steps"""
+        description = json.dumps({
+            'format': CACHE_FORMAT_VERSION,
+            'mode': 'RGB',
+            'resize': list(image_size),
+            'interpolation': 'bilinear',
+            'dtype': 'uint8'
+        }, sort_keys=True)
+        return hashlib.sha256(description.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def path_key(base_dir: str) -> str:
+        """Hash of the dataset directory, so equal commit hashes of different datasets never share an entry"""
+        return hashlib.sha256(os.path.realpath(base_dir).encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def file_stats(image_paths: List[str], num_threads: int = 4) -> List[List[int]]:
+        """
+        (size, mtime_ns, inode) of each image
+
+        Version files are hardlinks to immutable store objects, so a file whose
+        content changed also changes at least one of these.
+        """
+        def stat(path: str) -> List[int]:
+            try:
+                info = os.stat(path)
+                return [info.st_size, info.st_mtime_ns, info.st_ino]
+            except OSError:
+                return [-1, -1, -1]
+        with ThreadPoolExecutor(max_workers=max(1, num_threads)) as executor:
+            return list(executor.map(stat, image_paths))
+
+    @staticmethod
+    def _load_image(image_path: str, image_size: Tuple[int, int]) -> np.ndarray:
+        height, width = image_size
+        try:
+            with Image.open(image_path) as image:
+                image = image.convert('RGB').resize((width, height), Image.BILINEAR)
+                return np.asarray(image, dtype=np.uint8)
+        except Exception as e:
+            print(f"Error loading image {image_path}: {e}")
+            # Same fallback as CustomDataset: a black image
+            return np.zeros((height, width, 3), dtype=np.uint8)
+
+    @staticmethod
+    def get_or_build(
+        cache_dir: str,
+        commit_hash: str,
+        image_paths: List[str],
+        base_dir: str,
+        image_size: Tuple[int, int],
+        num_threads: int = 4
+    ) -> Optional[str]:
+        """
+        Return the path of the cached images.npy for a dataset version, building it if needed
+        Returns None if the cache cannot be used
+        """
+        entry_dir = os.path.join(
+            cache_dir, f"{commit_hash}_{TensorCache.path_key(base_dir)}_{TensorCache.transform_key(image_size)}"
+        )
+        images_path = os.path.join(entry_dir, 'images.npy')
+        index_path = os.path.join(entry_dir, 'index.json')
+        relative_paths = [os.path.relpath(path, base_dir).replace(os.sep, '/') for path in image_paths]
+        stats = TensorCache.file_stats(image_paths, num_threads)
+
+        if os.path.exists(index_path):
+            with open(index_path, 'r') as f:
+                index = json.load(f)
+            if index['images'] == relative_paths and index.get('stats') == stats:
+                print(f"Using tensor cache {entry_dir}")
+                return images_path
+            # Image order, content set or file content changed, the entry is stale
+            print(f"Tensor cache {entry_dir} does not match dataset, rebuilding")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+        print(f"Building tensor cache for {len(image_paths)} images in {entry_dir}")
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_dir = f"{entry_dir}.tmp{os.getpid()}"
+        os.makedirs(temp_dir, exist_ok=True)
+        try:
+            height, width = image_size
+            images = np.lib.format.open_memmap(
+                os.path.join(temp_dir, 'images.npy'), mode='w+', dtype=np.uint8,
+                shape=(len(image_paths), height, width, 3)
+            )
+            with ThreadPoolExecutor(max_workers=max(1, num_threads)) as executor:
+                decoded = executor.map(lambda path: TensorCache._load_image(path, image_size), image_paths)
+                for position, image in enumerate(decoded):
+                    images[position] = image
+            images.flush()
+            del images
+            with open(os.path.join(temp_dir, 'index.json'), 'w') as f:
+                json.dump({'images': relative_paths, 'stats': stats, 'shape': [len(image_paths), height, width, 3]}, f)
+            # Publish atomically; a concurrent build of the same entry may have won the race
+            try:
+                os.rename(temp_dir, entry_dir)
+            except OSError:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+        except Exception as e:
+            print(f"Error building tensor cache: {e}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return None
+        return images_path
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import threading
+import torch
+from typing import Dict, Tuple
+from dbConnection import get_db
+from job_registry import JobRegistry
+from training_service import TrainingService
+from config import TRAINING_THREADS_PER_JOB, TRAINING_HEARTBEAT_INTERVAL
+
+# Seconds between cancellation lookups while a job is running
+CANCEL_CHECK_INTERVAL = 2.0
+# Minimum seconds between batch metric updates written to the job
+METRICS_REPORT_INTERVAL = 5.0
+
+
+class CancellationCheck:
+    """should_stop callback for train_model, polling the registry at most every few seconds"""
+
+    def __init__(self, job_id: str, interval: float = CANCEL_CHECK_INTERVAL):
+        self.job_id = job_id
+        self.interval = interval
+        self.last_check = 0.0
+        self.cancelled = False
+
+    def __call__(self) -> bool:
+        now = time.monotonic()
+        if not self.cancelled and now - self.last_check >= self.interval:
+            self.last_check = now
+            self.cancelled = JobRegistry.is_cancel_requested(self.job_id)
+        return self.cancelled
+
+
+class MetricsReporter:
+    """metrics_callback for train_model, publishing running metrics as the job message"""
+
+    def __init__(self, job_id: str, interval: float = METRICS_REPORT_INTERVAL):
+        self.job_id = job_id
+        self.interval = interval
+        self.last_report = 0.0
+
+    def __call__(self, metrics: Dict) -> None:
+        now = time.monotonic()
+        if now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        JobRegistry.update_job(self.job_id, message=(
+            f"Epoch {metrics['epoch']} step {metrics['step']}/{metrics['steps_per_epoch']} - "
+            f"loss {metrics['train_loss']:.4f}, accuracy {metrics['train_accuracy']:.2f}%"
+        ))
+
+
+class Heartbeat:
+    """Background thread reporting that the job's process is alive"""
+
+    def __init__(self, job_id: str, interval: float = TRAINING_HEARTBEAT_INTERVAL):
+        self.job_id = job_id
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="training-heartbeat", daemon=True)
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                JobRegistry.heartbeat(self.job_id)
+            except Exception as e:
+                print(f"Error sending heartbeat for {self.job_id}: {e}")
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+class TrainingRunner:
+    """Execute a claimed training job and record its outcome"""
+
+    @staticmethod
+    def run_job(job_id: str) -> None:
+        job = JobRegistry.get_job(job_id)
+        if not job:
+            print(f"Training job {job_id} not found")
+            return
+        heartbeat = Heartbeat(job_id)
+        heartbeat.start()
+        try:
+            spec = job['job_spec']
+            dataset = job['input_datasets'][0]
+            hyperparameters = job['parameters']
+            # Jobs requeued after a crash, deploy or resume request continue from their checkpoint
+            checkpoint_path = spec.get('checkpoint_path')
+            resume_from = checkpoint_path if checkpoint_path and os.path.exists(checkpoint_path) else None
+            
+            # CPU quota: torch intra-op threads available to this job
+            torch.set_num_threads(TRAINING_THREADS_PER_JOB)
+            
+            if resume_from:
+                JobRegistry.update_job(job_id, message='Resuming training from checkpoint...')
+            else:
+                JobRegistry.update_job(job_id, progress=0, message='Training started...')
+            print(f"Training with dataset version: {dataset['dataset_version']}")
+            print(f"Using project_id: {job['project_id']}, dataset_id: {dataset['dataset_id']}")
+            
+            result = TrainingService.train_model(
+                dataset_path=dataset['dataset_path'],
+                output_path=spec['model_output_path'],
+                hyperparameters=hyperparameters,
+                progress_callback=lambda p: JobRegistry.update_job(job_id, progress=p, message=f'Training progress: {p}%'),
+                should_stop=CancellationCheck(job_id),
+                cache_key=dataset.get('dataset_commit_hash'),
+                metrics_callback=MetricsReporter(job_id),
+                checkpoint_path=checkpoint_path,
+                resume_from=resume_from
+            )
+            
+            if result['status'] == 'completed':
+                model_id, model_version = TrainingRunner._register_model(job, result)
+                # Link the training run to the registered model
+                stop_reason = result.get('stop_reason', 'max_epochs')
+                message = 'Training completed successfully!'
+                if stop_reason == 'early_stopping':
+                    message = f"Training stopped early after {result['epochs_completed']} of {result['total_epochs']} epochs"
+                JobRegistry.update_job(
+                    job_id, status='completed', progress=100, model_id=model_id,
+                    stop_reason=stop_reason, message=message
+                )
+                print(f"Training run {job_id} completed, model {model_id} ({model_version})")
+            elif result['status'] == 'cancelled':
+                JobRegistry.update_job(
+                    job_id, status='cancelled', stop_reason='cancelled',
+                    message=f"Cancelled after {result['epochs_completed']} epochs"
+                )
+            else:
+                error = result.get('error', 'Unknown error')
+                JobRegistry.update_job(
+                    job_id, status='failed', stop_reason='failed', error_message=error,
+                    message=f"Training failed: {error}"
+                )
+                
+        except Exception as e:
+            print(f"Error running training job {job_id}: {e}")
+            import traceback
+            traceback.print_exc()
+            JobRegistry.update_job(
+                job_id, status='failed', stop_reason='failed', error_message=str(e), message=f"Error: {str(e)}"
+            )
+        finally:
+            heartbeat.stop()
+
+    @staticmethod
+    def _next_model_version(cursor, dataset_id: str, dataset_version: str) -> str:
+        """Next model version for a dataset, e.g. "v1.0_model" -> "v1.1_model" """
+        cursor.execute("""
+            SELECT version FROM models 
+            WHERE dataset_id = %s 
+            ORDER BY created_at DESC
+            LIMIT 1
+        """, (dataset_id,))
+        existing_model = cursor.fetchone()
+        
+        if not existing_model:
+            # First model for this dataset - use dataset version as base
+            return f"{dataset_version}_model"
+        
+        existing_version = existing_model['version']
+        print(f"Found existing model version: {existing_version}")
+        if "_model" in existing_version:
+            version_base = existing_version.replace("_model", "")
+            version_parts = version_base.replace("v", "").split(".")
+            major = int(version_parts[0]) if len(version_parts) > 0 else 1
+            minor = int(version_parts[1]) if len(version_parts) > 1 else 0
+            return f"v{major}.{minor + 1}_model"
+        # If format is different, just append version number
+        return f"{existing_version}_v{int(existing_version.split('.')[-1]) + 1 if '.' in existing_version else '1'}"
+
+    @staticmethod
+    def _register_model(job: Dict, result: Dict) -> Tuple[int, str]:
+        """Insert the trained model into the models table, returns (model_id, model_version)"""
+        spec = job['job_spec']
+        dataset = job['input_datasets'][0]
+        hyperparameters = job['parameters']
+        with get_db() as connection:
+            with connection.cursor() as cursor:
+                model_version = TrainingRunner._next_model_version(
+                    cursor, dataset['dataset_id'], dataset['dataset_version']
+                )
+                print(f"Generated model version: {model_version}")
+                
+                metrics = json.dumps({
+                    'accuracy': result.get('final_accuracy', 0),
+                    'loss': result.get('final_loss', 0),
+                    'best_accuracy': result.get('best_accuracy'),
+                    'best_epoch': result.get('best_epoch'),
+                    'stop_reason': result.get('stop_reason'),
+                    # Held-out test split, evaluated once with the best weights
+                    'test': result.get('test_metrics'),
+                    'epochs_completed': result['epochs_completed'],
+                    'final_epochs': hyperparameters.get('epochs', 10)
+                })
+                
+                cursor.execute("""
+                    INSERT INTO models (project_id, dataset_id, name, version, description, model_path, 
+                    framework, parameters, metrics, commit_hash, created_by)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    job['project_id'], dataset['dataset_id'], spec['model_name'], model_version,
+                    f"Model trained on {dataset['dataset_name']} dataset version {dataset['dataset_version']}",
+                    spec['model_output_path'], 'pytorch', json.dumps(hyperparameters),
+                    metrics, result.get('commit_hash', ''), job['created_by']
+                ))
+                connection.commit()
+                model_id = cursor.lastrowid
+        print(f"Model saved to database with ID: {model_id}")
+        return model_id, model_version
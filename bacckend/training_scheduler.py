@@ -0,0 +1,137 @@
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from job_registry import JobRegistry
+from config import (
+    TRAINING_MAX_WORKERS, TRAINING_MAX_JOBS_PER_PROJECT, TRAINING_POLL_INTERVAL,
+    TRAINING_HEARTBEAT_INTERVAL, TRAINING_HEARTBEAT_TIMEOUT
+)
+
+# Jobs run in freshly spawned processes so torch, its thread pools and any
+# DataLoader workers never share an interpreter with the scheduler or the API
+process_context = multiprocessing.get_context("spawn")
+
+
+def _run_job_process(job_id: str, job_type: str) -> None:
+    """Entry point of a job process"""
+    # Imported here so torch is only ever loaded inside job processes
+    if job_type == 'scoring':
+        from scoring_runner import ScoringRunner
+        ScoringRunner.run_job(job_id)
+    else:
+        from training_runner import TrainingRunner
+        TrainingRunner.run_job(job_id)
+
+
+class TrainingScheduler:
+    """
+    Bounded scheduler for queued training and scoring jobs
+
+    The queue itself is the training_runs table, so queued jobs survive restarts
+    and can be shared by several schedulers. A dispatcher thread claims jobs by
+    priority then FIFO, honouring per-project quotas, and runs at most
+    max_workers of them at a time, each in its own process. Running jobs whose
+    worker disappeared are put back in the queue and resume from their last
+    checkpoint.
+
+    max_workers bounds this scheduler only: N worker processes run up to
+    N * max_workers jobs. max_jobs_per_project is checked against the database
+    and applies across all of them.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = TRAINING_MAX_WORKERS,
+        max_jobs_per_project: int = TRAINING_MAX_JOBS_PER_PROJECT,
+        poll_interval: float = TRAINING_POLL_INTERVAL
+    ):
+        self.max_workers = max_workers
+        self.max_jobs_per_project = max_jobs_per_project
+        self.poll_interval = poll_interval
+        self.slots = threading.BoundedSemaphore(max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="training-worker")
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.dispatcher = None
+        self.processes = {}
+        self.last_stale_check = 0.0
+
+    def start(self) -> None:
+        if self.dispatcher is None:
+            self.dispatcher = threading.Thread(target=self._dispatch_loop, name="training-scheduler", daemon=True)
+            self.dispatcher.start()
+            print(f"Training scheduler started with {self.max_workers} workers")
+
+    def stop(self) -> None:
+        """Stop dispatching and terminate running job processes"""
+        self.stopping.set()
+        self.wakeup.set()
+        for job_id, process in list(self.processes.items()):
+            print(f"Terminating training job {job_id}")
+            process.terminate()
+
+    def join(self) -> None:
+        if self.dispatcher is not None:
+            self.dispatcher.join()
+        self.executor.shutdown(wait=True)
+
+    def notify(self) -> None:
+        """Wake the dispatcher, e.g. after a job was queued"""
+        self.wakeup.set()
+
+    def _requeue_stale_jobs(self) -> None:
+        now = time.monotonic()
+        if now - self.last_stale_check < TRAINING_HEARTBEAT_INTERVAL:
+            return
+        self.last_stale_check = now
+        try:
+            requeued = JobRegistry.requeue_stale_jobs(TRAINING_HEARTBEAT_TIMEOUT)
+            if requeued:
+                print(f"Requeued {requeued} training jobs without heartbeat")
+        except Exception as e:
+            print(f"Error requeueing stale training jobs: {e}")
+
+    def _dispatch_loop(self) -> None:
+        while not self.stopping.is_set():
+            self._requeue_stale_jobs()
+            # Wait for a free worker before claiming anything
+            if not self.slots.acquire(timeout=self.poll_interval):
+                continue
+            job_id = None
+            try:
+                job_id = JobRegistry.claim_next_job(self.max_jobs_per_project)
+            except Exception as e:
+                print(f"Error claiming training job: {e}")
+            if job_id is None:
+                self.slots.release()
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+                continue
+            print(f"Dispatching training job {job_id}")
+            self.executor.submit(self._run, job_id)
+
+    def _run(self, job_id: str) -> None:
+        try:
+            job = JobRegistry.get_job(job_id)
+            job_type = job.get('job_type', 'training') if job else 'training'
+            process = process_context.Process(target=_run_job_process, args=(job_id, job_type), name=f"{job_type}-{job_id}")
+            process.start()
+            self.processes[job_id] = process
+            process.join()
+            if self.stopping.is_set():
+                # Terminated by a worker shutdown: continue from the last checkpoint on the next worker
+                if JobRegistry.requeue_job(job_id, 'Worker restarting, waiting to resume from last checkpoint...'):
+                    print(f"Requeued interrupted training job {job_id}")
+            elif process.exitcode != 0:
+                # The process died before recording an outcome (crash, OOM kill, ...)
+                job = JobRegistry.get_job(job_id)
+                if job and job['status'] == 'running':
+                    error = f"Training process exited with code {process.exitcode}"
+                    JobRegistry.update_job(job_id, status='failed', stop_reason='failed', error_message=error, message=error)
+        except Exception as e:
+            print(f"Error running training job {job_id}: {e}")
+        finally:
+            self.processes.pop(job_id, None)
+            self.slots.release()
+            self.wakeup.set()
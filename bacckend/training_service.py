@@ -1,7 +1,7 @@
 import os
 import json
 import time
-import glob
+import random
 import numpy as np
 from typing import Dict, List, Optional
 from pathlib import Path
@@ -9,14 +9,27 @@ from PIL import Image
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import Dataset, DataLoader, random_split
-from torchvision import transforms, models
+from torch.utils.data import Dataset, DataLoader, Subset
+from torchvision import transforms
+from tensor_cache import CachedImageDataset, TensorCache
+from dataset_scanner import DatasetScanner
+from backbone_store import BackboneStore
+from checkpoint_writer import CheckpointWriter
+from config import TENSOR_CACHE_DIR
 try:
     import yaml
 except ImportError:
     yaml = None
     print("Warning: PyYAML not installed. YAML config files will not be supported.")
 
+IMAGE_SIZE = (224, 224)
+NORMALIZE_MEAN = [0.485, 0.456, 0.406]
+NORMALIZE_STD = [0.229, 0.224, 0.225]
+# Values of the precision hyperparameter: full fp32, or bfloat16 autocast
+PRECISIONS = ('fp32', 'bf16')
+# Metrics early stopping can monitor, and whether higher values are better
+EARLY_STOPPING_MONITORS = {'val_loss': False, 'val_accuracy': True}
+
 class CustomDataset(Dataset):
     """Custom dataset for loading images and labels"""
     def __init__(self, image_paths, labels, transform=None):
@@ -51,7 +64,12 @@ class TrainingService:
         dataset_path: str,
         output_path: str,
         hyperparameters: Dict,
-        progress_callback=None
+        progress_callback=None,
+        should_stop=None,
+        cache_key: Optional[str] = None,
+        metrics_callback=None,
+        checkpoint_path: Optional[str] = None,
+        resume_from: Optional[str] = None
     ) -> Dict:
         """
         Train a model on the given dataset (Mock implementation for now)
@@ -61,10 +79,19 @@ class TrainingService:
             output_path: Path to save the trained model
             hyperparameters: Dictionary of hyperparameters
             progress_callback: Callback function for progress updates
+            should_stop: Callable polled between batches; returning True cancels training
+            cache_key: Commit hash of the dataset version, enables the tensor cache
+                (hyperparameter tensor_cache) when given
+            metrics_callback: Receives running training metrics every metrics_sync_steps
+                batches (hyperparameter, 0 = only at the end of each epoch)
+            checkpoint_path: Where to write full checkpoints (model, optimizer, epoch,
+                history, split and RNG state) every checkpoint_every epochs (hyperparameter)
+            resume_from: Full checkpoint to continue training from
             
         Returns:
             Dictionary with training results
         """
+        checkpoints = None
         try:
             print(f"Starting actual training on dataset: {dataset_path}")
             
@@ -79,19 +106,35 @@ class TrainingService:
             train_split = hyperparameters.get('train_split', 70)
             validation_split = hyperparameters.get('validation_split', 20)
             test_split = hyperparameters.get('test_split', 10)
+            precision = str(hyperparameters.get('precision', 'fp32')).lower()
+            channels_last = bool(hyperparameters.get('channels_last', False))
+            metrics_sync_steps = max(0, int(hyperparameters.get('metrics_sync_steps', 0)))
+            checkpoint_every = max(1, int(hyperparameters.get('checkpoint_every', 1)))
+            lr_scheduler_name = str(hyperparameters.get('lr_scheduler', 'none')).lower()
+            # Early stopping is enabled by a patience (epochs without improvement)
+            early_stopping_patience = int(hyperparameters.get('early_stopping_patience') or 0)
+            early_stopping_min_delta = float(hyperparameters.get('early_stopping_min_delta', 0.0))
+            early_stopping_monitor = hyperparameters.get('early_stopping_monitor', 'val_loss')
+            if early_stopping_monitor not in EARLY_STOPPING_MONITORS:
+                raise Exception(
+                    f"Unsupported early_stopping_monitor: {early_stopping_monitor} "
+                    f"(expected one of {', '.join(EARLY_STOPPING_MONITORS)})"
+                )
+            if precision not in PRECISIONS:
+                raise Exception(f"Unsupported precision: {precision} (expected one of {', '.join(PRECISIONS)})")
             
             print(f"Model Architecture: {model_architecture}")
             print(f"Optimizer: {optimizer_name}")
             print(f"Loss Function: {loss_function_name}")
             print(f"Epochs: {epochs}, Batch Size: {batch_size}, Learning Rate: {learning_rate}")
+            print(f"Precision: {precision}, Channels last: {channels_last}")
+            print(f"LR scheduler: {lr_scheduler_name}, Early stopping patience: {early_stopping_patience or 'disabled'}")
             
-            # Count files in dataset
-            if os.path.exists(dataset_path):
-                files = glob.glob(os.path.join(dataset_path, '*.*'))
-                file_count = len([f for f in files if os.path.isfile(f)])
-            else:
-                file_count = 0
+            # Scan the dataset once: file count, YAML config, images and labels
+            if not os.path.exists(dataset_path):
                 raise Exception(f"Dataset path does not exist: {dataset_path}")
+            scan = DatasetScanner.scan(dataset_path, cache_key=cache_key, num_threads=os.cpu_count() or 1)
+            file_count = scan['file_count']
             
             print(f"Found {file_count} files in dataset")
             print(f"Data Split - Train: {train_split}%, Validation: {validation_split}%, Test: {test_split}%")
@@ -106,7 +149,7 @@ class TrainingService:
             # Load YAML config file if exists
             yaml_config = None
             if yaml is not None:
-                for yaml_file in glob.glob(os.path.join(dataset_path, '*.yaml')) + glob.glob(os.path.join(dataset_path, '*.yml')):
+                for yaml_file in scan['yaml_files']:
                     try:
                         with open(yaml_file, 'r') as f:
                             yaml_config = yaml.safe_load(f)
@@ -116,54 +159,15 @@ class TrainingService:
                     except Exception as e:
                         print(f"Error loading YAML: {e}")
             
-            # Load images from images/ folder
-            images_dir = os.path.join(dataset_path, 'images')
-            image_files = []
-            if os.path.exists(images_dir):
-                for ext in ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.gif']:
-                    image_files.extend(glob.glob(os.path.join(images_dir, ext)))
-                    image_files.extend(glob.glob(os.path.join(images_dir, ext.upper())))
-            else:
-                # Fallback: look in root directory
-                for ext in ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.gif']:
-                    image_files.extend(glob.glob(os.path.join(dataset_path, ext)))
-                    image_files.extend(glob.glob(os.path.join(dataset_path, ext.upper())))
-            
+            image_files = scan['image_files']
             print(f"Found {len(image_files)} image files in images directory")
             
             if len(image_files) == 0:
                 print("No image files found, using simulation mode")
-                return TrainingService._simulate_training(hyperparameters, output_path, progress_callback)
-            
-            # Load labels from labels/ folder
-            labels_dir = os.path.join(dataset_path, 'labels')
-            labels = []
-            if os.path.exists(labels_dir):
-                for img_path in image_files:
-                    # Find corresponding label file
-                    img_name = os.path.basename(img_path)
-                    label_name = img_name.rsplit('.', 1)[0] + '.txt'  # Replace extension with .txt
-                    label_path = os.path.join(labels_dir, label_name)
-                    
-                    if os.path.exists(label_path):
-                        # Read label file (YOLO format: class x_center y_center width height)
-                        try:
-                            with open(label_path, 'r') as f:
-                                lines = f.readlines()
-                                if lines:
-                                    # Take the first class for simplicity
-                                    first_line = lines[0].strip().split()
-                                    if first_line:
-                                        label_class = int(float(first_line[0]))
-                                        labels.append(label_class)
-                                    else:
-                                        labels.append(0)  # Default class
-                                else:
-                                    labels.append(0)  # Default class if file is empty
-                        except:
-                            labels.append(0)  # Default class on error
-                    else:
-                        labels.append(0)  # Default class if no label file
+                return TrainingService._simulate_training(hyperparameters, output_path, progress_callback, should_stop)
+            
+            if scan['has_labels']:
+                labels = scan['labels']
             else:
                 # No labels folder, use random labels for demo
                 labels = np.random.randint(0, num_classes, len(image_files))
@@ -172,34 +176,66 @@ class TrainingService:
             
             # Data transforms
             transform = transforms.Compose([
-                transforms.Resize((224, 224)),
+                transforms.Resize(IMAGE_SIZE),
                 transforms.ToTensor(),
-                transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+                transforms.Normalize(mean=NORMALIZE_MEAN, std=NORMALIZE_STD)
             ])
             
-            # Create dataset
-            dataset = CustomDataset(image_files, labels, transform=transform)
-            
-            # Split dataset
+            # Create dataset, from the preprocessed tensor cache when enabled
+            dataset = None
+            if hyperparameters.get('tensor_cache', False):
+                cached_images = None
+                if cache_key:
+                    cached_images = TensorCache.get_or_build(
+                        TENSOR_CACHE_DIR, cache_key, image_files, dataset_path, IMAGE_SIZE,
+                        num_threads=os.cpu_count() or 1
+                    )
+                else:
+                    print("Tensor cache requested but dataset has no commit hash, decoding images")
+                if cached_images:
+                    dataset = CachedImageDataset(cached_images, labels, NORMALIZE_MEAN, NORMALIZE_STD)
+            if dataset is None:
+                dataset = CustomDataset(image_files, labels, transform=transform)
+            
+            resume_state = None
+            if resume_from:
+                resume_state = torch.load(resume_from, map_location='cpu', weights_only=True)
+                if len(resume_state['split_indices']) != len(dataset):
+                    raise Exception(
+                        f"Cannot resume from {resume_from}: checkpoint covers {len(resume_state['split_indices'])} "
+                        f"samples, dataset has {len(dataset)}"
+                    )
+                print(f"Resuming from {resume_from} after epoch {resume_state['epoch']}")
+            
+            # Split dataset; the permutation is kept in full checkpoints so a resumed
+            # run trains and validates on exactly the same samples
             val_count = int(len(dataset) * validation_split / 100)
             test_count = int(len(dataset) * test_split / 100)
             train_count = len(dataset) - val_count - test_count
             
-            train_dataset, val_dataset, test_dataset = random_split(
-                dataset, [train_count, val_count, test_count]
-            )
+            if resume_state:
+                split_indices = list(resume_state['split_indices'])
+            else:
+                split_indices = torch.randperm(len(dataset)).tolist()
+            train_dataset = Subset(dataset, split_indices[:train_count])
+            val_dataset = Subset(dataset, split_indices[train_count:train_count + val_count])
+            test_dataset = Subset(dataset, split_indices[train_count + val_count:])
             
-            # Create data loaders
-            train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True)
-            val_loader = DataLoader(val_dataset, batch_size=batch_size, shuffle=False)
+            # Create data loaders (decode/resize runs in parallel worker processes)
+            device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+            loader_settings = TrainingService._loader_settings(hyperparameters, device)
+            print(f"DataLoader settings: {loader_settings}")
+            train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True, **loader_settings)
+            val_loader = DataLoader(val_dataset, batch_size=batch_size, shuffle=False, **loader_settings)
             
             print(f"Train samples: {len(train_dataset)}, Val samples: {len(val_dataset)}, Test samples: {len(test_dataset)}")
             
             # Initialize model based on architecture
-            model = TrainingService._create_model(model_architecture, num_classes)
+            model = TrainingService._create_model(model_architecture, num_classes, channels_last=channels_last)
             
             # Setup optimizer
             optimizer = TrainingService._create_optimizer(optimizer_name, model, learning_rate)
+            scheduler = TrainingService._create_scheduler(lr_scheduler_name, optimizer, hyperparameters, epochs)
             
             # Setup loss function
             criterion = TrainingService._create_loss_function(loss_function_name)
@@ -210,62 +246,130 @@ class TrainingService:
                 'val_loss': [],
                 'train_accuracy': [],
                 'val_accuracy': [],
-                'epochs': []
+                'train_images_per_sec': [],
+                'learning_rate': [],
+                'epochs': [],
+                'settings': {
+                    'model_architecture': model_architecture,
+                    'precision': precision,
+                    'channels_last': channels_last,
+                    'device': device.type
+                }
             }
             
             # Training loop
-            device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
             print(f"Using device: {device}")
             model = model.to(device)
-            
-            best_val_acc = 0
-            
-            for epoch in range(epochs):
+            memory_format = torch.channels_last if channels_last else torch.contiguous_format
+            # bf16 autocast runs matmuls/convolutions in bfloat16, weights and optimizer state stay fp32
+            autocast_dtype = torch.bfloat16 if precision == 'bf16' else None
+            
+            # Best weights go to output_path, the latest epoch's to <name>_last.pth;
+            # both are written off the training thread
+            last_model_path = output_path.replace('.pth', '_last.pth')
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            checkpoints = CheckpointWriter()
+            best_val_acc = -1.0
+            best_epoch = 0
+            start_epoch = 0
+            # Early stopping state: best monitored value and epochs since it improved
+            best_monitored = None
+            epochs_without_improvement = 0
+            stop_reason = 'max_epochs'
+            
+            if resume_state:
+                model.load_state_dict(resume_state['model'])
+                optimizer.load_state_dict(resume_state['optimizer'])
+                start_epoch = resume_state['epoch']
+                best_val_acc = resume_state['best_val_acc']
+                best_epoch = resume_state['best_epoch']
+                if scheduler and resume_state.get('scheduler'):
+                    scheduler.load_state_dict(resume_state['scheduler'])
+                best_monitored = resume_state.get('best_monitored')
+                epochs_without_improvement = resume_state.get('epochs_without_improvement', 0)
+                settings = training_history['settings']
+                training_history = resume_state['history']
+                training_history['settings'] = settings
+                TrainingService._set_rng_state(resume_state['rng_state'])
+            
+            for epoch in range(start_epoch, epochs):
+                if should_stop and should_stop():
+                    print(f"Training cancelled before epoch {epoch+1}")
+                    checkpoints.close()
+                    return TrainingService._cancelled_result(epoch, epochs, training_history)
+                
                 # Update progress
                 if progress_callback:
                     progress = int(((epoch + 1) / epochs) * 90)
                     progress_callback(progress)
                 
                 # Training phase
+                # Loss and correct counts accumulate on the device; reading them back
+                # forces a sync, so that only happens every metrics_sync_steps batches
                 model.train()
-                train_loss = 0.0
-                train_correct = 0
+                train_loss_sum = torch.zeros((), device=device)
+                train_correct_sum = torch.zeros((), dtype=torch.long, device=device)
                 train_total = 0
+                train_steps = 0
+                epoch_start = time.perf_counter()
                 
                 for images, targets in train_loader:
-                    images, targets = images.to(device), targets.to(device)
+                    if should_stop and should_stop():
+                        print(f"Training cancelled during epoch {epoch+1}")
+                        checkpoints.close()
+                        return TrainingService._cancelled_result(epoch, epochs, training_history)
+                    images, targets = images.to(device, memory_format=memory_format), targets.to(device)
                     
                     optimizer.zero_grad()
-                    outputs = model(images)
-                    loss = criterion(outputs, targets)
+                    with torch.autocast(device_type=device.type, dtype=autocast_dtype, enabled=autocast_dtype is not None):
+                        outputs = model(images)
+                        loss = criterion(outputs, targets)
                     loss.backward()
                     optimizer.step()
                     
-                    train_loss += loss.item()
-                    _, predicted = torch.max(outputs.data, 1)
+                    train_loss_sum += loss.detach()
+                    train_correct_sum += (outputs.detach().argmax(1) == targets).sum()
                     train_total += targets.size(0)
-                    train_correct += (predicted == targets).sum().item()
+                    train_steps += 1
+                    
+                    if metrics_sync_steps and train_steps % metrics_sync_steps == 0:
+                        running_loss = train_loss_sum.item() / train_steps
+                        running_acc = 100. * train_correct_sum.item() / train_total
+                        print(f"Epoch {epoch+1} step {train_steps}/{len(train_loader)} - Loss: {running_loss:.4f}, Acc: {running_acc:.2f}%")
+                        if metrics_callback:
+                            metrics_callback({
+                                'epoch': epoch + 1,
+                                'step': train_steps,
+                                'steps_per_epoch': len(train_loader),
+                                'train_loss': running_loss,
+                                'train_accuracy': running_acc
+                            })
                 
+                train_loss = train_loss_sum.item()
+                train_correct = train_correct_sum.item()
                 train_acc = 100. * train_correct / train_total
                 avg_train_loss = train_loss / len(train_loader)
+                images_per_sec = train_total / max(time.perf_counter() - epoch_start, 1e-9)
                 
                 # Validation phase
                 model.eval()
-                val_loss = 0.0
-                val_correct = 0
+                val_loss_sum = torch.zeros((), device=device)
+                val_correct_sum = torch.zeros((), dtype=torch.long, device=device)
                 val_total = 0
                 
                 with torch.no_grad():
                     for images, targets in val_loader:
-                        images, targets = images.to(device), targets.to(device)
-                        outputs = model(images)
-                        loss = criterion(outputs, targets)
+                        images, targets = images.to(device, memory_format=memory_format), targets.to(device)
+                        with torch.autocast(device_type=device.type, dtype=autocast_dtype, enabled=autocast_dtype is not None):
+                            outputs = model(images)
+                            loss = criterion(outputs, targets)
                         
-                        val_loss += loss.item()
-                        _, predicted = torch.max(outputs.data, 1)
+                        val_loss_sum += loss
+                        val_correct_sum += (outputs.argmax(1) == targets).sum()
                         val_total += targets.size(0)
-                        val_correct += (predicted == targets).sum().item()
                 
+                val_loss = val_loss_sum.item()
+                val_correct = val_correct_sum.item()
                 val_acc = 100. * val_correct / val_total
                 avg_val_loss = val_loss / len(val_loader)
                 
@@ -274,21 +378,79 @@ class TrainingService:
                 training_history['val_loss'].append(avg_val_loss)
                 training_history['train_accuracy'].append(train_acc)
                 training_history['val_accuracy'].append(val_acc)
+                training_history['train_images_per_sec'].append(images_per_sec)
+                training_history['learning_rate'].append(optimizer.param_groups[0]['lr'])
                 training_history['epochs'].append(epoch + 1)
                 
-                print(f"Epoch {epoch+1}/{epochs} - Train Loss: {avg_train_loss:.4f}, Train Acc: {train_acc:.2f}% | Val Loss: {avg_val_loss:.4f}, Val Acc: {val_acc:.2f}%")
+                print(f"Epoch {epoch+1}/{epochs} - Train Loss: {avg_train_loss:.4f}, Train Acc: {train_acc:.2f}% | Val Loss: {avg_val_loss:.4f}, Val Acc: {val_acc:.2f}% | {images_per_sec:.1f} images/sec")
                 
                 if val_acc > best_val_acc:
                     best_val_acc = val_acc
+                    best_epoch = epoch + 1
                     # Save best model
-                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                    torch.save(model.state_dict(), output_path)
-                    print(f"Saved best model with validation accuracy: {val_acc:.2f}%")
-            
-            # Save final model
-            torch.save(model.state_dict(), output_path)
-            print(f"Final model saved to: {output_path}")
-            
+                    checkpoints.save(model.state_dict(), output_path, epoch=epoch + 1, kind='best')
+                    print(f"Saving best model with validation accuracy: {val_acc:.2f}%")
+                checkpoints.save(model.state_dict(), last_model_path, epoch=epoch + 1, kind='last')
+                
+                if scheduler is not None:
+                    if isinstance(scheduler, optim.lr_scheduler.ReduceLROnPlateau):
+                        scheduler.step(avg_val_loss)
+                    else:
+                        scheduler.step()
+                
+                if early_stopping_patience:
+                    monitored = avg_val_loss if early_stopping_monitor == 'val_loss' else val_acc
+                    higher_is_better = EARLY_STOPPING_MONITORS[early_stopping_monitor]
+                    improvement = None if best_monitored is None else (
+                        monitored - best_monitored if higher_is_better else best_monitored - monitored
+                    )
+                    if improvement is None or improvement > early_stopping_min_delta:
+                        best_monitored = monitored
+                        epochs_without_improvement = 0
+                    else:
+                        epochs_without_improvement += 1
+                    if epochs_without_improvement >= early_stopping_patience and epoch + 1 < epochs:
+                        stop_reason = 'early_stopping'
+                        print(f"Early stopping after epoch {epoch+1}: {early_stopping_monitor} did not improve "
+                              f"by more than {early_stopping_min_delta} for {early_stopping_patience} epochs")
+                        break
+                
+                if checkpoint_path and (epoch + 1) % checkpoint_every == 0 and epoch + 1 < epochs:
+                    checkpoints.save({
+                        'epoch': epoch + 1,
+                        'model': model.state_dict(),
+                        'optimizer': optimizer.state_dict(),
+                        'scheduler': scheduler.state_dict() if scheduler else None,
+                        'history': training_history,
+                        'best_val_acc': best_val_acc,
+                        'best_epoch': best_epoch,
+                        'best_monitored': best_monitored,
+                        'epochs_without_improvement': epochs_without_improvement,
+                        'split_indices': split_indices,
+                        'rng_state': TrainingService._get_rng_state()
+                    }, checkpoint_path, epoch=epoch + 1, kind='resume')
+            
+            # Wait for the outstanding checkpoint writes
+            checkpoints.close()
+            checkpoints.flush()
+            training_history['checkpoint_writes'] = checkpoints.writes
+            if checkpoint_path and os.path.exists(checkpoint_path):
+                # Finished runs have nothing left to resume
+                os.remove(checkpoint_path)
+            print(f"Best model (epoch {best_epoch}) saved to: {output_path}, last model saved to: {last_model_path}")
+
+            # Held-out evaluation of the best weights, once, on samples never used for model selection
+            test_metrics = None
+            if len(test_dataset) > 0:
+                if os.path.exists(output_path):
+                    model.load_state_dict(torch.load(output_path, map_location=device, weights_only=True))
+                test_loader = DataLoader(test_dataset, batch_size=batch_size, shuffle=False, **loader_settings)
+                test_metrics = TrainingService.evaluate(
+                    model, test_loader, num_classes, device, memory_format, autocast_dtype, criterion
+                )
+                print(f"Test (best epoch {best_epoch}) - Loss: {test_metrics['loss']:.4f}, "
+                      f"Acc: {test_metrics['accuracy']:.2f}%, Macro F1: {test_metrics['macro']['f1']:.4f}")
+
             # Save training history
             history_path = output_path.replace('.pth', '_history.json')
             with open(history_path, 'w') as f:
@@ -304,10 +466,15 @@ class TrainingService:
             return {
                 'status': 'completed',
                 'model_path': output_path,
+                'last_model_path': last_model_path,
                 'final_loss': final_loss,
                 'final_accuracy': final_accuracy,
+                'best_accuracy': best_val_acc,
+                'best_epoch': best_epoch,
                 'total_epochs': epochs,
-                'epochs_completed': epochs,
+                'epochs_completed': len(training_history['epochs']),
+                'stop_reason': stop_reason,
+                'test_metrics': test_metrics,
                 'training_history': training_history,
                 'file_count': len(image_files),
                 'data_split': {
@@ -319,6 +486,8 @@ class TrainingService:
             
         except Exception as e:
             print(f"Training error: {e}")
+            if checkpoints:
+                checkpoints.close()
             if progress_callback:
                 progress_callback(-1)  # Error indicator
             return {
@@ -327,28 +496,157 @@ class TrainingService:
             }
     
     @staticmethod
-    def _create_model(architecture: str, num_classes: int):
-        """Create model based on architecture"""
+    def _loader_settings(hyperparameters: Dict, device) -> Dict:
+        """
+        DataLoader parallelism settings
+        
+        num_workers, pin_memory, persistent_workers and prefetch_factor can be set as
+        hyperparameters; unset values are derived from the cores available to this process.
+        """
+        try:
+            available_cores = len(os.sched_getaffinity(0))
+        except AttributeError:
+            available_cores = os.cpu_count() or 1
+        
+        num_workers = hyperparameters.get('num_workers')
+        if num_workers is None:
+            # Half the cores decode images, the rest are left to the model's intra-op threads
+            num_workers = min(8, available_cores // 2)
+        num_workers = max(0, int(num_workers))
+        
+        settings = {
+            'num_workers': num_workers,
+            'pin_memory': bool(hyperparameters.get('pin_memory', device.type == 'cuda'))
+        }
+        if num_workers > 0:
+            # Keep workers alive across epochs and let each prepare batches ahead of time
+            settings['persistent_workers'] = bool(hyperparameters.get('persistent_workers', True))
+            settings['prefetch_factor'] = max(1, int(hyperparameters.get('prefetch_factor', 2)))
+        return settings
+    
+    @staticmethod
+    def evaluate(model, loader, num_classes: int, device, memory_format=torch.contiguous_format,
+                 autocast_dtype=None, criterion=None) -> Dict:
+        """
+        Classification metrics of a model over a loader in one pass
+
+        Predictions and targets are accumulated on the device and reduced with a
+        single bincount into the confusion matrix (rows: true class, columns:
+        predicted class); every metric is derived from that matrix.
+        """
+        model.eval()
+        predictions, targets_seen = [], []
+        loss_sum = torch.zeros((), device=device)
+        with torch.inference_mode():
+            for images, targets in loader:
+                images, targets = images.to(device, memory_format=memory_format), targets.to(device)
+                with torch.autocast(device_type=device.type, dtype=autocast_dtype, enabled=autocast_dtype is not None):
+                    outputs = model(images)
+                    if criterion is not None:
+                        loss_sum += criterion(outputs, targets) * targets.size(0)
+                predictions.append(outputs.argmax(1))
+                targets_seen.append(targets)
+
+        predicted = torch.cat(predictions).long()
+        actual = torch.cat(targets_seen).long()
+        confusion = torch.bincount(
+            actual * num_classes + predicted, minlength=num_classes * num_classes
+        ).view(num_classes, num_classes).double()
+
+        true_positives = confusion.diagonal()
+        support = confusion.sum(1)
+        predicted_count = confusion.sum(0)
+        # Classes never predicted (or absent) get 0 instead of NaN
+        precision = true_positives / predicted_count.clamp(min=1)
+        recall = true_positives / support.clamp(min=1)
+        f1 = 2 * precision * recall / (precision + recall).clamp(min=1e-12)
+        total = max(int(support.sum().item()), 1)
+        weights = support / total
+
+        per_class = torch.stack([precision, recall, f1, support], dim=1).tolist()
+        return {
+            'samples': int(actual.numel()),
+            'loss': loss_sum.item() / total if criterion is not None else None,
+            'accuracy': 100. * true_positives.sum().item() / total,
+            'macro': {
+                'precision': precision.mean().item(),
+                'recall': recall.mean().item(),
+                'f1': f1.mean().item()
+            },
+            'weighted': {
+                'precision': (precision * weights).sum().item(),
+                'recall': (recall * weights).sum().item(),
+                'f1': (f1 * weights).sum().item()
+            },
+            'per_class': [
+                {'class': index, 'precision': p, 'recall': r, 'f1': f, 'support': int(s)}
+                for index, (p, r, f, s) in enumerate(per_class)
+            ],
+            'confusion_matrix': confusion.long().tolist()
+        }
+
+    @staticmethod
+    def _get_rng_state() -> Dict:
+        """Python, NumPy and torch RNG state, in types torch.load(weights_only=True) accepts"""
+        numpy_state = np.random.get_state()
+        state = {
+            'python': random.getstate(),
+            'numpy': (numpy_state[0], numpy_state[1].tolist()) + tuple(numpy_state[2:]),
+            'torch': torch.get_rng_state()
+        }
+        if torch.cuda.is_available():
+            state['cuda'] = torch.cuda.get_rng_state_all()
+        return state
+    
+    @staticmethod
+    def _set_rng_state(state: Dict) -> None:
+        random.setstate(state['python'])
+        numpy_state = state['numpy']
+        np.random.set_state((numpy_state[0], np.array(numpy_state[1], dtype=np.uint32)) + tuple(numpy_state[2:]))
+        torch.set_rng_state(state['torch'])
+        if 'cuda' in state and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all(state['cuda'])
+    
+    @staticmethod
+    def _cancelled_result(epochs_completed: int, total_epochs: int, training_history: Dict) -> Dict:
+        """Result returned when a job is cancelled mid-training"""
+        return {
+            'status': 'cancelled',
+            'stop_reason': 'cancelled',
+            'total_epochs': total_epochs,
+            'epochs_completed': epochs_completed,
+            'training_history': training_history
+        }
+    
+    @staticmethod
+    def _create_model(architecture: str, num_classes: int, channels_last: bool = False, pretrained: bool = True):
+        """
+        Create model from a pretrained backbone (see backbone_store), optionally channels-last
+        pretrained=False only builds the architecture, e.g. to load trained weights into it
+        """
         if architecture.lower() == 'resnet':
-            model = models.resnet18(pretrained=True)
+            model = BackboneStore.load('resnet18', pretrained)
             model.fc = nn.Linear(model.fc.in_features, num_classes)
         elif architecture.lower() == 'yolov5':
             # Simplified YOLO - using ResNet backbone
-            model = models.resnet50(pretrained=True)
+            model = BackboneStore.load('resnet50', pretrained)
             model.fc = nn.Linear(model.fc.in_features, num_classes)
         elif architecture.lower() == 'ssd':
             # Using MobileNet as backbone for SSD
-            model = models.mobilenet_v2(pretrained=True)
+            model = BackboneStore.load('mobilenet_v2', pretrained)
             model.classifier[-1] = nn.Linear(model.last_channel, num_classes)
         elif architecture.lower() == 'fasterrcnn':
             # Using ResNet backbone
-            model = models.resnet101(pretrained=True)
+            model = BackboneStore.load('resnet101', pretrained)
             model.fc = nn.Linear(model.fc.in_features, num_classes)
         else:
             # Default to ResNet18
-            model = models.resnet18(pretrained=True)
+            model = BackboneStore.load('resnet18', pretrained)
             model.fc = nn.Linear(model.fc.in_features, num_classes)
         
+        if channels_last:
+            # NHWC lets oneDNN/cuDNN pick faster convolution kernels, mainly under bf16
+            model = model.to(memory_format=torch.channels_last)
         return model
     
     @staticmethod
@@ -367,6 +665,36 @@ class TrainingService:
         else:
             return optim.Adam(model.parameters(), lr=learning_rate)
     
+    @staticmethod
+    def _create_scheduler(scheduler_name: str, optimizer, hyperparameters: Dict, epochs: int):
+        """Create learning rate scheduler based on name, None for a constant learning rate"""
+        scheduler_name = scheduler_name.lower()
+        
+        if scheduler_name == 'step':
+            return optim.lr_scheduler.StepLR(
+                optimizer,
+                step_size=max(1, int(hyperparameters.get('lr_step_size', max(1, epochs // 3)))),
+                gamma=float(hyperparameters.get('lr_gamma', 0.1))
+            )
+        elif scheduler_name == 'cosine':
+            return optim.lr_scheduler.CosineAnnealingLR(
+                optimizer,
+                T_max=max(1, epochs),
+                eta_min=float(hyperparameters.get('lr_min', 0.0))
+            )
+        elif scheduler_name == 'plateau':
+            return optim.lr_scheduler.ReduceLROnPlateau(
+                optimizer,
+                mode='min',
+                factor=float(hyperparameters.get('lr_gamma', 0.1)),
+                patience=int(hyperparameters.get('lr_patience', 2)),
+                min_lr=float(hyperparameters.get('lr_min', 0.0))
+            )
+        elif scheduler_name in ('none', ''):
+            return None
+        else:
+            raise Exception(f"Unsupported lr_scheduler: {scheduler_name} (expected step, cosine, plateau or none)")
+    
     @staticmethod
     def _create_loss_function(loss_name: str):
         """Create loss function based on name"""
@@ -384,12 +712,14 @@ class TrainingService:
             return nn.CrossEntropyLoss()
     
     @staticmethod
-    def _simulate_training(hyperparameters: Dict, output_path: str, progress_callback=None) -> Dict:
+    def _simulate_training(hyperparameters: Dict, output_path: str, progress_callback=None, should_stop=None) -> Dict:
         """Fallback simulation mode when no images found"""
         print("Running in simulation mode")
         epochs = hyperparameters.get('epochs', 10)
         
         for epoch in range(epochs):
+            if should_stop and should_stop():
+                return TrainingService._cancelled_result(epoch, epochs, {})
             if progress_callback:
                 progress = int(((epoch + 1) / epochs) * 90)
                 progress_callback(progress)
@@ -405,6 +735,7 @@ class TrainingService:
             'final_accuracy': 0.85,
             'total_epochs': epochs,
             'epochs_completed': epochs,
+            'stop_reason': 'max_epochs',
             'training_history': {}
         }
     
@@ -417,5 +748,7 @@ class TrainingService:
             'learning_rate': 0.001,
             'num_classes': 10,
             'optimizer': 'adam',
-            'loss_function': 'cross_entropy'
+            'loss_function': 'cross_entropy',
+            'lr_scheduler': 'none',
+            'early_stopping_patience': 0
         }
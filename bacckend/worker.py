@@ -0,0 +1,34 @@
+import signal
+from training_scheduler import TrainingScheduler
+from storage_gc import StorageCollector
+
+# Standalone training worker: pulls queued jobs from training_runs and runs
+# each one in its own process, reporting progress back through the database.
+#
+#   python worker.py
+#
+# Run one or more of these next to the API (or let the API start one, see
+# TRAINING_EMBEDDED_WORKER). With STORAGE_GC_INTERVAL set, each worker also
+# runs storage garbage collection periodically; it only deletes with
+# STORAGE_GC_DELETE, and one collector at a time across all processes.
+
+
+def main():
+    scheduler = TrainingScheduler()
+    storage_collector = StorageCollector()
+
+    def shutdown(signum, frame):
+        print(f"Received signal {signum}, stopping training worker")
+        storage_collector.stop()
+        scheduler.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    scheduler.start()
+    storage_collector.start()
+    scheduler.join()
+
+
+if __name__ == "__main__":
+    main()
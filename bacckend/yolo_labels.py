@@ -0,0 +1,95 @@
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+# One record per YOLO line (class x_center y_center width height), 20 bytes each.
+# Boxes of all images are stored back to back; boxes of image i are
+# boxes[offsets[i]:offsets[i + 1]].
+LABEL_DTYPE = np.dtype([
+    ('cls', np.int32),
+    ('x', np.float32),
+    ('y', np.float32),
+    ('w', np.float32),
+    ('h', np.float32)
+])
+FIELDS_PER_LINE = 5
+
+
+class YoloLabels:
+    """Bulk parsing and storage of YOLO label files as NumPy arrays"""
+
+    @staticmethod
+    def parse_text(text: str) -> np.ndarray:
+        """Parse the contents of one label file into an (n, 5) float32 array"""
+        lines = [line.split() for line in text.splitlines()]
+        lines = [fields for fields in lines if fields]
+        # Fast path only when every non-empty line is exactly one box
+        if all(len(fields) == FIELDS_PER_LINE for fields in lines):
+            try:
+                return np.array(lines, dtype=np.float32).reshape(-1, FIELDS_PER_LINE)
+            except ValueError:
+                pass
+        # Malformed or extended lines (e.g. segmentation polygons): keep the first five fields of each line
+        rows = []
+        for fields in lines:
+            if len(fields) >= FIELDS_PER_LINE:
+                try:
+                    rows.append([float(field) for field in fields[:FIELDS_PER_LINE]])
+                except ValueError:
+                    continue
+        return np.array(rows, dtype=np.float32).reshape(-1, FIELDS_PER_LINE)
+
+    @staticmethod
+    def _read(label_path: Optional[str]) -> str:
+        if not label_path:
+            return ''
+        try:
+            with open(label_path, 'r') as f:
+                return f.read()
+        except Exception as e:
+            print(f"Error reading label file {label_path}: {e}")
+            return ''
+
+    @staticmethod
+    def load(label_paths: List[Optional[str]], num_threads: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Parse the label files of a list of images (None for images without labels)
+        Returns (boxes, offsets): a LABEL_DTYPE array and an int64 array of len(label_paths) + 1
+        """
+        # Parsing touches no shared state, so files are read and parsed in parallel
+        with ThreadPoolExecutor(max_workers=max(1, num_threads)) as executor:
+            parsed = list(executor.map(lambda path: YoloLabels.parse_text(YoloLabels._read(path)), label_paths))
+        counts = np.fromiter((len(rows) for rows in parsed), dtype=np.int64, count=len(parsed))
+        offsets = np.zeros(len(parsed) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        values = np.concatenate(parsed) if parsed else np.empty((0, FIELDS_PER_LINE), np.float32)
+        boxes = np.empty(len(values), dtype=LABEL_DTYPE)
+        boxes['cls'] = values[:, 0].astype(np.int32)
+        for column, name in enumerate(('x', 'y', 'w', 'h'), start=1):
+            boxes[name] = values[:, column]
+        return boxes, offsets
+
+    @staticmethod
+    def first_classes(boxes: np.ndarray, offsets: np.ndarray, default: int = 0) -> np.ndarray:
+        """Class of the first box of every image, default for images without boxes"""
+        starts = offsets[:-1]
+        has_boxes = offsets[1:] > starts
+        classes = np.full(len(starts), default, dtype=np.int64)
+        classes[has_boxes] = boxes['cls'][starts[has_boxes]]
+        return classes
+
+    @staticmethod
+    def save(path: str, boxes: np.ndarray, offsets: np.ndarray) -> None:
+        """Write labels atomically as an uncompressed .npz"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp{os.getpid()}"
+        with open(temp_path, 'wb') as f:
+            np.savez(f, boxes=boxes, offsets=offsets)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load_file(path: str) -> Tuple[np.ndarray, np.ndarray]:
+        with np.load(path) as data:
+            return data['boxes'], data['offsets']
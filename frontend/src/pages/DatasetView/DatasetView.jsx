@@ -2,6 +2,15 @@ import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { SideHeading } from '../../components/SideHeading/SideHeading';
 
+// Filters map to the file types sent to the server (comma-separated)
+const FILTER_TYPES = {
+    all: [],
+    images: ['jpg', 'jpeg', 'png', 'gif', 'webp'],
+    text: ['txt', 'csv', 'md', 'json'],
+    json: ['json']
+};
+const PAGE_SIZE = 100;
+
 export const DatasetView = () => {
     const { datasetName, projectName } = useParams();
     const navigate = useNavigate();
@@ -10,21 +19,38 @@ export const DatasetView = () => {
     const [isLoading, setIsLoading] = useState(true);
     const [selectedImage, setSelectedImage] = useState(null);
     const [filterType, setFilterType] = useState('all');
+    const [sort, setSort] = useState('name');
+    const [order, setOrder] = useState('asc');
+    const [offset, setOffset] = useState(0);
+    const [total, setTotal] = useState(0);
+    const [typeCounts, setTypeCounts] = useState({});
 
     useEffect(() => {
         fetchDatasetDetails();
-    }, [datasetName, projectName]);
+    }, [datasetName, projectName, filterType, sort, order, offset]);
 
     const fetchDatasetDetails = async () => {
         setIsLoading(true);
         try {
-            const response = await fetch(`http://localhost:8000/api/datasets/${encodeURIComponent(datasetName)}/details?project=${encodeURIComponent(projectName)}`);
+            const params = new URLSearchParams({
+                project: projectName,
+                limit: PAGE_SIZE,
+                offset,
+                sort,
+                order
+            });
+            if (FILTER_TYPES[filterType].length > 0) {
+                params.set('file_type', FILTER_TYPES[filterType].join(','));
+            }
+            const response = await fetch(`http://localhost:8000/api/datasets/${encodeURIComponent(datasetName)}/details?${params}`);
             if (!response.ok) {
                 throw new Error('Failed to fetch dataset details');
             }
             const data = await response.json();
             setDatasetInfo(data.dataset);
             setFiles(data.files || []);
+            setTotal(data.total || 0);
+            setTypeCounts(data.type_counts || {});
         } catch (error) {
             console.error('Error fetching dataset details:', error);
             alert('Failed to load dataset details');
@@ -33,15 +59,17 @@ export const DatasetView = () => {
         }
     };
 
-    const filteredFiles = filterType === 'all' 
-        ? files 
-        : files.filter(file => {
-            const fileType = file.name.split('.').pop().toLowerCase();
-            if (filterType === 'images') return ['jpg', 'jpeg', 'png', 'gif', 'webp'].includes(fileType);
-            if (filterType === 'text') return ['txt', 'csv', 'md', 'json'].includes(fileType);
-            if (filterType === 'json') return fileType === 'json';
-            return true;
-        });
+    // Filtering, sorting and paging happen on the server; counts come from its per-type totals
+    const countFor = (filter) => {
+        const types = FILTER_TYPES[filter];
+        const counted = types.length > 0 ? types : Object.keys(typeCounts);
+        return counted.reduce((sum, type) => sum + (typeCounts[type] || 0), 0);
+    };
+
+    const changeFilter = (filter) => {
+        setFilterType(filter);
+        setOffset(0);
+    };
 
     const handleDownload = async (file) => {
         try {
@@ -73,7 +101,7 @@ export const DatasetView = () => {
         window.open(`file://${file.path}`, '_blank');
     };
 
-    if (isLoading) {
+    if (isLoading && !datasetInfo) {
         return (
             <div className="mr-[50px]">
                 <SideHeading title="Dataset Viewer" />
@@ -101,11 +129,6 @@ export const DatasetView = () => {
         );
     }
 
-    const imageFiles = files.filter(file => {
-        const ext = file.name.split('.').pop().toLowerCase();
-        return ['jpg', 'jpeg', 'png', 'gif', 'webp'].includes(ext);
-    });
-
     return (
         <div className="mr-[50px]">
             <div className="flex items-center justify-between mb-6">
@@ -149,37 +172,57 @@ export const DatasetView = () => {
             <div className="ml-[32px] mb-6 flex items-center gap-4">
                 <div className="flex gap-2">
                     <button
-                        onClick={() => setFilterType('all')}
+                        onClick={() => changeFilter('all')}
                         className={`px-4 py-2 rounded-lg ${filterType === 'all' ? 'bg-blue-500 text-white' : 'bg-gray-100 text-gray-700'}`}
                     >
-                        All ({files.length})
+                        All ({countFor('all')})
                     </button>
                     <button
-                        onClick={() => setFilterType('images')}
+                        onClick={() => changeFilter('images')}
                         className={`px-4 py-2 rounded-lg ${filterType === 'images' ? 'bg-blue-500 text-white' : 'bg-gray-100 text-gray-700'}`}
                     >
-                        Images ({imageFiles.length})
+                        Images ({countFor('images')})
                     </button>
                     <button
-                        onClick={() => setFilterType('text')}
+                        onClick={() => changeFilter('text')}
                         className={`px-4 py-2 rounded-lg ${filterType === 'text' ? 'bg-blue-500 text-white' : 'bg-gray-100 text-gray-700'}`}
                     >
-                        Text Files
+                        Text Files ({countFor('text')})
                     </button>
                     <button
-                        onClick={() => setFilterType('json')}
+                        onClick={() => changeFilter('json')}
                         className={`px-4 py-2 rounded-lg ${filterType === 'json' ? 'bg-blue-500 text-white' : 'bg-gray-100 text-gray-700'}`}
                     >
-                        JSON
+                        JSON ({countFor('json')})
+                    </button>
+                </div>
+                <div className="flex gap-2 items-center ml-auto">
+                    <label className="text-sm text-gray-600">Sort by</label>
+                    <select
+                        value={sort}
+                        onChange={(e) => { setSort(e.target.value); setOffset(0); }}
+                        className="border rounded-lg px-3 py-2 text-sm"
+                    >
+                        <option value="name">Name</option>
+                        <option value="path">Path</option>
+                        <option value="size">Size</option>
+                        <option value="type">Type</option>
+                    </select>
+                    <button
+                        onClick={() => { setOrder(order === 'asc' ? 'desc' : 'asc'); setOffset(0); }}
+                        className="px-3 py-2 rounded-lg bg-gray-100 text-gray-700 text-sm"
+                        title="Toggle sort order"
+                    >
+                        {order === 'asc' ? '↑ Asc' : '↓ Desc'}
                     </button>
                 </div>
             </div>
 
             {/* Files Grid */}
             <div className="ml-[32px]">
-                {filteredFiles.length > 0 ? (
+                {files.length > 0 ? (
                     <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-4">
-                        {filteredFiles.map((file, index) => {
+                        {files.map((file, index) => {
                             const isImage = ['jpg', 'jpeg', 'png', 'gif', 'webp'].includes(file.name.split('.').pop().toLowerCase());
                             
                             return (
@@ -242,6 +285,31 @@ export const DatasetView = () => {
                         <p className="text-gray-500">No files found in this dataset</p>
                     </div>
                 )}
+
+                {/* Pagination */}
+                {total > 0 && (
+                    <div className="flex items-center justify-between mt-6">
+                        <p className="text-sm text-gray-600">
+                            Showing {offset + 1}–{Math.min(offset + files.length, total)} of {total} files
+                        </p>
+                        <div className="flex gap-2">
+                            <button
+                                onClick={() => setOffset(Math.max(0, offset - PAGE_SIZE))}
+                                disabled={offset === 0 || isLoading}
+                                className="px-4 py-2 rounded-lg bg-gray-100 text-gray-700 disabled:opacity-50"
+                            >
+                                ← Previous
+                            </button>
+                            <button
+                                onClick={() => setOffset(offset + PAGE_SIZE)}
+                                disabled={offset + PAGE_SIZE >= total || isLoading}
+                                className="px-4 py-2 rounded-lg bg-gray-100 text-gray-700 disabled:opacity-50"
+                            >
+                                Next →
+                            </button>
+                        </div>
+                    </div>
+                )}
             </div>
 
             {/* Image Modal */}
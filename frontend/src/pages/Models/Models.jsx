@@ -144,9 +144,13 @@ const TrainModelModal = ({ projectName, onClose }) => {
 
 export const Models = () => {
     const [projects, setProjects] = useState([]);
+    const [projectsCursor, setProjectsCursor] = useState(null);
     const [selectedProject, setSelectedProject] = useState('');
     const [models, setModels] = useState([]);
+    const [modelsCursor, setModelsCursor] = useState(null);
+    const [projectId, setProjectId] = useState(null);
     const [isLoading, setIsLoading] = useState(true);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
     const [isTrainOpen, setIsTrainOpen] = useState(false);
     const navigate = useNavigate();
 
@@ -160,12 +164,16 @@ export const Models = () => {
         }
     }, [selectedProject]);
 
-    const fetchProjects = async () => {
+    // Lists are paged by the API; "Load more" follows next_cursor
+    const fetchProjects = async (after = null) => {
         try {
-            const response = await fetch('http://localhost:8000/api/projects');
+            const params = new URLSearchParams();
+            if (after) params.set('after', after);
+            const response = await fetch(`http://localhost:8000/api/projects?${params}`);
             const data = await response.json();
-            setProjects(data.projects || []);
-            if (data.projects && data.projects.length > 0) {
+            setProjects(prev => [...(after ? prev : []), ...(data.projects || [])]);
+            setProjectsCursor(data.next_cursor || null);
+            if (!after && data.projects && data.projects.length > 0) {
                 setSelectedProject(data.projects[0].name);
             }
         } catch (error) {
@@ -173,27 +181,28 @@ export const Models = () => {
         }
     };
 
+    const fetchModelsPage = async (id, after = null) => {
+        const params = new URLSearchParams({ project_id: id });
+        if (after) params.set('after', after);
+        const response = await fetch(`http://localhost:8000/api/models?${params}`);
+        const data = await response.json();
+        setModels(prev => [...(after ? prev : []), ...(data.models || [])]);
+        setModelsCursor(data.next_cursor || null);
+    };
+
     const fetchModels = async (projectName) => {
         setIsLoading(true);
         try {
-            // Fetch projects if not already loaded
-            let currentProjects = projects;
-            if (projects.length === 0) {
-                const projectsResponse = await fetch('http://localhost:8000/api/projects');
-                const projectsData = await projectsResponse.json();
-                currentProjects = projectsData.projects || [];
-            }
-            
-            const project = currentProjects.find(p => p.name === projectName);
-            if (!project) {
+            const projectResponse = await fetch(`http://localhost:8000/api/projects/by-name/${encodeURIComponent(projectName)}`);
+            if (!projectResponse.ok) {
                 setModels([]);
-                setIsLoading(false);
+                setModelsCursor(null);
+                setProjectId(null);
                 return;
             }
-
-            const response = await fetch(`http://localhost:8000/api/models?project_id=${project.id}`);
-            const data = await response.json();
-            setModels(data.models || []);
+            const { project } = await projectResponse.json();
+            setProjectId(project.id);
+            await fetchModelsPage(project.id);
         } catch (error) {
             console.error('Error fetching models:', error);
         } finally {
@@ -201,6 +210,17 @@ export const Models = () => {
         }
     };
 
+    const handleLoadMoreModels = async () => {
+        setIsLoadingMore(true);
+        try {
+            await fetchModelsPage(projectId, modelsCursor);
+        } catch (error) {
+            console.error('Error fetching models:', error);
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
     const handleProjectClick = (projectName) => {
         navigate(`/projects/${projectName}`);
     };
@@ -219,6 +239,11 @@ export const Models = () => {
                         <option key={project.id} value={project.name}>{project.name}</option>
                     ))}
                 </select>
+                {projectsCursor && (
+                    <button className='text-sm text-blue-600 hover:underline' onClick={() => fetchProjects(projectsCursor)}>
+                        Load more projects
+                    </button>
+                )}
                 <button className='ml-auto mr-[32px] bg-blue-600 text-white px-4 py-2 rounded' onClick={() => setIsTrainOpen(true)}>⚡ Train New Model</button>
             </div>
 
@@ -298,6 +323,17 @@ export const Models = () => {
                             </div>
                         );
                     })}
+                    {modelsCursor && (
+                        <div className='text-center pt-2'>
+                            <button
+                                onClick={handleLoadMoreModels}
+                                disabled={isLoadingMore}
+                                className='px-6 py-2 rounded-lg bg-gray-100 text-gray-700 hover:bg-gray-200 disabled:opacity-50'
+                            >
+                                {isLoadingMore ? 'Loading...' : 'Load more models'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             )}
 
@@ -8,6 +8,9 @@ export const ProjectDetails = () => {
     const [projectInfo, setProjectInfo] = useState(null);
     const [datasets, setDatasets] = useState([]);
     const [models, setModels] = useState([]);
+    const [datasetsCursor, setDatasetsCursor] = useState(null);
+    const [modelsCursor, setModelsCursor] = useState(null);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
     const [isLoading, setIsLoading] = useState(true);
     const [activeTab, setActiveTab] = useState('datasets'); // 'datasets' or 'models'
     const [showTrainingModal, setShowTrainingModal] = useState(false);
@@ -38,37 +41,53 @@ export const ProjectDetails = () => {
         fetchProjectDetails();
     }, [projectName]);
 
+    // Lists are paged by the API; "Load more" follows next_cursor
+    const fetchDatasetsPage = async (after = null) => {
+        const params = new URLSearchParams();
+        if (after) params.set('after', after);
+        const response = await fetch(`http://localhost:8000/api/datasets/project/${encodeURIComponent(projectName)}?${params}`);
+        const data = await response.json();
+        setDatasets(prev => {
+            const base = after ? prev : [];
+            const page = (data.datasets || []).map((ds, idx) => ({
+                ...ds,
+                id: base.length + idx + 1, // Use position as ID for now
+                databaseId: ds.id
+            }));
+            return [...base, ...page];
+        });
+        setDatasetsCursor(data.next_cursor || null);
+    };
+
+    const fetchModelsPage = async (projectId, after = null) => {
+        const params = new URLSearchParams({ project_id: projectId });
+        if (after) params.set('after', after);
+        const response = await fetch(`http://localhost:8000/api/models?${params}`);
+        const data = await response.json();
+        setModels(prev => [...(after ? prev : []), ...(data.models || [])]);
+        setModelsCursor(data.next_cursor || null);
+    };
+
     const fetchProjectDetails = async () => {
         setIsLoading(true);
         try {
             // Fetch project info
-            const projectResponse = await fetch(`http://localhost:8000/api/projects`);
-            const projectData = await projectResponse.json();
-            const project = projectData.projects.find(p => p.name === projectName);
+            const projectResponse = await fetch(`http://localhost:8000/api/projects/by-name/${encodeURIComponent(projectName)}`);
+            const project = projectResponse.ok ? (await projectResponse.json()).project : null;
             
             if (project) {
                 setProjectInfo(project);
             }
 
             // Fetch datasets
-            const datasetsResponse = await fetch(`http://localhost:8000/api/datasets/project/${encodeURIComponent(projectName)}`);
-            const datasetsData = await datasetsResponse.json();
-            const formattedDatasets = (datasetsData.datasets || []).map((ds, idx) => ({
-                ...ds,
-                id: idx + 1, // Use index as ID for now
-                databaseId: ds.id
-            }));
-            setDatasets(formattedDatasets);
+            await fetchDatasetsPage();
 
             // Fetch models
             if (project) {
-                console.log('Fetching models for project:', project.id);
-                const modelsResponse = await fetch(`http://localhost:8000/api/models?project_id=${project.id}`);
-                const modelsData = await modelsResponse.json();
-                console.log('Raw models response:', modelsData);
-                console.log('Models array:', modelsData.models);
-                console.log('Models count:', modelsData.models?.length || 0);
-                setModels(modelsData.models || []);
+                await fetchModelsPage(project.id);
+            } else {
+                setModels([]);
+                setModelsCursor(null);
             }
 
         } catch (error) {
@@ -79,6 +98,18 @@ export const ProjectDetails = () => {
         }
     };
 
+    const handleLoadMore = async (loadPage) => {
+        setIsLoadingMore(true);
+        try {
+            await loadPage();
+        } catch (error) {
+            console.error('Error loading more:', error);
+            alert('Failed to load more items');
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
     const handleViewDataset = (dataset) => {
         navigate(`/datasets/${encodeURIComponent(dataset.name)}/project/${encodeURIComponent(projectName)}`);
     };
@@ -144,14 +175,14 @@ export const ProjectDetails = () => {
                         )
                     );
                     
-                    if (status.status === 'completed' || status.status === 'failed') {
+                    if (status.status === 'completed' || status.status === 'failed' || status.status === 'cancelled') {
                         // Remove from active trainings after a delay
                         setTimeout(() => {
                             setActiveTrainings(prev => prev.filter(t => t.id !== result.training_id));
                             fetchProjectDetails();
                         }, 3000);
                         
-                        alert(status.status === 'completed' ? 'Training completed!' : 'Training failed!');
+                        alert(status.status === 'completed' ? 'Training completed!' : status.status === 'cancelled' ? 'Training cancelled!' : 'Training failed!');
                     } else {
                         // Continue polling
                         setTimeout(pollTrainingStatus, 2000);
@@ -298,7 +329,7 @@ export const ProjectDetails = () => {
                                 : 'text-gray-500 hover:text-gray-700'
                         }`}
                     >
-                        Datasets ({datasets.length})
+                        Datasets ({datasets.length}{datasetsCursor ? '+' : ''})
                     </button>
                     <button
                         onClick={() => setActiveTab('models')}
@@ -308,7 +339,7 @@ export const ProjectDetails = () => {
                                 : 'text-gray-500 hover:text-gray-700'
                         }`}
                     >
-                        Models ({models.length})
+                        Models ({models.length}{modelsCursor ? '+' : ''})
                     </button>
                 </div>
             </div>
@@ -363,6 +394,17 @@ export const ProjectDetails = () => {
                                 </button>
                             </div>
                         )}
+                        {datasetsCursor && (
+                            <div className="text-center mt-4">
+                                <button
+                                    onClick={() => handleLoadMore(() => fetchDatasetsPage(datasetsCursor))}
+                                    disabled={isLoadingMore}
+                                    className="px-6 py-2 rounded-lg bg-gray-100 text-gray-700 hover:bg-gray-200 disabled:opacity-50"
+                                >
+                                    {isLoadingMore ? 'Loading...' : 'Load more datasets'}
+                                </button>
+                            </div>
+                        )}
                     </div>
                 )}
 
@@ -558,6 +600,17 @@ export const ProjectDetails = () => {
                                 </button>
                             </div>
                         )}
+                        {modelsCursor && (
+                            <div className="text-center mt-4">
+                                <button
+                                    onClick={() => handleLoadMore(() => fetchModelsPage(projectInfo.id, modelsCursor))}
+                                    disabled={isLoadingMore}
+                                    className="px-6 py-2 rounded-lg bg-gray-100 text-gray-700 hover:bg-gray-200 disabled:opacity-50"
+                                >
+                                    {isLoadingMore ? 'Loading...' : 'Load more models'}
+                                </button>
+                            </div>
+                        )}
                     </div>
                 )}
             </div>
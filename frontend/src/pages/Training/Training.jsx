@@ -6,6 +6,8 @@ export const Training = () => {
     const [trainingRuns, setTrainingRuns] = useState([]);
     const [selectedRun, setSelectedRun] = useState(null);
     const [isLoading, setIsLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
     const navigate = useNavigate();
 
     useEffect(() => {
@@ -18,6 +20,7 @@ export const Training = () => {
             const response = await fetch('http://localhost:8000/api/training/runs');
             const data = await response.json();
             setTrainingRuns(data.training_runs || []);
+            setNextCursor(data.next_cursor || null);
             if (data.training_runs && data.training_runs.length > 0) {
                 setSelectedRun(data.training_runs[0]);
             }
@@ -28,6 +31,21 @@ export const Training = () => {
         }
     };
 
+    // Runs are paged by the API, newest first; "Load more" follows next_cursor
+    const loadMoreTrainingRuns = async () => {
+        setIsLoadingMore(true);
+        try {
+            const response = await fetch(`http://localhost:8000/api/training/runs?after=${encodeURIComponent(nextCursor)}`);
+            const data = await response.json();
+            setTrainingRuns(prev => [...prev, ...(data.training_runs || [])]);
+            setNextCursor(data.next_cursor || null);
+        } catch (error) {
+            console.error('Error fetching training runs:', error);
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
     const getStatusColor = (status) => {
         switch(status?.toLowerCase()) {
             case 'completed':
@@ -184,6 +202,17 @@ export const Training = () => {
                             </div>
                         );
                     })}
+                    {nextCursor && (
+                        <div className='text-center pb-4'>
+                            <button
+                                onClick={loadMoreTrainingRuns}
+                                disabled={isLoadingMore}
+                                className='px-6 py-2 rounded bg-gray-100 text-gray-700 hover:bg-gray-200 disabled:opacity-50'
+                            >
+                                {isLoadingMore ? 'Loading...' : 'Load more runs'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             )}
         </div>
@@ -284,6 +284,7 @@ export const UploadDataSet = () => {
     const [activeProjects, setActiveProjects] = React.useState([]);
     const [datasets, setDatasets] = React.useState([]);
     const [isLoadingDatasets, setIsLoadingDatasets] = React.useState(false);
+    const [datasetsCursor, setDatasetsCursor] = React.useState(null);
 
     const loadActiveProjects = async () => {
         try {
@@ -304,16 +305,20 @@ export const UploadDataSet = () => {
         loadActiveProjects();
     }, []);
 
-    const fetchDatasets = async () => {
+    // Datasets are paged by the API; "Load more" follows next_cursor
+    const fetchDatasets = async (after = null) => {
         if (!selectedProject) {
             setDatasets([]);
+            setDatasetsCursor(null);
             return;
         }
 
-        setIsLoadingDatasets(true);
+        if (!after) setIsLoadingDatasets(true);
         try {
             console.log(`Fetching datasets for project: ${selectedProject}`);
-            const response = await fetch(`http://localhost:8000/api/datasets/project/${selectedProject}`);
+            const params = new URLSearchParams();
+            if (after) params.set('after', after);
+            const response = await fetch(`http://localhost:8000/api/datasets/project/${encodeURIComponent(selectedProject)}?${params}`);
             if (!response.ok) {
                 throw new Error('Failed to fetch datasets');
             }
@@ -330,10 +335,11 @@ export const UploadDataSet = () => {
                 status: 'active',
             }));
             console.log("Processed datasets:", refactoredDatasets);
-            setDatasets(refactoredDatasets);
+            setDatasets(prev => [...(after ? prev : []), ...refactoredDatasets]);
+            setDatasetsCursor(data.next_cursor || null);
         } catch (error) {
             console.error('Error fetching datasets:', error);
-            setDatasets([]);
+            if (!after) setDatasets([]);
         } finally {
             setIsLoadingDatasets(false);
         }
@@ -405,6 +411,14 @@ export const UploadDataSet = () => {
                                         </button>
                                     </div>
                                 ))}
+                                {datasetsCursor && (
+                                    <button
+                                        onClick={() => fetchDatasets(datasetsCursor)}
+                                        className='w-[640px] py-2 rounded bg-gray-100 text-gray-700 hover:bg-gray-200'
+                                    >
+                                        Load more datasets
+                                    </button>
+                                )}
                             </div>
                         ) : (
                             <div className='border rounded p-6 w-[640px] text-gray-700'>
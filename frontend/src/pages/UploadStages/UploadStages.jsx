@@ -6,6 +6,7 @@ export const UploadStages = () => {
     const [selectedProject, setSelectedProject] = useState(null);
     const [availableProjects, setAvailableProjects] = useState([]);
     const [isLoadingProjects, setIsLoadingProjects] = useState(false);
+    const [projectsCursor, setProjectsCursor] = useState(null);
     
     // Dataset selection states - Only Images, Labels, and YAML
     const [selectedDataTypes, setSelectedDataTypes] = useState({
@@ -20,6 +21,7 @@ export const UploadStages = () => {
     const [availableDatasets, setAvailableDatasets] = useState([]);
     const [selectedDatasetId, setSelectedDatasetId] = useState("");
     const [isLoadingDatasets, setIsLoadingDatasets] = useState(false);
+    const [datasetsCursor, setDatasetsCursor] = useState(null);
     
     // File upload states - Only Images, Labels, and YAML
     const [uploadedFiles, setUploadedFiles] = useState({
@@ -48,15 +50,20 @@ export const UploadStages = () => {
     // Auto-select project if coming from UploadDataSet
     useEffect(() => {
         const projectFromStorage = sessionStorage.getItem('selectedProjectForUpload');
-        if (projectFromStorage && availableProjects.length > 0) {
-            const project = availableProjects.find(p => p.name === projectFromStorage);
-            if (project) {
-                setSelectedProject(project);
-                // Clear from storage
-                sessionStorage.removeItem('selectedProjectForUpload');
-            }
+        if (projectFromStorage) {
+            // Fetched by name: the project may not be on the first page of the list
+            fetch(`http://localhost:8000/api/projects/by-name/${encodeURIComponent(projectFromStorage)}`)
+                .then(response => response.ok ? response.json() : null)
+                .then(data => {
+                    if (data && data.project) {
+                        setSelectedProject(data.project);
+                        // Clear from storage
+                        sessionStorage.removeItem('selectedProjectForUpload');
+                    }
+                })
+                .catch(error => console.error('Error fetching project:', error));
         }
-    }, [availableProjects]);
+    }, []);
 
     // Fetch available datasets from backend when existing dataset is selected
     useEffect(() => {
@@ -67,15 +74,19 @@ export const UploadStages = () => {
         }
     }, [datasetType]);
 
-    const fetchAvailableProjects = async () => {
-        setIsLoadingProjects(true);
+    // Lists are paged by the API; "Load more" follows next_cursor
+    const fetchAvailableProjects = async (after = null) => {
+        if (!after) setIsLoadingProjects(true);
         try {
-            const response = await fetch('http://localhost:8000/api/projects');
+            const params = new URLSearchParams();
+            if (after) params.set('after', after);
+            const response = await fetch(`http://localhost:8000/api/projects?${params}`);
             if (!response.ok) {
                 throw new Error('Failed to fetch projects');
             }
             const data = await response.json();
-            setAvailableProjects(data.projects);
+            setAvailableProjects(prev => [...(after ? prev : []), ...(data.projects || [])]);
+            setProjectsCursor(data.next_cursor || null);
         } catch (error) {
             console.error('Error fetching projects:', error);
             // Mock data for fallback
@@ -110,23 +121,26 @@ export const UploadStages = () => {
         }
     };
 
-    const fetchAvailableDatasets = async () => {
+    const fetchAvailableDatasets = async (after = null) => {
         if (!selectedProject) {
             console.log('No project selected, cannot fetch datasets');
             return;
         }
         
-        setIsLoadingDatasets(true);
+        if (!after) setIsLoadingDatasets(true);
         try {
             console.log('Fetching datasets for project:', selectedProject.name);
-            const response = await fetch(`http://localhost:8000/api/datasets/project/${selectedProject.name}`);
+            const params = new URLSearchParams();
+            if (after) params.set('after', after);
+            const response = await fetch(`http://localhost:8000/api/datasets/project/${encodeURIComponent(selectedProject.name)}?${params}`);
             if (!response.ok) {
                 throw new Error('Failed to fetch datasets');
             }
             const data = await response.json();
             console.log('Received datasets data:', data);
             const datasets = Array.isArray(data.datasets) ? data.datasets : data.datasets || [];
-            setAvailableDatasets(datasets);
+            setAvailableDatasets(prev => [...(after ? prev : []), ...datasets]);
+            setDatasetsCursor(data.next_cursor || null);
             console.log('Set available datasets:', datasets);
         } catch (error) {
             console.error('Error fetching datasets:', error);
@@ -300,6 +314,14 @@ export const UploadStages = () => {
                                             </div>
                                         </label>
                                     ))}
+                                    {projectsCursor && (
+                                        <button
+                                            onClick={() => fetchAvailableProjects(projectsCursor)}
+                                            className="w-full py-2 text-sm text-blue-600 hover:underline"
+                                        >
+                                            Load more projects
+                                        </button>
+                                    )}
                                 </div>
                             ) : (
                                 <div className="text-center py-8 text-gray-500">
@@ -520,6 +542,14 @@ export const UploadStages = () => {
                                                     </div>
                                                 </label>
                                             ))}
+                                            {datasetsCursor && (
+                                                <button
+                                                    onClick={() => fetchAvailableDatasets(datasetsCursor)}
+                                                    className="w-full py-2 text-sm text-blue-600 hover:underline"
+                                                >
+                                                    Load more datasets
+                                                </button>
+                                            )}
                                         </div>
                                     ) : (
                                         <div className="text-center py-8 text-gray-500">